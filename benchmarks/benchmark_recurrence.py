@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""繰り返し予定の展開処理のベンチマーク
+
+RecurrenceCalculator（calculate_dates / expand_events / _get_nth_weekday / to_rrule /
+parse_rrule）と FirestoreManager.search_events を、合成したサーバー（予定 10 / 100 / 1000 件）と
+検索期間（1週間〜2年）の組み合わせで計測し、結果を JSON で出力する。
+search_events はテスト用のインメモリ Firestore（tests/fake_firestore.py）上で実行するため、
+GCP への接続は不要（テストのフェイクを使う開発用ツールなので scripts/ ではなくここに置く）。
+予定データは --seed から、検索期間は --start から決定的に決まるため、実行日によって計測対象は変わらない。
+
+使い方:
+    # 全ケースを計測して標準出力へ
+    python benchmarks/benchmark_recurrence.py
+
+    # ファイルへ保存（リリース間の比較用）
+    python benchmarks/benchmark_recurrence.py --output bench.json
+
+    # 件数・期間を絞って計測
+    python benchmarks/benchmark_recurrence.py --sizes 10 100 --windows 1w 3m
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import timeit
+from datetime import date, datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tests import fake_firestore
+
+fake_module = fake_firestore.install()
+
+import firestore_manager  # noqa: E402
+from firestore_manager import FirestoreManager  # noqa: E402
+from recurrence_calculator import RecurrenceCalculator, _compile_rrule  # noqa: E402
+
+# search_events は本物のクライアントがあってもフェイク上で計測する（テストの patch.object と同じ差し替え）
+firestore_manager.firestore = fake_module
+
+SIZES = (10, 100, 1000)
+WINDOWS = {"1w": 7, "1m": 30, "3m": 91, "1y": 365, "2y": 730}
+GUILD_ID = "benchmark"
+# 検索期間の開始日の既定値（月曜日）。リリース間で同じ期間を比べるため固定する
+DEFAULT_START = "2026-01-05"
+
+
+def make_events(count, seed):
+    """繰り返しタイプを実データに近い比率で混ぜた予定を count 件生成する"""
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        kind = rng.choices(
+            ["weekly", "biweekly", "nth_week", "monthly_date"], weights=[40, 20, 25, 15]
+        )[0]
+        event = {
+            "event_name": f"予定{i}",
+            "recurrence": kind,
+            "weekday": rng.randrange(7),
+            "nth_weeks": None,
+            "monthly_dates": None,
+            "time": f"{rng.randrange(18, 24):02d}:{rng.choice(['00', '30'])}",
+        }
+        if kind == "nth_week":
+            event["nth_weeks"] = sorted(rng.sample(range(1, 6), rng.randint(1, 2)))
+        elif kind == "monthly_date":
+            event["weekday"] = None
+            event["monthly_dates"] = sorted(rng.sample(range(1, 32), rng.randint(1, 2)))
+        events.append(event)
+    return events
+
+
+def measure(func, repeat):
+    """timeit で1回あたりの実行時間（マイクロ秒）を計測する"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    samples = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "number": number,
+        "repeat": repeat,
+        "per_call_us": {
+            "min": round(min(samples), 3),
+            "median": round(statistics.median(samples), 3),
+            "max": round(max(samples), 3),
+        },
+    }
+
+
+class FixedHorizonManager(FirestoreManager):
+    """発生日インデックスの期間を今日ではなく start の週から数える FirestoreManager"""
+
+    def __init__(self, start: date, **kwargs):
+        self._horizon_origin = start - timedelta(days=start.weekday())
+        super().__init__(**kwargs)
+
+    def _occurrence_horizon(self):
+        return self._horizon_origin, self._horizon_origin + timedelta(weeks=self._occurrence_index_weeks, days=-1)
+
+
+def build_manager(events, occurrence_index_weeks, start):
+    """フェイク Firestore に予定を登録し、キャッシュ（とインデックス）を温めた FirestoreManager を返す
+
+    隔週の予定は start の週を DTSTART にして、位相が実行日の作成日時に左右されないようにする。
+    """
+    mgr = FixedHorizonManager(
+        start.date(),
+        use_snapshot_listeners=False,
+        occurrence_index_weeks=occurrence_index_weeks,
+    )
+    for i, event in enumerate(events):
+        event_id = mgr.add_event(
+            guild_id=GUILD_ID,
+            tags=[],
+            event_type=None,
+            **event,
+        )
+        if event["recurrence"] == "biweekly":
+            dtstart = start + timedelta(days=(event["weekday"] - start.weekday()) % 7)
+            mgr.update_google_calendar_events(
+                event_id, [{"event_id": f"benchmark-{i}", "dtstart": dtstart.isoformat()}], guild_id=GUILD_ID,
+            )
+    mgr.get_all_active_events(GUILD_ID)
+    return mgr
+
+
+def run_benchmarks(sizes, windows, repeat, seed, start):
+    results = []
+
+    def record(name, size, window, stats):
+        results.append({"name": name, "events": size, "window": window, **stats})
+        per_call = stats["per_call_us"]["median"]
+        print(f"  {name:<32} events={size!s:<5} window={window!s:<4} {per_call:>14.1f} us", file=sys.stderr)
+
+    # 単体の計算（予定件数に依存しないもの）
+    record("get_nth_weekday", None, None, measure(
+        lambda: [
+            RecurrenceCalculator._get_nth_weekday(2026, month, nth, weekday)
+            for month in range(1, 13) for nth in range(1, 6) for weekday in range(7)
+        ],
+        repeat,
+    ))
+
+    for size in sizes:
+        events = make_events(size, seed)
+        rrules = [
+            RecurrenceCalculator.to_rrule(e["recurrence"], e["nth_weeks"], e["weekday"], e["monthly_dates"])
+            for e in events
+        ]
+        record("to_rrule", size, None, measure(
+            lambda: [
+                RecurrenceCalculator.to_rrule(e["recurrence"], e["nth_weeks"], e["weekday"], e["monthly_dates"])
+                for e in events
+            ],
+            repeat,
+        ))
+
+        def parse_uncached():
+            # 解析そのものを計測するためキャッシュを空にしてから解析する
+            _compile_rrule.cache_clear()
+            return [RecurrenceCalculator.parse_rrule(r) for r in rrules]
+
+        record("parse_rrule_uncached", size, None, measure(parse_uncached, repeat))
+
+        indexed = build_manager(events, firestore_manager.OCCURRENCE_INDEX_WEEKS, start)
+        plain = build_manager(events, 0, start)
+
+        for window in windows:
+            end = start + timedelta(days=WINDOWS[window]) - timedelta(microseconds=1)
+            record("calculate_dates", size, window, measure(
+                lambda: [
+                    RecurrenceCalculator.calculate_dates(
+                        e["recurrence"], e["nth_weeks"], e["weekday"], start,
+                        months_ahead=0, end_date_limit=end, monthly_dates=e["monthly_dates"],
+                    )
+                    for e in events
+                ],
+                repeat,
+            ))
+            record("expand_events", size, window, measure(
+                lambda: RecurrenceCalculator.expand_events(events, start, end), repeat,
+            ))
+            compiled = [RecurrenceCalculator.parse_rrule(r) for r in rrules]
+            record("rrule_between", size, window, measure(
+                lambda: [rule.between(start, start, end) for rule in compiled], repeat,
+            ))
+            record("search_events", size, window, measure(
+                lambda: plain.search_events(start_date=start, end_date=end, guild_id=GUILD_ID), repeat,
+            ))
+            record("search_events_indexed", size, window, measure(
+                lambda: indexed.search_events(start_date=start, end_date=end, guild_id=GUILD_ID), repeat,
+            ))
+    return results
+
+
+def monday(value):
+    """--start の日付（YYYY-MM-DD）をその週の月曜日 0:00 にする"""
+    day = date.fromisoformat(value)
+    return datetime.combine(day - timedelta(days=day.weekday()), datetime.min.time())
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="繰り返し予定の展開処理のベンチマーク")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="サーバーあたりの予定件数")
+    parser.add_argument("--windows", nargs="+", choices=list(WINDOWS), default=list(WINDOWS), help="検索期間")
+    parser.add_argument("--repeat", type=int, default=5, help="各ケースの計測回数（中央値を比較に使う）")
+    parser.add_argument("--seed", type=int, default=20260101, help="予定データ生成の乱数シード")
+    parser.add_argument(
+        "--start", type=monday, default=monday(DEFAULT_START),
+        help=f"検索期間の開始日 YYYY-MM-DD（その週の月曜日から計測、既定: {DEFAULT_START}）",
+    )
+    parser.add_argument("--output", help="JSON の出力先（省略時は標準出力）")
+    args = parser.parse_args()
+
+    print("*** ベンチマーク実行中（進捗は標準エラー出力） ***", file=sys.stderr)
+    results = run_benchmarks(args.sizes, args.windows, args.repeat, args.seed, args.start)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "window_start": args.start.date().isoformat(),
+            "occurrence_index_weeks": firestore_manager.OCCURRENCE_INDEX_WEEKS,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"\n=== {len(results)} 件の結果を {args.output} に保存しました ===", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,19 +4,28 @@ from discord.ext import commands, tasks
 import json
 import csv
 import io
+import logging
 import asyncio
 import calendar
+import hashlib
 import secrets
 from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict, Any, Tuple
 
 from nlp_processor import NLPProcessor
-from calendar_manager import GoogleCalendarManager
-from firestore_manager import FirestoreManager
+from calendar_manager import AsyncCalendarManager, CalendarExecutor, CalendarManagerPool, GoogleCalendarManager
+from rate_limiter import CalendarRateLimiter
+from calendar_push import (
+    WATCH_TTL, PushNotification, make_channel_id, make_channel_token,
+    needs_renewal, verify_notification, watch_from_response,
+)
+from firestore_manager import AsyncFirestoreManager
 from recurrence_calculator import RecurrenceCalculator
 from oauth_handler import OAuthHandler
 from conversation_manager import ConversationManager
 
+logger = logging.getLogger(__name__)
+
 def _parse_json_field(value):
     """JSON文字列をパースする。既にパース済みの場合はそのまま返す。"""
     if isinstance(value, str):
@@ -27,10 +36,10 @@ def _parse_json_field(value):
     return value if value is not None else []
 
 
-def _safe_add_event_history(db_manager, **kwargs):
+async def _safe_add_event_history(db_manager, **kwargs):
     """変更履歴をベストエフォートで記録（失敗してもコア処理に影響しない）"""
     try:
-        db_manager.add_event_history(**kwargs)
+        await db_manager.add_event_history(**kwargs)
     except Exception as e:
         print(f"[event_history] Failed to record history: {e}")
 
@@ -97,13 +106,31 @@ LEGEND_COLOR_ID = "8"  # グラファイト = 凡例イベント専用
 
 CANCEL_KEYWORDS = {"キャンセル", "やめる", "やめ", "中止", "取り消し", "cancel", "quit", "exit"}
 
+# 一覧表示だけに使う予定取得で読み込むフィールド（description 等の大きなフィールドは除く）
+EVENT_DELETE_FIELDS = [
+    "event_name", "recurrence", "nth_weeks", "monthly_dates", "weekday", "time",
+    "google_calendar_events", "calendar_owner", "created_by",
+]
+IRREGULAR_LIST_FIELDS = ["event_name", "recurrence", "weekday", "time", "tags", "calendar_owner"]
+
+# 整合性チェックで syncToken による増分同期を使わず全件を照合する間隔
+CALENDAR_FULL_SYNC_INTERVAL = timedelta(hours=24)
+# 変更通知を受けてから整合性チェックを始めるまでの待ち時間（連続した通知をまとめる）
+CALENDAR_PUSH_DEBOUNCE_SECONDS = 5
+# 変更通知が有効な場合の定期整合性チェックの間隔（通知の取りこぼし対策）
+CALENDAR_PUSH_SAFETY_SYNC_HOURS = 6
+# 内容が変わっていない凡例イベントも Google Calendar に反映し直す間隔（Google 側での削除・変更の復元）
+LEGEND_RECHECK_INTERVAL = timedelta(hours=24)
+
 
 class CalendarBot(commands.Bot):
     def __init__(
         self,
         nlp_processor: NLPProcessor,
-        db_manager: FirestoreManager,
+        db_manager: AsyncFirestoreManager,
         oauth_handler: Optional[OAuthHandler] = None,
+        calendar_rate_limiter: Optional[CalendarRateLimiter] = None,
+        calendar_webhook_url: Optional[str] = None,
     ):
         intents = discord.Intents.default()
         intents.message_content = True
@@ -117,21 +144,34 @@ class CalendarBot(commands.Bot):
         self.db_manager = db_manager
         self.oauth_handler = oauth_handler
         self.conversation_manager = ConversationManager()
-
-    def get_calendar_manager_for_user(self, guild_id: Optional[int], user_id: str) -> Optional[GoogleCalendarManager]:
-        """ユーザーのOAuthトークンでカレンダーマネージャを取得"""
+        # (guild_id, user_id) ごとの GoogleCalendarManager（同期ループ・凡例更新・編集で使い回す）
+        self.calendar_pool = CalendarManagerPool()
+        # Google Calendar API の流量制限（全カレンダー共有＋オーナーごと）
+        self.calendar_rate_limiter = calendar_rate_limiter or CalendarRateLimiter()
+        # Google Calendar API の呼び出しを行う専用スレッドプール（オーナーごとに同時実行数を制限）
+        self.calendar_executor = CalendarExecutor()
+        # Google Calendar の変更通知の受信URL（未設定なら通知を使わず定期チェックのみ）
+        self.calendar_webhook_url = calendar_webhook_url
+        # (guild_id, user_id) ごとの整合性チェックの排他（定期チェックと通知による同期の重複防止）
+        self._calendar_sync_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self._push_pending: set = set()
+        self._push_task: Optional[asyncio.Task] = None
+
+    async def get_calendar_manager_for_user(self, guild_id: Optional[int], user_id: str) -> Optional[AsyncCalendarManager]:
+        """ユーザーのOAuthトークンでカレンダーマネージャを取得（メソッドはすべて await で呼ぶ）"""
         if guild_id is None:
             return None
 
         guild_id_str = str(guild_id)
-        oauth_tokens = self.db_manager.get_oauth_tokens(guild_id_str, user_id)
+        oauth_tokens = await self.db_manager.get_oauth_tokens(guild_id_str, user_id)
         if not oauth_tokens or not self.oauth_handler:
+            self.calendar_pool.discard(guild_id_str, user_id)
             return None
 
-        try:
-            def on_token_refresh(new_access_token: str, new_expiry: str):
-                self.db_manager.update_oauth_access_token(guild_id_str, user_id, new_access_token, new_expiry)
+        def on_token_refresh(new_access_token: str, new_expiry: str):
+            self.db_manager.sync.update_oauth_access_token(guild_id_str, user_id, new_access_token, new_expiry)
 
+        def create_manager() -> GoogleCalendarManager:
             return GoogleCalendarManager(
                 access_token=oauth_tokens['access_token'],
                 refresh_token=oauth_tokens['refresh_token'],
@@ -140,17 +180,26 @@ class CalendarBot(commands.Bot):
                 client_secret=self.oauth_handler.client_secret,
                 calendar_id=oauth_tokens.get('calendar_id', 'primary'),
                 on_token_refresh=on_token_refresh,
+                rate_limiter=self.calendar_rate_limiter,
+                rate_limit_key=f"{guild_id_str}:{user_id}",
+            )
+
+        try:
+            # トークン更新は通信を伴うため Google API 用のスレッドプールで行う
+            manager = await self.calendar_executor.run(
+                (guild_id_str, user_id), self.calendar_pool.get, guild_id_str, user_id, oauth_tokens, create_manager,
             )
+            return self.calendar_executor.wrap(manager, guild_id_str, user_id)
         except Exception as e:
+            self.calendar_pool.discard(guild_id_str, user_id)
             print(f"OAuth token error for guild {guild_id_str}, user {user_id}: {e}")
             return None
 
-    def _get_server_context(self, guild_id: str) -> Dict[str, Any]:
+    async def _get_server_context(self, guild_id: str) -> Dict[str, Any]:
         """サーバーのタグ・色・既存予定名・カレンダーの情報を取得する"""
-        tag_groups = self.db_manager.list_tag_groups(guild_id)
-        tags = self.db_manager.list_tags(guild_id)
-        color_presets_by_calendar = self.db_manager.list_all_color_presets_by_calendar(guild_id)
-        active_events = self.db_manager.get_all_active_events(guild_id)
+        # タグ・色・カレンダー情報はスナップショット1件、予定はキャッシュから取得
+        config = await self.db_manager.get_guild_config(guild_id)
+        active_events = await self.db_manager.get_all_active_events(guild_id)
         events = []
         for e in active_events:
             event_tags = _parse_json_field(e.get('tags'))
@@ -185,17 +234,16 @@ class CalendarBot(commands.Bot):
                 event_info["monthly_dates"] = monthly_dates
             events.append(event_info)
 
-        all_tokens = self.db_manager.get_all_oauth_tokens(guild_id)
         calendars = [{
-            "display_name": t.get("display_name") or f"<@{t.get('authenticated_by', '?')}>",
-            "description": t.get("description", ""),
-            "is_default": t.get("is_default", False),
-        } for t in all_tokens]
+            "display_name": c.get("display_name", ""),
+            "description": c.get("description", ""),
+            "is_default": c.get("is_default", False),
+        } for c in config.get("calendars", [])]
 
         return {
-            "tag_groups": tag_groups,
-            "tags": tags,
-            "color_presets_by_calendar": color_presets_by_calendar,
+            "tag_groups": config.get("tag_groups", []),
+            "tags": config.get("tags", []),
+            "color_presets_by_calendar": config.get("color_presets_by_calendar", {}),
             "events": events,
             "calendars": calendars,
         }
@@ -205,6 +253,11 @@ class CalendarBot(commands.Bot):
         await self.tree.sync()
         print(f'{self.user} is ready!')
 
+    async def close(self):
+        """終了時に Google API 用のスレッドプールも止める"""
+        await super().close()
+        self.calendar_executor.shutdown()
+
     async def on_ready(self):
         """Bot起動完了時"""
         print(f'Logged in as {self.user}')
@@ -215,7 +268,7 @@ class CalendarBot(commands.Bot):
         for guild in self.guilds:
             guild_id = str(guild.id)
             try:
-                self.db_manager.migrate_guild_color_presets_to_calendars(guild_id)
+                await self.db_manager.migrate_guild_color_presets_to_calendars(guild_id)
             except Exception as e:
                 print(f"Migration error for guild {guild_id}: {e}")
 
@@ -224,9 +277,20 @@ class CalendarBot(commands.Bot):
             self.check_scheduled_notifications.start()
 
         # Google Calendarイベント整合性チェック開始
+        if self.calendar_webhook_url:
+            # 変更通知で即時に修復するため、定期チェックは取りこぼし対策として間隔を広げる
+            self.sync_calendar_events.change_interval(hours=CALENDAR_PUSH_SAFETY_SYNC_HOURS)
+            if not self.renew_calendar_watches.is_running():
+                self.renew_calendar_watches.start()
         if not self.sync_calendar_events.is_running():
             self.sync_calendar_events.start()
 
+        # 変更履歴の定期コンパクション開始
+        if not self.compact_event_history.is_running():
+            self.compact_event_history.start()
+        if not self.roll_occurrence_index.is_running():
+            self.roll_occurrence_index.start()
+
     @tasks.loop(minutes=1)
     async def cleanup_sessions(self):
         """期限切れの会話セッションを定期的にクリーンアップ"""
@@ -254,7 +318,7 @@ class CalendarBot(commands.Bot):
         today_str = now_jst.strftime("%Y-%m-%d")
 
         try:
-            all_settings = self.db_manager.get_all_notification_settings()
+            all_settings = await self.db_manager.get_all_notification_settings()
         except Exception as e:
             print(f"Error fetching notification settings: {e}")
             return
@@ -286,17 +350,19 @@ class CalendarBot(commands.Bot):
 
     @tasks.loop(minutes=30)
     async def sync_calendar_events(self):
-        """30分ごとにGoogle Calendarイベントの整合性をチェックし、不正な変更を復元する"""
+        """30分ごと（変更通知が有効なら6時間ごと）にGoogle Calendarイベントの整合性をチェックし、不正な変更を復元する"""
         import traceback
 
         for guild in self.guilds:
             guild_id = str(guild.id)
             try:
-                all_tokens = self.db_manager.get_all_oauth_tokens(guild_id)
+                all_tokens = await self.db_manager.get_all_oauth_tokens(guild_id)
                 if not all_tokens:
                     continue
 
-                active_events = self.db_manager.get_all_active_events(guild_id)
+                active_events = await self.db_manager.get_all_active_events(guild_id)
+                config_version = (await self.db_manager.get_guild_config(guild_id)).get('version')
+                tokens_by_owner = {t.get('_doc_id'): t for t in all_tokens}
 
                 # イベントを calendar_owner でグループ化
                 events_by_owner: Dict[str, List[Dict[str, Any]]] = {}
@@ -307,15 +373,16 @@ class CalendarBot(commands.Bot):
 
                 for cal_owner, events in events_by_owner.items():
                     try:
-                        cal_mgr = self.get_calendar_manager_for_user(int(guild_id), cal_owner)
+                        cal_mgr = await self.get_calendar_manager_for_user(int(guild_id), cal_owner)
                         if not cal_mgr:
                             continue
 
-                        for event in events:
-                            try:
-                                await self._sync_single_event(guild_id, event, cal_mgr, cal_owner)
-                            except Exception as e:
-                                print(f"[sync] Error syncing event {event.get('id')} in guild {guild_id}: {e}")
+                        async with self._calendar_sync_lock(guild_id, cal_owner):
+                            await self._sync_owner_calendar(
+                                guild_id, cal_owner, cal_mgr, events,
+                                (tokens_by_owner.get(cal_owner) or {}).get('calendar_sync') or {},
+                                config_version,
+                            )
 
                     except Exception as e:
                         print(f"[sync] Error processing calendar owner {cal_owner} in guild {guild_id}: {e}")
@@ -331,41 +398,239 @@ class CalendarBot(commands.Bot):
                 print(f"[sync] Error processing guild {guild_id}: {e}")
                 traceback.print_exc()
 
+    def _calendar_sync_lock(self, guild_id: str, cal_owner: str) -> asyncio.Lock:
+        return self._calendar_sync_locks.setdefault((guild_id, cal_owner), asyncio.Lock())
+
+    async def handle_calendar_notification(self, notification: PushNotification):
+        """Google Calendar の変更通知を受け、通知元のカレンダーだけ整合性チェックを予約する
+
+        保存済みのチャネル情報と一致しない通知（停止済み・偽装）は無視する。
+        短時間に続いた通知はまとめて1回のチェックにする。
+        """
+        oauth_tokens = await self.db_manager.get_oauth_tokens(notification.guild_id, notification.user_id)
+        if not verify_notification(notification, (oauth_tokens or {}).get('calendar_watch')):
+            print(f"[push] Ignoring notification for unknown channel {notification.channel_id}")
+            return
+        if notification.resource_state == 'sync':
+            return
+        self._push_pending.add((notification.guild_id, notification.user_id))
+        if self._push_task is None or self._push_task.done():
+            self._push_task = asyncio.create_task(self._run_push_syncs())
+
+    async def _run_push_syncs(self):
+        """通知で予約されたカレンダーの整合性チェックを順に実行する"""
+        await asyncio.sleep(CALENDAR_PUSH_DEBOUNCE_SECONDS)
+        while self._push_pending:
+            guild_id, cal_owner = self._push_pending.pop()
+            try:
+                await self._sync_calendar_owner(guild_id, cal_owner)
+            except Exception as e:
+                print(f"[push] Error syncing calendar of {cal_owner} in guild {guild_id}: {e}")
+
+    async def _sync_calendar_owner(self, guild_id: str, cal_owner: str):
+        """1つのカレンダーだけ整合性チェックを行う（変更通知から呼ばれる）"""
+        cal_mgr = await self.get_calendar_manager_for_user(int(guild_id), cal_owner)
+        if not cal_mgr:
+            return
+        active_events = await self.db_manager.get_all_active_events(guild_id)
+        events = [e for e in active_events if e.get('calendar_owner') == cal_owner]
+        config_version = (await self.db_manager.get_guild_config(guild_id)).get('version')
+        async with self._calendar_sync_lock(guild_id, cal_owner):
+            # 同期状態はロック取得後に読む（待っている間に別の同期が進めている場合がある）
+            oauth_tokens = await self.db_manager.get_oauth_tokens(guild_id, cal_owner) or {}
+            await self._sync_owner_calendar(
+                guild_id, cal_owner, cal_mgr, events,
+                oauth_tokens.get('calendar_sync') or {}, config_version,
+            )
+
+    @tasks.loop(hours=6)
+    async def renew_calendar_watches(self):
+        """各カレンダーの変更通知チャネルを登録し、期限が近いものを張り替える"""
+        for guild in self.guilds:
+            guild_id = str(guild.id)
+            try:
+                all_tokens = await self.db_manager.get_all_oauth_tokens(guild_id)
+            except Exception as e:
+                print(f"[push] Error loading calendars for guild {guild_id}: {e}")
+                continue
+            for token in all_tokens:
+                user_id = token.get('_doc_id') or token.get('authenticated_by', '')
+                old_watch = token.get('calendar_watch')
+                if not user_id or not needs_renewal(old_watch, token.get('calendar_id', 'primary')):
+                    continue
+                try:
+                    cal_mgr = await self.get_calendar_manager_for_user(int(guild_id), user_id)
+                    if not cal_mgr:
+                        continue
+                    channel_token = make_channel_token()
+                    response = await cal_mgr.watch_events(
+                        make_channel_id(guild_id, user_id), self.calendar_webhook_url,
+                        channel_token, int(WATCH_TTL.total_seconds()),
+                    )
+                    await self.db_manager.update_calendar_watch(
+                        guild_id, user_id, watch_from_response(response, channel_token, cal_mgr.calendar_id),
+                    )
+                    print(f"[push] Registered watch channel for {user_id} in guild {guild_id}")
+                except Exception as e:
+                    print(f"[push] Failed to register watch channel for {user_id} in guild {guild_id}: {e}")
+                    continue
+                if old_watch and old_watch.get('id') and old_watch.get('resource_id'):
+                    try:
+                        await cal_mgr.stop_channel(old_watch['id'], old_watch['resource_id'])
+                    except Exception as e:
+                        # 停止できなくても期限切れで止まる（通知は検証で無視される）
+                        print(f"[push] Failed to stop old watch channel {old_watch['id']}: {e}")
+
+    @renew_calendar_watches.before_loop
+    async def before_renew_calendar_watches(self):
+        await self.wait_until_ready()
+
+    async def _sync_owner_calendar(
+        self, guild_id: str, cal_owner: str, cal_mgr: 'AsyncCalendarManager',
+        events: List[Dict[str, Any]], sync_state: Dict[str, Any], config_version: Optional[int]
+    ):
+        """1つのカレンダーについて整合性チェックを行い、増分同期の状態を保存する
+
+        通常は前回の syncToken で events.list を呼び、Google 側で変更されたイベントと、
+        前回以降に Firestore 側で更新された予定だけを照合する。
+        syncToken がない・失効した・カレンダーやサーバー設定（タグ・色）が変わった・
+        前回の全件照合から CALENDAR_FULL_SYNC_INTERVAL 経過した場合は全件を照合する
+        （全件でも events.list のページ単位の取得で済み、イベントごとの取得はしない）。
+        照合に失敗した予定があれば状態を進めず、次回も前回の syncToken から照合し直す。
+        """
+        started_at = datetime.now(timezone.utc)
+        full_synced_at = sync_state.get('full_synced_at')
+        sync_token = sync_state.get('sync_token')
+        if (
+            sync_state.get('calendar_id') != cal_mgr.calendar_id
+            or sync_state.get('config_version') != config_version
+            or not full_synced_at
+            or started_at - datetime.fromisoformat(full_synced_at) >= CALENDAR_FULL_SYNC_INTERVAL
+        ):
+            sync_token = None
+
+        changed, next_sync_token, full = await cal_mgr.list_changed_events(sync_token)
+
+        # syncToken と privateExtendedProperty は併用できないため、Bot が管理するイベントIDで絞り込む。
+        # 繰り返しの個別回（recurringEventId あり）はマスターイベントの照合対象外
+        known_ids = {
+            ge.get('event_id')
+            for event in events
+            for ge in (_parse_json_field(event.get('google_calendar_events')) or [])
+            if isinstance(ge, dict)
+        }
+        gcal_events: Dict[str, Optional[Dict[str, Any]]] = {
+            item['id']: (None if item.get('status') == 'cancelled' else item)
+            for item in changed
+            if item.get('id') in known_ids and not item.get('recurringEventId')
+        }
+        if full:
+            # 全件取得に含まれないイベントは削除済み
+            targets = events
+            for google_event_id in known_ids:
+                gcal_events.setdefault(google_event_id, None)
+        else:
+            synced_at = sync_state.get('synced_at') or ''
+            targets = [
+                event for event in events
+                if (event.get('updated_at') or '') >= synced_at
+                or any(
+                    ge.get('event_id') in gcal_events
+                    for ge in (_parse_json_field(event.get('google_calendar_events')) or [])
+                    if isinstance(ge, dict)
+                )
+            ]
+
+        failed = 0
+        for event in targets:
+            try:
+                await self._sync_single_event(guild_id, event, cal_mgr, cal_owner, gcal_events, config_version)
+            except Exception as e:
+                failed += 1
+                print(f"[sync] Error syncing event {event.get('id')} in guild {guild_id}: {e}")
+
+        if full:
+            print(f"[sync] Full sync for calendar of {cal_owner} in guild {guild_id}: {len(targets)} events checked")
+        if failed:
+            # 新しい syncToken を保存すると失敗した予定の変更が次回の差分に現れなくなるため、前回の状態のままにする
+            print(f"[sync] {failed} events failed for {cal_owner} in guild {guild_id}; keeping the previous sync state")
+            return
+        state = {
+            'sync_token': next_sync_token,
+            'calendar_id': cal_mgr.calendar_id,
+            'config_version': config_version,
+            'synced_at': started_at.isoformat(),
+            'full_synced_at': started_at.isoformat() if full else full_synced_at,
+        }
+        try:
+            await self.db_manager.update_calendar_sync_state(guild_id, cal_owner, state)
+        except Exception as e:
+            print(f"[sync] Failed to save sync state for {cal_owner} in guild {guild_id}: {e}")
+
     async def _sync_single_event(
         self, guild_id: str, event: Dict[str, Any],
-        cal_mgr: 'GoogleCalendarManager', cal_owner: str
+        cal_mgr: 'AsyncCalendarManager', cal_owner: str,
+        gcal_events: Optional[Dict[str, Optional[Dict[str, Any]]]] = None,
+        config_version: Optional[int] = None,
     ):
-        """単一イベントのGoogle Calendar整合性チェック・復元"""
+        """単一イベントのGoogle Calendar整合性チェック・復元
+
+        gcal_events に含まれるイベントID（値が None なら削除済み）は取得済みの内容を使い、
+        含まれないものは get_event で取得する。
+        保存済みの指紋（google_calendar_events の expected）が予定・設定（config_version）と
+        一致していればハッシュの比較だけで照合し、あるべき姿の組み立て（タグ・色の読み取り）は
+        指紋を作り直すときと復元するときだけ行う。
+        """
         google_cal_events_json = event.get('google_calendar_events')
         if not google_cal_events_json:
             # 不定期イベント等、Google Calendarイベントなし → スキップ
             return
 
-        try:
-            google_cal_data = json.loads(google_cal_events_json)
-        except (json.JSONDecodeError, TypeError):
-            print(f"[sync] Invalid google_calendar_events JSON for event {event.get('id')}: {google_cal_events_json}")
+        google_cal_data = _parse_json_field(google_cal_events_json)
+        if not isinstance(google_cal_data, list):
+            print(f"[sync] Invalid google_calendar_events for event {event.get('id')}: {google_cal_events_json}")
             return
         if not google_cal_data:
             return
 
+        # あるべき姿は予定ごとに同じなので、必要になったときに1回だけ組み立てる
+        expected = None
+        fingerprints_changed = False
         for ge in google_cal_data:
             google_event_id = ge.get('event_id')
             if not google_event_id:
                 continue
 
-            gcal_event = cal_mgr.get_event(google_event_id)
+            if gcal_events is not None and google_event_id in gcal_events:
+                gcal_event = gcal_events[google_event_id]
+            else:
+                gcal_event = await cal_mgr.get_event(google_event_id)
 
             if gcal_event is None:
                 # イベントが削除されている → 再作成
                 print(f"[sync] Event {event['id']} ({event['event_name']}) deleted from Google Calendar, recreating...")
-                new_event_id = _recreate_calendar_event(self, guild_id, event, cal_mgr, cal_owner)
+                new_event_id = await _recreate_calendar_event(self, guild_id, event, cal_mgr, cal_owner, config_version)
                 if new_event_id:
                     print(f"[sync] Recreated event {event['id']} as {new_event_id}")
                 return  # 再作成したので残りのgoogle_event_idのチェックは不要
 
             # イベントが存在する → summary/description/colorId を比較
-            expected = _rebuild_expected_event(self, guild_id, event, cal_owner)
+            fingerprint = ge.get('expected')
+            if not _fingerprint_is_current(fingerprint, event, cal_owner, config_version):
+                if expected is None:
+                    expected = await _rebuild_expected_event(self, guild_id, event, cal_owner)
+                fingerprint = await _expected_fingerprint(
+                    self, guild_id, event, cal_owner, expected=expected, config_version=config_version,
+                )
+                if config_version is not None:
+                    ge['expected'] = fingerprint
+                    fingerprints_changed = True
+
+            restored_recurrence = _restore_recurrence_rule(gcal_event.get('recurrence'), ge.get('rrule'))
+            if restored_recurrence is None and _matches_fingerprint(gcal_event, fingerprint):
+                continue
+            if expected is None:
+                expected = await _rebuild_expected_event(self, guild_id, event, cal_owner)
 
             needs_update = False
             update_fields = {}
@@ -384,17 +649,60 @@ class CalendarBot(commands.Bot):
                 update_fields['colorId'] = expected_color
                 needs_update = True
 
+            if restored_recurrence is not None:
+                update_fields['recurrence'] = restored_recurrence
+                needs_update = True
+
             if needs_update:
                 print(f"[sync] Event {event['id']} ({event['event_name']}) modified on Google Calendar, restoring: {list(update_fields.keys())}")
                 try:
-                    cal_mgr.update_event(google_event_id, update_fields)
+                    # 照合した時点の ETag を付け、その後に変更されていれば次回の同期で照合し直す
+                    if await cal_mgr.update_event(google_event_id, update_fields, etag=gcal_event.get('etag')) is None:
+                        print(f"[sync] Event {google_event_id} changed during sync, will recheck on next pass")
                 except Exception as e:
                     print(f"[sync] Failed to restore event {google_event_id}: {e}")
 
+        if fingerprints_changed:
+            try:
+                # 予定そのものは変わっていないので updated_at は進めない（次の増分同期で照合し直さない）
+                await self.db_manager.update_google_calendar_events(
+                    event['id'], google_cal_data, guild_id=guild_id, touch_updated_at=False,
+                )
+            except Exception as e:
+                print(f"[sync] Failed to save expected-state fingerprint for event {event['id']}: {e}")
+
     @sync_calendar_events.before_loop
     async def before_sync_calendar_events(self):
         await self.wait_until_ready()
 
+    @tasks.loop(hours=6)
+    async def compact_event_history(self):
+        """履歴件数が上限を超えた予定だけ、古い変更履歴を削除する"""
+        try:
+            deleted = await self.db_manager.compact_event_history()
+            if deleted:
+                print(f"[event_history] compacted {deleted} old history entries")
+        except Exception as e:
+            print(f"[event_history] compaction failed: {e}")
+
+    @compact_event_history.before_loop
+    async def before_compact_event_history(self):
+        await self.wait_until_ready()
+
+    @tasks.loop(hours=24)
+    async def roll_occurrence_index(self):
+        """発生日インデックスの期間を今日基準へ繰り越す（新しく入った週だけを展開）"""
+        try:
+            rolled = await self.db_manager.roll_occurrence_indexes()
+            if rolled:
+                print(f"[occurrence_index] rolled forward {rolled} guild indexes")
+        except Exception as e:
+            print(f"[occurrence_index] roll forward failed: {e}")
+
+    @roll_occurrence_index.before_loop
+    async def before_roll_occurrence_index(self):
+        await self.wait_until_ready()
+
     async def _send_scheduled_notification(self, guild_id: str, settings: dict):
         """スケジュール通知を送信"""
         channel_id = settings.get("channel_id")
@@ -407,7 +715,7 @@ class CalendarBot(commands.Bot):
             print(f"Cannot fetch channel {channel_id} for guild {guild_id}")
             return
 
-        events = self.db_manager.get_this_week_events(guild_id)
+        events = await self.db_manager.get_this_week_events(guild_id)
 
         # calendar_owners フィルタ
         calendar_owners = settings.get("calendar_owners", [])
@@ -419,7 +727,7 @@ class CalendarBot(commands.Bot):
             await channel.send(content="🔔 **今週の予定通知**", embed=embed)
 
             # 不定期イベントの案内を追加
-            all_events = self.db_manager.get_all_active_events(guild_id)
+            all_events = await self.db_manager.get_all_active_events(guild_id, fields=IRREGULAR_LIST_FIELDS)
             irregular_events = [e for e in all_events if e.get("recurrence") == "irregular"]
             if calendar_owners:
                 irregular_events = [e for e in irregular_events if e.get("calendar_owner") in calendar_owners]
@@ -431,7 +739,7 @@ class CalendarBot(commands.Bot):
             from datetime import timezone, timedelta as td
             jst = timezone(td(hours=9))
             now_str = datetime.now(jst).isoformat()
-            self.db_manager.update_notification_last_sent(guild_id, now_str)
+            await self.db_manager.update_notification_last_sent(guild_id, now_str)
         except Exception as e:
             print(f"Failed to send scheduled notification to {channel_id}: {e}")
 
@@ -456,7 +764,7 @@ def setup_commands(bot: CalendarBot):
                 await interaction.followup.send("⚠️ このコマンドはサーバー内で使用してください。", ephemeral=True)
                 return
 
-            server_context = bot._get_server_context(guild_id)
+            server_context = await bot._get_server_context(guild_id)
 
             # マルチターン会話セッションでメッセージを送信
             chat_session = bot.nlp_processor.create_chat_session(server_context)
@@ -502,10 +810,10 @@ def setup_commands(bot: CalendarBot):
                     # 色自動割当（addまたはeditでcolor_name未指定の場合）
                     if action in ("add", "edit") and not parsed.get("color_name"):
                         # デフォルトカレンダーのオーナーを使用
-                        token_info = _resolve_calendar_owner(bot, guild_id, parsed.get('calendar_name'))
+                        token_info = await _resolve_calendar_owner(bot, guild_id, parsed.get('calendar_name'))
                         default_owner = (token_info.get('_doc_id') or token_info.get('authenticated_by')) if token_info else None
                         if default_owner:
-                            auto_color = _auto_assign_color(
+                            auto_color = await _auto_assign_color(
                                 bot.db_manager, guild_id, default_owner,
                                 parsed.get("recurrence"), parsed.get("nth_weeks"),
                             )
@@ -643,7 +951,7 @@ def setup_commands(bot: CalendarBot):
         await interaction.response.defer()
 
         guild_id = str(interaction.guild_id) if interaction.guild_id else ""
-        events = bot.db_manager.get_this_week_events(guild_id)
+        events = await bot.db_manager.get_this_week_events(guild_id)
         embed = create_weekly_embed(events)
 
         await interaction.followup.send(embed=embed)
@@ -654,7 +962,7 @@ def setup_commands(bot: CalendarBot):
         await interaction.response.defer()
 
         guild_id = str(interaction.guild_id) if interaction.guild_id else ""
-        events = bot.db_manager.get_all_active_events(guild_id)
+        events = await bot.db_manager.get_all_active_events(guild_id)
         embed = create_event_list_embed(events)
 
         await interaction.followup.send(embed=embed)
@@ -665,7 +973,7 @@ def setup_commands(bot: CalendarBot):
         await interaction.response.defer(ephemeral=True)
 
         guild_id = str(interaction.guild_id) if interaction.guild_id else ""
-        events = bot.db_manager.get_all_active_events(guild_id)
+        events = await bot.db_manager.get_all_active_events(guild_id, fields=EVENT_DELETE_FIELDS)
 
         if not events:
             await interaction.followup.send("📭 登録されている予定がありません。", ephemeral=True)
@@ -702,13 +1010,13 @@ def setup_commands(bot: CalendarBot):
 
         event_id = None
         if イベント名:
-            events = bot.db_manager.search_events_by_name(イベント名, guild_id)
+            events = await bot.db_manager.search_events_by_name(イベント名, guild_id)
             if not events:
                 await interaction.followup.send(f"❌ 予定「{イベント名}」が見つかりませんでした。", ephemeral=True)
                 return
             event_id = events[0]['id']
 
-        history = bot.db_manager.get_event_history(guild_id, event_id=event_id, limit=20)
+        history = await bot.db_manager.get_event_history(guild_id, event_id=event_id, limit=20)
         if not history:
             await interaction.followup.send("📭 変更履歴がありません。", ephemeral=True)
             return
@@ -772,14 +1080,14 @@ def setup_commands(bot: CalendarBot):
         'x_url', 'vrc_group_url', 'official_url', 'calendar_name',
     ]
 
-    def _generate_csv_content(events: list, guild_id: str) -> str:
+    async def _generate_csv_content(events: list, guild_id: str) -> str:
         """イベントリストからCSV文字列を生成"""
         output = io.StringIO()
         writer = csv.writer(output)
         writer.writerow(EXPORT_CSV_COLUMNS)
 
         # カレンダーオーナー → 表示名のマッピング
-        all_tokens = bot.db_manager.get_all_oauth_tokens(guild_id)
+        all_tokens = await bot.db_manager.get_all_oauth_tokens(guild_id)
         owner_to_name = {}
         for t in all_tokens:
             uid = t.get('_doc_id') or t.get('authenticated_by', '')
@@ -810,9 +1118,9 @@ def setup_commands(bot: CalendarBot):
             ])
         return output.getvalue()
 
-    def _generate_json_content(events: list, guild_id: str) -> str:
+    async def _generate_json_content(events: list, guild_id: str) -> str:
         """イベントリストからJSON文字列を生成"""
-        all_tokens = bot.db_manager.get_all_oauth_tokens(guild_id)
+        all_tokens = await bot.db_manager.get_all_oauth_tokens(guild_id)
         owner_to_name = {}
         for t in all_tokens:
             uid = t.get('_doc_id') or t.get('authenticated_by', '')
@@ -861,18 +1169,18 @@ def setup_commands(bot: CalendarBot):
             await interaction.followup.send("⚠️ このコマンドはサーバー内で使用してください。", ephemeral=True)
             return
 
-        events = bot.db_manager.get_all_active_events(guild_id)
+        events = await bot.db_manager.get_all_active_events(guild_id)
         if not events:
             await interaction.followup.send("📭 エクスポートする予定がありません。", ephemeral=True)
             return
 
         timestamp = datetime.now().strftime('%Y%m%d')
         if 形式 == "csv":
-            content = _generate_csv_content(events, guild_id)
+            content = await _generate_csv_content(events, guild_id)
             filename = f"events_{guild_id}_{timestamp}.csv"
             file_bytes = content.encode('utf-8-sig')
         else:
-            content = _generate_json_content(events, guild_id)
+            content = await _generate_json_content(events, guild_id)
             filename = f"events_{guild_id}_{timestamp}.json"
             file_bytes = content.encode('utf-8')
 
@@ -955,12 +1263,14 @@ def setup_commands(bot: CalendarBot):
                 errors.append(f"イベント {i}: {e}")
         return events, errors
 
-    def _validate_import_events(events: list, guild_id: str) -> Tuple[list, list]:
+    async def _validate_import_events(events: list, guild_id: str) -> Tuple[list, list]:
         """バリデーションし valid と skipped を返す"""
         valid = []
         skipped = []
 
-        existing_names = {e['event_name'] for e in bot.db_manager.get_all_active_events(guild_id)}
+        existing_names = {
+            e['event_name'] for e in await bot.db_manager.get_all_active_events(guild_id, fields=["event_name"])
+        }
 
         for i, ev in enumerate(events):
             reasons = []
@@ -1113,7 +1423,7 @@ def setup_commands(bot: CalendarBot):
             return
 
         # バリデーション
-        valid, skipped = _validate_import_events(events, guild_id)
+        valid, skipped = await _validate_import_events(events, guild_id)
 
         if not valid:
             msg = "❌ インポート可能な予定がありません。\n"
@@ -1161,11 +1471,11 @@ def setup_commands(bot: CalendarBot):
             try:
                 # カレンダーオーナー解決
                 if ev.get('calendar_name'):
-                    token_info = _resolve_calendar_owner(bot, guild_id, ev['calendar_name'])
+                    token_info = await _resolve_calendar_owner(bot, guild_id, ev['calendar_name'])
                     if token_info:
                         ev['_calendar_owner'] = token_info.get('_doc_id') or token_info.get('authenticated_by')
                 if not ev.get('_calendar_owner'):
-                    default_token = bot.db_manager.get_default_oauth_tokens(guild_id)
+                    default_token = await bot.db_manager.get_default_oauth_tokens(guild_id)
                     if default_token:
                         ev['_calendar_owner'] = default_token.get('_doc_id') or default_token.get('authenticated_by')
 
@@ -1173,7 +1483,7 @@ def setup_commands(bot: CalendarBot):
                 cal_owner = ev.get('_calendar_owner', '')
                 if not ev.get('color_name') and cal_owner:
                     nth_weeks = ev.get('nth_weeks')
-                    auto_color = _auto_assign_color(bot.db_manager, guild_id, cal_owner, ev['recurrence'], nth_weeks)
+                    auto_color = await _auto_assign_color(bot.db_manager, guild_id, cal_owner, ev['recurrence'], nth_weeks)
                     if auto_color:
                         ev['color_name'] = auto_color['name']
 
@@ -1185,10 +1495,6 @@ def setup_commands(bot: CalendarBot):
                 else:
                     fail_count += 1
                     fail_details.append(f"{ev['event_name']}: {result}")
-
-                # レート制限対策
-                await asyncio.sleep(0.5)
-
             except Exception as e:
                 fail_count += 1
                 fail_details.append(f"{ev.get('event_name', '?')}: {e}")
@@ -1220,7 +1526,7 @@ def setup_commands(bot: CalendarBot):
         user_id = str(interaction.user.id)
 
         # 実行ユーザーのoauth_tokenが存在するか確認
-        oauth_tokens = bot.db_manager.get_oauth_tokens(guild_id, user_id)
+        oauth_tokens = await bot.db_manager.get_oauth_tokens(guild_id, user_id)
         if not oauth_tokens:
             await interaction.followup.send(
                 "❌ あなたのカレンダーが認証されていません。先に `/カレンダー 認証` を実行してください。",
@@ -1261,7 +1567,7 @@ def setup_commands(bot: CalendarBot):
         user_id = str(interaction.user.id)
 
         # 実行ユーザーのoauth_token確認
-        oauth_tokens = bot.db_manager.get_oauth_tokens(guild_id, user_id)
+        oauth_tokens = await bot.db_manager.get_oauth_tokens(guild_id, user_id)
         if not oauth_tokens:
             await interaction.followup.send(
                 "❌ あなたのカレンダーが認証されていません。先に `/カレンダー 認証` を実行してください。",
@@ -1269,7 +1575,7 @@ def setup_commands(bot: CalendarBot):
             )
             return
 
-        presets = bot.db_manager.list_color_presets(guild_id, user_id)
+        presets = await bot.db_manager.list_color_presets(guild_id, user_id)
 
         if not presets:
             embed = discord.Embed(
@@ -1315,7 +1621,7 @@ def setup_commands(bot: CalendarBot):
         user_id = str(interaction.user.id)
 
         # 実行ユーザーのoauth_token確認
-        oauth_tokens = bot.db_manager.get_oauth_tokens(guild_id, user_id)
+        oauth_tokens = await bot.db_manager.get_oauth_tokens(guild_id, user_id)
         if not oauth_tokens:
             await interaction.followup.send(
                 "❌ あなたのカレンダーが認証されていません。先に `/カレンダー 認証` を実行してください。",
@@ -1341,14 +1647,14 @@ def setup_commands(bot: CalendarBot):
         color_id = view.selected_color_id
 
         # 変更前のプリセットを取得（colorId変更検出用）
-        old_preset = bot.db_manager.get_color_preset(guild_id, user_id, 名前)
-        bot.db_manager.add_color_preset(guild_id, user_id, 名前, color_id, 説明)
+        old_preset = await bot.db_manager.get_color_preset(guild_id, user_id, 名前)
+        await bot.db_manager.add_color_preset(guild_id, user_id, 名前, color_id, 説明)
         await _update_legend_event_for_user(bot, guild_id, user_id)
 
         # colorId が変更された場合、該当色の全予定を更新
         msg = f"✅ 色プリセット「{名前}」を設定しました。"
         if old_preset and old_preset.get('color_id') != color_id:
-            affected = bot.db_manager.get_events_by_color_name(guild_id, 名前)
+            affected = await bot.db_manager.get_events_by_color_name(guild_id, 名前)
             # calendar_ownerがこのユーザーの予定のみ対象
             affected = [e for e in affected if (e.get('calendar_owner') or e.get('created_by', '')) == user_id]
             if affected:
@@ -1366,7 +1672,7 @@ def setup_commands(bot: CalendarBot):
         user_id = str(interaction.user.id)
 
         # 実行ユーザーのoauth_token確認
-        oauth_tokens = bot.db_manager.get_oauth_tokens(guild_id, user_id)
+        oauth_tokens = await bot.db_manager.get_oauth_tokens(guild_id, user_id)
         if not oauth_tokens:
             await interaction.followup.send(
                 "❌ あなたのカレンダーが認証されていません。先に `/カレンダー 認証` を実行してください。",
@@ -1374,7 +1680,7 @@ def setup_commands(bot: CalendarBot):
             )
             return
 
-        bot.db_manager.delete_color_preset(guild_id, user_id, 名前)
+        await bot.db_manager.delete_color_preset(guild_id, user_id, 名前)
         await _update_legend_event_for_user(bot, guild_id, user_id)
         await interaction.followup.send(f"✅ 色プリセット「{名前}」を削除しました。", ephemeral=True)
 
@@ -1388,7 +1694,7 @@ def setup_commands(bot: CalendarBot):
         current: str,
     ) -> list[app_commands.Choice[int]]:
         guild_id = str(interaction.guild_id) if interaction.guild_id else ""
-        groups = bot.db_manager.list_tag_groups(guild_id)
+        groups = await bot.db_manager.list_tag_groups(guild_id, fields=["name"])
         choices = []
         for g in groups:
             name = g["name"]
@@ -1400,8 +1706,8 @@ def setup_commands(bot: CalendarBot):
     async def tag_group_list_command(interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
         guild_id = str(interaction.guild_id) if interaction.guild_id else ""
-        groups = bot.db_manager.list_tag_groups(guild_id)
-        tags = bot.db_manager.list_tags(guild_id)
+        groups = await bot.db_manager.list_tag_groups(guild_id)
+        tags = await bot.db_manager.list_tags(guild_id)
         embed = create_tag_group_list_embed(groups, tags)
         await interaction.followup.send(embed=embed, ephemeral=True)
 
@@ -1410,7 +1716,7 @@ def setup_commands(bot: CalendarBot):
     async def tag_group_add_command(interaction: discord.Interaction, 名前: str, 説明: str = ""):
         await interaction.response.defer(ephemeral=True)
         guild_id = str(interaction.guild_id) if interaction.guild_id else ""
-        bot.db_manager.add_tag_group(guild_id, 名前, 説明)
+        await bot.db_manager.add_tag_group(guild_id, 名前, 説明)
         await update_legend_event(bot, interaction)
         await interaction.followup.send(f"✅ タググループ「{名前}」を追加しました。", ephemeral=True)
 
@@ -1422,7 +1728,7 @@ def setup_commands(bot: CalendarBot):
         guild_id = str(interaction.guild_id) if interaction.guild_id else ""
 
         # グループ存在確認
-        group = bot.db_manager.get_tag_group(guild_id, id)
+        group = await bot.db_manager.get_tag_group(guild_id, id)
         if not group:
             await interaction.followup.send(f"❌ タググループID {id} は存在しません。", ephemeral=True)
             return
@@ -1430,31 +1736,28 @@ def setup_commands(bot: CalendarBot):
         old_name = group['name']
 
         # グループ名更新
-        bot.db_manager.update_tag_group(guild_id, id, name=新しい名前)
+        await bot.db_manager.update_tag_group(guild_id, id, name=新しい名前)
         # 子タグの group_name 更新
-        bot.db_manager.update_tags_group_name(guild_id, id, 新しい名前)
+        await bot.db_manager.update_tags_group_name(guild_id, id, 新しい名前)
         # 凡例イベント更新
         await update_legend_event(bot, interaction)
 
         # このグループのタグを含む予定の Google Calendar 説明欄を再構築
-        tag_groups = bot.db_manager.list_tag_groups(guild_id)
-        tags_list = bot.db_manager.list_tags(guild_id)
+        tag_groups = await bot.db_manager.list_tag_groups(guild_id)
+        tags_list = await bot.db_manager.list_tags(guild_id)
         tags_in_group = [t['name'] for t in tags_list if t.get('group_id') == id]
 
         updated_count = 0
         failed_count = 0
         if tags_in_group:
-            all_events = bot.db_manager.get_all_active_events(guild_id)
+            all_events = await bot.db_manager.get_all_active_events(guild_id)
+            google_updates = []
             for event in all_events:
                 event_tags = _parse_json_field(event.get('tags'))
                 if not any(t in tags_in_group for t in event_tags):
                     continue
                 if not event.get('google_calendar_events'):
                     continue
-                cal_owner = event.get('calendar_owner') or event.get('created_by', '')
-                cal_mgr = bot.get_calendar_manager_for_user(int(guild_id), cal_owner) if cal_owner else None
-                if not cal_mgr:
-                    continue
                 new_desc = _build_event_description(
                     raw_description=event.get('description', ''),
                     tags=event_tags if event_tags else None,
@@ -1463,16 +1766,8 @@ def setup_commands(bot: CalendarBot):
                     vrc_group_url=event.get('vrc_group_url'),
                     official_url=event.get('official_url'),
                 )
-                google_cal_data = _parse_json_field(event.get('google_calendar_events'))
-                if not google_cal_data:
-                    continue
-                ids = [ge['event_id'] for ge in google_cal_data]
-                try:
-                    cal_mgr.update_events(ids, {'description': new_desc})
-                    updated_count += 1
-                except Exception as e:
-                    failed_count += 1
-                    print(f"[Calendar sync] Failed to update events for {event.get('event_name')}: {e}")
+                google_updates.append((event, {'description': new_desc}))
+            updated_count, failed_count = await _patch_google_calendar_events(bot, guild_id, google_updates)
 
         msg = f"✅ タググループ「{old_name}」を「{新しい名前}」に変更しました。"
         if updated_count:
@@ -1490,50 +1785,41 @@ def setup_commands(bot: CalendarBot):
 
         # 削除前にグループ内のタグ名一覧を取得
         tags_in_group = [
-            t['name'] for t in bot.db_manager.list_tags(guild_id)
+            t['name'] for t in await bot.db_manager.list_tags(guild_id)
             if t.get('group_id') == id
         ]
 
-        bot.db_manager.delete_tag_group(guild_id, id)
+        await bot.db_manager.delete_tag_group(guild_id, id)
         await update_legend_event(bot, interaction)
 
         # 影響する予定から全タグを除去
         if tags_in_group:
-            all_events = bot.db_manager.get_all_active_events(guild_id)
-            tag_groups = bot.db_manager.list_tag_groups(guild_id)
-            tags_list = bot.db_manager.list_tags(guild_id)
+            all_events = await bot.db_manager.get_all_active_events(guild_id)
+            tag_groups = await bot.db_manager.list_tag_groups(guild_id)
+            tags_list = await bot.db_manager.list_tags(guild_id)
             updated_count = 0
-            failed_count = 0
+            google_updates = []
             for event in all_events:
                 old_tags = _parse_json_field(event.get('tags'))
                 new_tags = [t for t in old_tags if t not in tags_in_group]
                 if old_tags != new_tags:
-                    bot.db_manager.update_event(event['id'], {'tags': new_tags})
-                    # Google Calendar 説明欄を再構築
+                    await bot.db_manager.update_event(event['id'], {'tags': new_tags}, guild_id=guild_id)
+                    # Google Calendar 説明欄を再構築（カレンダーごとにまとめて送信）
                     if event.get('google_calendar_events'):
-                        cal_owner = event.get('calendar_owner') or event.get('created_by', '')
-                        cal_mgr = bot.get_calendar_manager_for_user(int(guild_id), cal_owner) if cal_owner else None
-                        if cal_mgr:
-                            new_desc = _build_event_description(
-                                raw_description=event.get('description', ''),
-                                tags=new_tags if new_tags else None,
-                                tag_groups=[{'name': g['name'], 'tags': [t for t in tags_list if t.get('group_id') == g['id']]} for g in tag_groups],
-                                x_url=event.get('x_url'),
-                                vrc_group_url=event.get('vrc_group_url'),
-                                official_url=event.get('official_url'),
-                            )
-                            google_cal_data = _parse_json_field(event.get('google_calendar_events'))
-                            if google_cal_data:
-                                ids = [ge['event_id'] for ge in google_cal_data]
-                                try:
-                                    cal_mgr.update_events(ids, {
-                                        'description': new_desc,
-                                        'extendedProperties': {'private': {'tags': json.dumps(new_tags, ensure_ascii=False)}},
-                                    })
-                                except Exception as e:
-                                    failed_count += 1
-                                    print(f"[Calendar sync] Failed to update events for {event.get('event_name')}: {e}")
+                        new_desc = _build_event_description(
+                            raw_description=event.get('description', ''),
+                            tags=new_tags if new_tags else None,
+                            tag_groups=[{'name': g['name'], 'tags': [t for t in tags_list if t.get('group_id') == g['id']]} for g in tag_groups],
+                            x_url=event.get('x_url'),
+                            vrc_group_url=event.get('vrc_group_url'),
+                            official_url=event.get('official_url'),
+                        )
+                        google_updates.append((event, {
+                            'description': new_desc,
+                            'extendedProperties': {'private': {'tags': json.dumps(new_tags, ensure_ascii=False)}},
+                        }))
                     updated_count += 1
+            _, failed_count = await _patch_google_calendar_events(bot, guild_id, google_updates)
             msg = f"✅ タググループID {id} を削除しました。"
             if updated_count:
                 msg += f"\n📝 {updated_count} 件の予定からタグを除去しました。"
@@ -1549,7 +1835,7 @@ def setup_commands(bot: CalendarBot):
     async def tag_add_command(interaction: discord.Interaction, group_id: int, 名前: str, 説明: str = ""):
         await interaction.response.defer(ephemeral=True)
         guild_id = str(interaction.guild_id) if interaction.guild_id else ""
-        bot.db_manager.add_tag(guild_id, group_id, 名前, 説明)
+        await bot.db_manager.add_tag(guild_id, group_id, 名前, 説明)
         await update_legend_event(bot, interaction)
         await interaction.followup.send(f"✅ タグ「{名前}」を追加しました。", ephemeral=True)
 
@@ -1561,45 +1847,37 @@ def setup_commands(bot: CalendarBot):
         guild_id = str(interaction.guild_id) if interaction.guild_id else ""
 
         # 削除前に影響する予定を取得
-        affected = bot.db_manager.get_events_by_tag(guild_id, 名前)
+        affected = await bot.db_manager.get_events_by_tag(guild_id, 名前)
 
-        bot.db_manager.delete_tag(guild_id, group_id, 名前)
+        await bot.db_manager.delete_tag(guild_id, group_id, 名前)
         await update_legend_event(bot, interaction)
 
         # 影響する予定からタグを除去
-        tag_groups = bot.db_manager.list_tag_groups(guild_id)
-        tags_list = bot.db_manager.list_tags(guild_id)
+        tag_groups = await bot.db_manager.list_tag_groups(guild_id)
+        tags_list = await bot.db_manager.list_tags(guild_id)
         updated_count = 0
-        failed_count = 0
+        google_updates = []
         for event in affected:
             old_tags = _parse_json_field(event.get('tags'))
             new_tags = [t for t in old_tags if t != 名前]
-            bot.db_manager.update_event(event['id'], {'tags': new_tags})
+            await bot.db_manager.update_event(event['id'], {'tags': new_tags}, guild_id=guild_id)
 
-            # Google Calendar 説明欄を再構築
+            # Google Calendar 説明欄を再構築（カレンダーごとにまとめて送信）
             if event.get('google_calendar_events'):
-                cal_owner = event.get('calendar_owner') or event.get('created_by', '')
-                cal_mgr = bot.get_calendar_manager_for_user(int(guild_id), cal_owner) if cal_owner else None
-                if cal_mgr:
-                    new_desc = _build_event_description(
-                        raw_description=event.get('description', ''),
-                        tags=new_tags if new_tags else None,
-                        tag_groups=[{'name': g['name'], 'tags': [t for t in tags_list if t.get('group_id') == g['id']]} for g in tag_groups],
-                        x_url=event.get('x_url'),
-                        vrc_group_url=event.get('vrc_group_url'),
-                        official_url=event.get('official_url'),
-                    )
-                    google_cal_data = _parse_json_field(event.get('google_calendar_events'))
-                    ids = [ge['event_id'] for ge in google_cal_data]
-                    try:
-                        cal_mgr.update_events(ids, {
-                            'description': new_desc,
-                            'extendedProperties': {'private': {'tags': json.dumps(new_tags, ensure_ascii=False)}},
-                        })
-                    except Exception as e:
-                        failed_count += 1
-                        print(f"[Calendar sync] Failed to update events for {event.get('event_name')}: {e}")
+                new_desc = _build_event_description(
+                    raw_description=event.get('description', ''),
+                    tags=new_tags if new_tags else None,
+                    tag_groups=[{'name': g['name'], 'tags': [t for t in tags_list if t.get('group_id') == g['id']]} for g in tag_groups],
+                    x_url=event.get('x_url'),
+                    vrc_group_url=event.get('vrc_group_url'),
+                    official_url=event.get('official_url'),
+                )
+                google_updates.append((event, {
+                    'description': new_desc,
+                    'extendedProperties': {'private': {'tags': json.dumps(new_tags, ensure_ascii=False)}},
+                }))
             updated_count += 1
+        _, failed_count = await _patch_google_calendar_events(bot, guild_id, google_updates)
 
         msg = f"✅ タグ「{名前}」を削除しました。"
         if updated_count:
@@ -1627,7 +1905,7 @@ def setup_commands(bot: CalendarBot):
         guild_id = str(interaction.guild_id)
         user_id = str(interaction.user.id)
 
-        bot.db_manager.save_oauth_state(state, guild_id, user_id)
+        await bot.db_manager.save_oauth_state(state, guild_id, user_id)
         auth_url = bot.oauth_handler.generate_auth_url(state)
 
         embed = discord.Embed(
@@ -1649,12 +1927,13 @@ def setup_commands(bot: CalendarBot):
         await interaction.response.defer(ephemeral=True)
         guild_id = str(interaction.guild_id)
         user_id = str(interaction.user.id)
-        tokens = bot.db_manager.get_oauth_tokens(guild_id, user_id)
+        tokens = await bot.db_manager.get_oauth_tokens(guild_id, user_id)
         if not tokens:
             await interaction.followup.send("ℹ️ あなたの OAuth 認証は設定されていません。", ephemeral=True)
             return
 
-        bot.db_manager.delete_oauth_tokens(guild_id, user_id)
+        await bot.db_manager.delete_oauth_tokens(guild_id, user_id)
+        bot.calendar_pool.discard(guild_id, user_id)
         await interaction.followup.send("✅ あなたの Google OAuth 認証を解除しました。", ephemeral=True)
 
     @calendar_group.command(name="認証状態", description="自分のカレンダー認証状態を表示します")
@@ -1662,7 +1941,7 @@ def setup_commands(bot: CalendarBot):
         await interaction.response.defer(ephemeral=True)
         guild_id = str(interaction.guild_id)
         user_id = str(interaction.user.id)
-        oauth_tokens = bot.db_manager.get_oauth_tokens(guild_id, user_id)
+        oauth_tokens = await bot.db_manager.get_oauth_tokens(guild_id, user_id)
 
         embed = discord.Embed(title="カレンダー認証状態", color=discord.Color.blue())
 
@@ -1699,7 +1978,7 @@ def setup_commands(bot: CalendarBot):
         await interaction.response.defer(ephemeral=True)
         guild_id = str(interaction.guild_id)
         user_id = str(interaction.user.id)
-        oauth_tokens = bot.db_manager.get_oauth_tokens(guild_id, user_id)
+        oauth_tokens = await bot.db_manager.get_oauth_tokens(guild_id, user_id)
         if not oauth_tokens:
             await interaction.followup.send("❌ OAuth 認証がされていません。先に `/カレンダー 認証` を実行してください。", ephemeral=True)
             return
@@ -1708,7 +1987,7 @@ def setup_commands(bot: CalendarBot):
             await interaction.followup.send("❌ 変更する項目を少なくとも1つ指定してください。", ephemeral=True)
             return
 
-        bot.db_manager.update_oauth_settings(
+        await bot.db_manager.update_oauth_settings(
             guild_id, user_id,
             display_name=表示名, calendar_id=カレンダーid,
             description=説明, is_default=デフォルト
@@ -1733,7 +2012,7 @@ def setup_commands(bot: CalendarBot):
     async def calendar_list_command(interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
         guild_id = str(interaction.guild_id)
-        all_tokens = bot.db_manager.get_all_oauth_tokens(guild_id)
+        all_tokens = await bot.db_manager.get_all_oauth_tokens(guild_id)
 
         if not all_tokens:
             embed = discord.Embed(
@@ -1813,7 +2092,7 @@ def setup_commands(bot: CalendarBot):
         user_id = str(interaction.user.id)
 
         # 複数カレンダーがあるかチェック
-        all_tokens = bot.db_manager.get_all_oauth_tokens(guild_id)
+        all_tokens = await bot.db_manager.get_all_oauth_tokens(guild_id)
         if len(all_tokens) > 1:
             # カレンダー選択UIを表示
             view = NotificationCalendarSelectView(
@@ -1826,7 +2105,7 @@ def setup_commands(bot: CalendarBot):
             )
         else:
             # カレンダーが1つ以下 → 全カレンダーで設定
-            bot.db_manager.save_notification_settings(
+            await bot.db_manager.save_notification_settings(
                 guild_id=guild_id,
                 enabled=True,
                 weekday=曜日.value,
@@ -1853,7 +2132,7 @@ def setup_commands(bot: CalendarBot):
             return
 
         guild_id = str(interaction.guild_id)
-        bot.db_manager.disable_notification(guild_id)
+        await bot.db_manager.disable_notification(guild_id)
         await interaction.followup.send("✅ 週次通知を停止しました。", ephemeral=True)
 
     @notification_group.command(name="状態", description="週次通知の設定状態を表示します")
@@ -1865,7 +2144,7 @@ def setup_commands(bot: CalendarBot):
             return
 
         guild_id = str(interaction.guild_id)
-        settings = bot.db_manager.get_notification_settings(guild_id)
+        settings = await bot.db_manager.get_notification_settings(guild_id)
 
         if not settings:
             await interaction.followup.send("通知は設定されていません。`/通知 設定` で設定してください。", ephemeral=True)
@@ -1934,7 +2213,7 @@ def setup_commands(bot: CalendarBot):
             return
 
         guild_id = str(interaction.guild_id)
-        settings = bot.db_manager.get_notification_settings(guild_id)
+        settings = await bot.db_manager.get_notification_settings(guild_id)
 
         if not settings or not settings.get("enabled"):
             await interaction.followup.send("❌ 通知が設定されていないか、停止中です。`/通知 設定` で設定してください。", ephemeral=True)
@@ -1968,13 +2247,13 @@ def _resolve_color_category(recurrence: Optional[str], nth_weeks: Optional[List[
     return None
 
 
-def _auto_assign_color(db_manager: FirestoreManager, guild_id: str, user_id: str, recurrence: Optional[str], nth_weeks: Optional[List[int]]) -> Optional[Dict[str, str]]:
+async def _auto_assign_color(db_manager: AsyncFirestoreManager, guild_id: str, user_id: str, recurrence: Optional[str], nth_weeks: Optional[List[int]]) -> Optional[Dict[str, str]]:
     """色カテゴリに基づいて色プリセットを自動割当（カレンダー単位）。
     Returns: {"name": "色名", "color_id": "9"} or None"""
     category = _resolve_color_category(recurrence, nth_weeks)
     if not category:
         return None
-    return db_manager.get_color_preset_by_recurrence(guild_id, user_id, category)
+    return await db_manager.get_color_preset_by_recurrence(guild_id, user_id, category)
 
 
 async def _batch_update_google_calendar_events(
@@ -1984,24 +2263,62 @@ async def _batch_update_google_calendar_events(
     google_updates: Dict[str, Any],
 ) -> int:
     """複数予定のGoogle Calendarイベントを一括更新。更新成功件数を返す。"""
-    updated = 0
-    for event in events:
+    updated, _ = await _patch_google_calendar_events(
+        bot, guild_id, [(event, google_updates) for event in events]
+    )
+    return updated
+
+
+async def _patch_google_calendar_events(
+    bot: CalendarBot,
+    guild_id: str,
+    updates: List[Tuple[Dict, Dict[str, Any]]],
+) -> Tuple[int, int]:
+    """(予定, 更新フィールド) の組を Google Calendar に反映する
+
+    カレンダー（calendar_owner）ごとに全予定の更新をまとめ、バッチリクエストで送信する。
+    カレンダー未登録・認証が無効な予定は対象外（件数にも含めない）。
+
+    Returns:
+        (更新に成功した予定数, 1件以上のイベント更新に失敗した予定数)
+    """
+    pending: Dict[str, Tuple[Any, List[Tuple[Dict, List[str], Dict[str, Any]]]]] = {}
+    for event, google_updates in updates:
         if not event.get('google_calendar_events'):
             continue
         cal_owner = event.get('calendar_owner') or event.get('created_by', '')
         if not cal_owner:
             continue
-        cal_mgr = bot.get_calendar_manager_for_user(int(guild_id), cal_owner)
-        if not cal_mgr:
-            continue
+        if cal_owner not in pending:
+            cal_mgr = await bot.get_calendar_manager_for_user(int(guild_id), cal_owner)
+            pending[cal_owner] = (cal_mgr, [])
+        cal_mgr, items = pending[cal_owner]
         google_cal_data = _parse_json_field(event.get('google_calendar_events'))
-        google_event_ids = [ge['event_id'] for ge in google_cal_data]
+        if cal_mgr and google_cal_data:
+            items.append((event, [ge['event_id'] for ge in google_cal_data], google_updates))
+
+    updated = 0
+    failed = 0
+    for cal_mgr, items in pending.values():
+        if not items:
+            continue
         try:
-            cal_mgr.update_events(google_event_ids, google_updates)
-            updated += 1
-        except Exception:
-            pass
-    return updated
+            failures = await cal_mgr.patch_events([
+                (google_event_id, google_updates)
+                for _, google_event_ids, google_updates in items
+                for google_event_id in google_event_ids
+            ])
+        except Exception as e:
+            print(f"[Calendar sync] Batch update failed for {len(items)} events: {e}")
+            failed += len(items)
+            continue
+        for event, google_event_ids, _ in items:
+            if any(google_event_id in failures for google_event_id in google_event_ids):
+                failed += 1
+                print(f"[Calendar sync] Failed to update events for {event.get('event_name')}")
+            else:
+                updated += 1
+    return updated, failed
 
 
 def _next_weekday_datetime(
@@ -2212,7 +2529,7 @@ async def _confirm_and_handle_in_thread(
     # 1. カレンダー選択（複数ある場合のみUI表示、addのみ）
     calendar_owner = None
     if action == "add":
-        all_tokens = bot.db_manager.get_all_oauth_tokens(guild_id)
+        all_tokens = await bot.db_manager.get_all_oauth_tokens(guild_id)
         if len(all_tokens) > 1 and not parsed.get('calendar_name'):
             cal_view = CalendarSelectView(author.id, all_tokens)
             await thread.send("📅 どのカレンダーに登録しますか？", view=cal_view)
@@ -2228,13 +2545,13 @@ async def _confirm_and_handle_in_thread(
             # カレンダー未認証
             pass
         if not calendar_owner:
-            token_info = _resolve_calendar_owner(bot, guild_id, parsed.get('calendar_name'))
+            token_info = await _resolve_calendar_owner(bot, guild_id, parsed.get('calendar_name'))
             if token_info:
                 calendar_owner = token_info.get('_doc_id') or token_info.get('authenticated_by')
 
     # 2. 色セットアップ完了チェック（addのみ）— 未設定時はウィザードを表示
     if action == "add" and calendar_owner:
-        if not bot.db_manager.is_color_setup_done(guild_id, calendar_owner):
+        if not await bot.db_manager.is_color_setup_done(guild_id, calendar_owner):
             await thread.send(
                 "🎨 このカレンダーの色初期設定がまだ完了していません。\n"
                 "各予定種類に対するデフォルト色を設定しましょう！"
@@ -2250,7 +2567,7 @@ async def _confirm_and_handle_in_thread(
 
     # 3. 色チェック（色自動割当）— calendar_owner を使用
     if action == "add" and not parsed.get("color_name") and calendar_owner:
-        auto_color = _auto_assign_color(
+        auto_color = await _auto_assign_color(
             bot.db_manager, guild_id, calendar_owner,
             parsed.get("recurrence"), parsed.get("nth_weeks"),
         )
@@ -2279,7 +2596,7 @@ async def _confirm_and_handle_in_thread(
 
                     if color_select_view.selected_color_id:
                         # プリセットを登録して色を自動割当
-                        bot.db_manager.add_color_preset(
+                        await bot.db_manager.add_color_preset(
                             guild_id, calendar_owner, category_label, color_select_view.selected_color_id,
                             description=f"{category_label}のイベント",
                             recurrence_type=category, is_auto_generated=True,
@@ -2309,7 +2626,7 @@ async def _confirm_and_handle_in_thread(
         summary = build_event_summary(parsed)
         title = "予定追加の確認"
     elif action == "edit":
-        events = bot.db_manager.search_events_by_name(parsed.get('event_name'), guild_id)
+        events = await bot.db_manager.search_events_by_name(parsed.get('event_name'), guild_id)
         if not events:
             return (f"❌ 予定「{parsed.get('event_name')}」が見つかりませんでした。", True)
         event = events[0]
@@ -2320,14 +2637,14 @@ async def _confirm_and_handle_in_thread(
         )
         title = "予定編集の確認"
     elif action == "skip":
-        events = bot.db_manager.search_events_by_name(parsed.get('event_name'), guild_id)
+        events = await bot.db_manager.search_events_by_name(parsed.get('event_name'), guild_id)
         if not events:
             return (f"❌ 予定「{parsed.get('event_name')}」が見つかりませんでした。", True)
         event = events[0]
         summary = build_skip_summary(parsed, event)
         title = "予定スキップの確認"
     elif action == "delete":
-        events = bot.db_manager.search_events_by_name(parsed.get('event_name'), guild_id)
+        events = await bot.db_manager.search_events_by_name(parsed.get('event_name'), guild_id)
         if not events:
             return (f"❌ 予定「{parsed.get('event_name')}」が見つかりませんでした。", True)
         event = events[0]
@@ -2384,7 +2701,7 @@ async def _handle_search_in_thread(
     date_range = query.get('date_range', 'this_week')
     start_date, end_date = get_date_range(date_range)
 
-    events = bot.db_manager.search_events(
+    events = await bot.db_manager.search_events(
         start_date=start_date,
         end_date=end_date,
         guild_id=guild_id,
@@ -2513,7 +2830,7 @@ class ColorSetupView(discord.ui.View):
         if interaction.user.id != self.author_id:
             return
         # セットアップ完了フラグだけ設定（カレンダー単位）
-        self.bot.db_manager.mark_color_setup_done(self.guild_id, self.target_user_id)
+        await self.bot.db_manager.mark_color_setup_done(self.guild_id, self.target_user_id)
         await interaction.response.edit_message(
             content="⏭️ 色初期設定をスキップしました。後から `/色 初期設定` で設定できます。",
             view=None,
@@ -2531,7 +2848,7 @@ class ColorSetupView(discord.ui.View):
                 "description": data["description"],
             })
 
-        self.bot.db_manager.initialize_default_color_presets(self.guild_id, self.target_user_id, presets_data)
+        await self.bot.db_manager.initialize_default_color_presets(self.guild_id, self.target_user_id, presets_data)
 
         # サマリー構築 → 先にインタラクション応答（3秒タイムアウト回避）
         summary_lines = []
@@ -2554,7 +2871,7 @@ class ColorSetupView(discord.ui.View):
         for key, data in self.selections.items():
             color_name = data["name"]
             new_color_id = data["color_id"]
-            affected = self.bot.db_manager.get_events_by_color_name(self.guild_id, color_name)
+            affected = await self.bot.db_manager.get_events_by_color_name(self.guild_id, color_name)
             affected = [e for e in affected if (e.get('calendar_owner') or e.get('created_by', '')) == self.target_user_id]
             if affected:
                 cnt = await _batch_update_google_calendar_events(
@@ -2563,32 +2880,25 @@ class ColorSetupView(discord.ui.View):
                 color_update_count += cnt
 
         # 既存予定で色未割当のものに自動割当
-        all_events = self.bot.db_manager.get_all_active_events(self.guild_id)
+        all_events = await self.bot.db_manager.get_all_active_events(self.guild_id)
         owner_events = [
             e for e in all_events
             if (e.get('calendar_owner') or e.get('created_by', '')) == self.target_user_id
             and not e.get('color_name')
         ]
         auto_count = 0
+        google_updates = []
         for event in owner_events:
             recurrence = event.get('recurrence')
-            nth_weeks_raw = event.get('nth_weeks')
-            nth_weeks = json.loads(nth_weeks_raw) if nth_weeks_raw else None
-            auto_color = _auto_assign_color(
+            nth_weeks = _parse_json_field(event.get('nth_weeks')) or None
+            auto_color = await _auto_assign_color(
                 self.bot.db_manager, self.guild_id, self.target_user_id, recurrence, nth_weeks
             )
             if auto_color:
-                self.bot.db_manager.update_event(event['id'], {'color_name': auto_color['name']})
-                if event.get('google_calendar_events'):
-                    cal_mgr = self.bot.get_calendar_manager_for_user(int(self.guild_id), self.target_user_id)
-                    if cal_mgr:
-                        google_cal_data = _parse_json_field(event.get('google_calendar_events'))
-                        ids = [ge['event_id'] for ge in google_cal_data]
-                        try:
-                            cal_mgr.update_events(ids, {'colorId': auto_color['color_id']})
-                        except Exception:
-                            pass
+                await self.bot.db_manager.update_event(event['id'], {'color_name': auto_color['name']}, guild_id=self.guild_id)
+                google_updates.append((event, {'colorId': auto_color['color_id']}))
                 auto_count += 1
+        await _patch_google_calendar_events(self.bot, self.guild_id, google_updates)
 
         # 処理完了後にメッセージを最終更新
         final_content = "✅ 色初期設定が完了しました！\n\n" + "\n".join(summary_lines)
@@ -2665,18 +2975,18 @@ class ColorSelectForEventView(discord.ui.View):
         return interaction.user.id == self.author_id
 
 
-def _resolve_calendar_owner(bot: CalendarBot, guild_id: str, calendar_name: str = None) -> Optional[dict]:
+async def _resolve_calendar_owner(bot: CalendarBot, guild_id: str, calendar_name: str = None) -> Optional[dict]:
     """calendar_nameからOAuthトークン情報を解決する"""
     if calendar_name:
-        tokens = bot.db_manager.get_oauth_tokens_by_display_name(guild_id, calendar_name)
+        tokens = await bot.db_manager.get_oauth_tokens_by_display_name(guild_id, calendar_name)
         if tokens:
             return tokens
     # calendar_name未指定 or 見つからない → デフォルト
-    default = bot.db_manager.get_default_oauth_tokens(guild_id)
+    default = await bot.db_manager.get_default_oauth_tokens(guild_id)
     if default:
         return default
     # デフォルトなし → 最初の1つ
-    all_tokens = bot.db_manager.get_all_oauth_tokens(guild_id)
+    all_tokens = await bot.db_manager.get_all_oauth_tokens(guild_id)
     return all_tokens[0] if all_tokens else None
 
 
@@ -2767,7 +3077,7 @@ class NotificationCalendarSelectView(discord.ui.View):
         selected = interaction.data["values"]
         calendar_owners = [] if "__all__" in selected else selected
 
-        self.bot.db_manager.save_notification_settings(
+        await self.bot.db_manager.save_notification_settings(
             guild_id=self.guild_id,
             enabled=True,
             weekday=self.weekday,
@@ -2871,7 +3181,7 @@ async def _resolve_missing_tags(
     if not tags:
         return tags
 
-    missing_tags = bot.db_manager.find_missing_tags(guild_id, tags)
+    missing_tags = await bot.db_manager.find_missing_tags(guild_id, tags)
     if not missing_tags:
         return tags
 
@@ -2890,18 +3200,18 @@ async def _resolve_missing_tags(
         return [t for t in tags if t not in missing_tags]
 
     # グループを取得して割当
-    groups = bot.db_manager.list_tag_groups(guild_id)
+    groups = await bot.db_manager.list_tag_groups(guild_id)
 
     if not groups:
         # デフォルトグループを作成
-        group_id = bot.db_manager.add_tag_group(guild_id, "一般", "自動作成されたタググループ")
+        group_id = await bot.db_manager.add_tag_group(guild_id, "一般", "自動作成されたタググループ")
         for tag_name in missing_tags:
-            bot.db_manager.add_tag(guild_id, group_id, tag_name)
+            await bot.db_manager.add_tag(guild_id, group_id, tag_name)
         await send_func(f"✅ タググループ「一般」を作成し、タグ {'、'.join(missing_tags)} を追加しました。")
     elif len(groups) == 1:
         group = groups[0]
         for tag_name in missing_tags:
-            bot.db_manager.add_tag(guild_id, group['id'], tag_name)
+            await bot.db_manager.add_tag(guild_id, group['id'], tag_name)
         await send_func(f"✅ タグ {'、'.join(missing_tags)} をグループ「{group['name']}」に追加しました。")
     else:
         # 複数グループ — タグごとにグループを選択
@@ -2913,7 +3223,7 @@ async def _resolve_missing_tags(
             )
             await select_view.wait()
             if select_view.selected_group_id:
-                bot.db_manager.add_tag(guild_id, select_view.selected_group_id, tag_name)
+                await bot.db_manager.add_tag(guild_id, select_view.selected_group_id, tag_name)
                 group_name = next(
                     (g['name'] for g in groups if g['id'] == select_view.selected_group_id), "?"
                 )
@@ -2927,6 +3237,37 @@ async def _resolve_missing_tags(
 
 # ---- ダイレクト実行関数（interaction不要版） ----
 
+CONFLICT_WARNING_LIMIT = 5
+CONFLICT_FIELDS = ('recurrence', 'weekday', 'nth_weeks', 'monthly_dates', 'time', 'duration_minutes')
+
+
+async def _conflict_warning(
+    bot: CalendarBot,
+    guild_id: str,
+    candidate: Dict[str, Any],
+    calendar_owner: Optional[str],
+    exclude_event_id: Optional[int] = None,
+) -> str:
+    """時間帯が重なる既存予定があれば警告文を返す（確認に失敗しても登録・編集は止めない）"""
+    try:
+        conflicts = await bot.db_manager.find_conflicts(guild_id, candidate, exclude_event_id=exclude_event_id)
+    except Exception as e:
+        print(f"[conflict] Failed to check conflicts in guild {guild_id}: {e}")
+        return ""
+    if not conflicts:
+        return ""
+
+    weekdays = ['月', '火', '水', '木', '金', '土', '日']
+    lines = ["\n⚠️ 同じ時間帯に他の予定があります:"]
+    for c in conflicts[:CONFLICT_WARNING_LIMIT]:
+        dt = datetime.strptime(c['date'], "%Y-%m-%d")
+        same_calendar = "（同じカレンダー）" if calendar_owner and c.get('calendar_owner') == calendar_owner else ""
+        lines.append(f"・{dt.month}/{dt.day}({weekdays[dt.weekday()]}) {c['time']} 「{c['event_name']}」{same_calendar}")
+    if len(conflicts) > CONFLICT_WARNING_LIMIT:
+        lines.append(f"ほか {len(conflicts) - CONFLICT_WARNING_LIMIT} 件")
+    return "\n".join(lines)
+
+
 async def _handle_add_event_direct(
     bot: CalendarBot,
     guild_id: str,
@@ -2937,20 +3278,20 @@ async def _handle_add_event_direct(
     """interactionなしで予定を追加する（スレッド内用）"""
     # タグと色のバリデーション
     tags = parsed.get('tags', []) or []
-    missing_tags = bot.db_manager.find_missing_tags(guild_id, tags)
+    missing_tags = await bot.db_manager.find_missing_tags(guild_id, tags)
     if missing_tags:
         return f"❌ 未登録のタグがあります: {', '.join(missing_tags)}"
 
     # カレンダーオーナー解決
     calendar_owner = parsed.get('_calendar_owner')
     if not calendar_owner:
-        token_info = _resolve_calendar_owner(bot, guild_id, parsed.get('calendar_name'))
+        token_info = await _resolve_calendar_owner(bot, guild_id, parsed.get('calendar_name'))
         calendar_owner = token_info.get('_doc_id') or token_info.get('authenticated_by') if token_info else None
 
     color_name = parsed.get('color_name')
     color_id = None
     if color_name and calendar_owner:
-        preset = bot.db_manager.get_color_preset(guild_id, calendar_owner, color_name)
+        preset = await bot.db_manager.get_color_preset(guild_id, calendar_owner, color_name)
         if not preset:
             return f"❌ 色名「{color_name}」が登録されていません。"
         color_id = preset['color_id']
@@ -2968,7 +3309,9 @@ async def _handle_add_event_direct(
 
     monthly_dates = parsed.get('monthly_dates')
 
-    event_id = bot.db_manager.add_event(
+    # 予定本体・Google Calendar 情報・変更履歴は1回のバッチ書き込みにまとめる
+    uow = bot.db_manager.unit_of_work()
+    event_id = await uow.add_event(
         guild_id=guild_id,
         event_name=parsed['event_name'],
         tags=tags,
@@ -2989,11 +3332,14 @@ async def _handle_add_event_direct(
         monthly_dates=monthly_dates,
     )
 
+    # 未認証の場合も、これまで通り予定本体は保存する
     if not calendar_owner:
+        await uow.commit()
         return "❌ カレンダーが未認証です。`/カレンダー 認証` を実行してください。"
 
-    cal_mgr = bot.get_calendar_manager_for_user(int(guild_id), calendar_owner)
+    cal_mgr = await bot.get_calendar_manager_for_user(int(guild_id), calendar_owner)
     if not cal_mgr:
+        await uow.commit()
         return "❌ カレンダーが未認証です。`/カレンダー 認証` を実行してください。"
 
     if parsed['recurrence'] != 'irregular':
@@ -3011,28 +3357,42 @@ async def _handle_add_event_direct(
         )
         end_dt = start_dt + timedelta(minutes=parsed.get('duration_minutes', 60))
 
-        google_event_id = cal_mgr.create_recurring_event(
-            summary=parsed['event_name'],
-            start_datetime=start_dt,
-            end_datetime=end_dt,
-            rrule=rrule,
-            description=cal_description,
-            color_id=color_id,
-            extended_props={
-                "tags": json.dumps(tags, ensure_ascii=False),
-                "color_name": color_name or "",
-                "x_url": x_url or "",
-                "vrc_group_url": vrc_group_url or "",
-                "official_url": official_url or "",
-            },
-        )
-
-        bot.db_manager.update_google_calendar_events(
+        try:
+            google_event_id = await cal_mgr.create_recurring_event(
+                summary=parsed['event_name'],
+                start_datetime=start_dt,
+                end_datetime=end_dt,
+                rrule=rrule,
+                description=cal_description,
+                color_id=color_id,
+                extended_props={
+                    "tags": json.dumps(tags, ensure_ascii=False),
+                    "color_name": color_name or "",
+                    "x_url": x_url or "",
+                    "vrc_group_url": vrc_group_url or "",
+                    "official_url": official_url or "",
+                },
+            )
+        except Exception:
+            # Google Calendar 登録に失敗しても、これまで通り予定本体は保存してから元の例外を伝える
+            # （キャンセル・終了時は保存しない）
+            try:
+                await uow.commit()
+            except Exception:
+                logger.exception("[add] Failed to save event %s after calendar registration error", event_id)
+            raise
+
+        fingerprint = await _expected_fingerprint(bot, guild_id, {
+            'event_name': parsed['event_name'], 'description': raw_description, 'tags': tags,
+            'color_name': color_name, 'x_url': x_url, 'vrc_group_url': vrc_group_url, 'official_url': official_url,
+        }, calendar_owner)
+        await uow.update_google_calendar_events(
             event_id,
-            [{"event_id": google_event_id, "rrule": rrule}]
+            [{"event_id": google_event_id, "rrule": rrule, "dtstart": start_dt.isoformat(), "expected": fingerprint}],
+            guild_id=guild_id,
         )
 
-        _safe_add_event_history(bot.db_manager,
+        await uow.add_event_history(
             guild_id=guild_id,
             event_id=event_id,
             event_name=parsed['event_name'],
@@ -3050,15 +3410,26 @@ async def _handle_add_event_direct(
             },
         )
 
+        conflict_note = await _conflict_warning(bot, guild_id, {
+            'recurrence': parsed['recurrence'],
+            'weekday': parsed.get('weekday'),
+            'nth_weeks': nth_weeks,
+            'monthly_dates': monthly_dates,
+            'time': parsed.get('time'),
+            'duration_minutes': parsed.get('duration_minutes', 60),
+        }, calendar_owner)
+
+        await uow.commit()
         return (
             f"✅ 予定を登録しました！\n"
             f"📅 {parsed['event_name']}\n"
             f"🔄 {RECURRENCE_TYPES.get(parsed['recurrence'], parsed['recurrence'])}\n"
             f"⏰ {parsed.get('time', '時刻未設定')}\n"
             f"📌 次回: {start_dt.strftime('%Y-%m-%d')}"
+            f"{conflict_note}"
         )
     else:
-        _safe_add_event_history(bot.db_manager,
+        await uow.add_event_history(
             guild_id=guild_id,
             event_id=event_id,
             event_name=parsed['event_name'],
@@ -3076,14 +3447,14 @@ async def _handle_add_event_direct(
             },
         )
 
+        await uow.commit()
         return (
             f"✅ 不定期予定を登録しました！\n"
             f"📅 {parsed['event_name']}\n"
             f"個別の日時は `/予定 {parsed['event_name']} 1月25日14時` のように追加してください。"
         )
 
-
-def _sync_google_calendar_edit(
+async def _sync_google_calendar_edit(
     bot: CalendarBot,
     guild_id: str,
     event: Dict[str, Any],
@@ -3100,7 +3471,7 @@ def _sync_google_calendar_edit(
 
     structural_change = any(k in parsed for k in ('recurrence', 'time', 'weekday', 'nth_weeks', 'monthly_dates', 'duration_minutes', 'start_date'))
 
-    cal_mgr = bot.get_calendar_manager_for_user(int(guild_id), cal_owner) if cal_owner else None
+    cal_mgr = await bot.get_calendar_manager_for_user(int(guild_id), cal_owner) if cal_owner else None
     if not cal_mgr:
         return f"❌ この予定が登録されたカレンダー（<@{cal_owner}>）の認証が無効です。再認証してもらってください。"
 
@@ -3109,9 +3480,7 @@ def _sync_google_calendar_edit(
     delete_warnings = ""
     if structural_change and new_recurrence != 'irregular':
         new_nth_weeks = parsed.get('nth_weeks') or _parse_json_field(event.get('nth_weeks'))
-        new_monthly_dates = parsed.get('monthly_dates') or (
-            json.loads(event['monthly_dates']) if event.get('monthly_dates') else None
-        )
+        new_monthly_dates = parsed.get('monthly_dates') or _parse_json_field(event.get('monthly_dates')) or None
         new_weekday = parsed.get('weekday', event.get('weekday'))
         new_time = parsed.get('time', event.get('time'))
         new_duration = parsed.get('duration_minutes', event.get('duration_minutes', 60))
@@ -3120,7 +3489,7 @@ def _sync_google_calendar_edit(
         color_name = updates.get('color_name', event.get('color_name'))
         color_id = None
         if color_name and cal_owner:
-            preset = bot.db_manager.get_color_preset(guild_id, cal_owner, color_name)
+            preset = await bot.db_manager.get_color_preset(guild_id, cal_owner, color_name)
             color_id = preset['color_id'] if preset else None
 
         edit_tags = updates.get('tags') if 'tags' in updates else _parse_json_field(event.get('tags'))
@@ -3153,24 +3522,17 @@ def _sync_google_calendar_edit(
         end_dt = start_dt + timedelta(minutes=new_duration)
 
         # 旧イベントを削除
-        delete_failures = []
-        for ge in google_cal_data:
-            try:
-                cal_mgr.service.events().delete(
-                    calendarId=cal_mgr.calendar_id, eventId=ge['event_id']
-                ).execute()
-            except Exception as e:
-                # 404 (Not Found) は既に削除済みなので無視
-                is_not_found = (
-                    hasattr(e, 'resp') and hasattr(e.resp, 'status') and e.resp.status == 404
-                ) or "404" in str(e)
-                if not is_not_found:
-                    delete_failures.append(ge['event_id'])
-                    print(f"[Calendar edit] Failed to delete old event {ge['event_id']}: {e}")
+        # 既に削除済み（404 / 410）のイベントは delete_events 側で成功扱いになる
+        old_event_ids = [ge['event_id'] for ge in google_cal_data]
+        try:
+            delete_failures = list(await cal_mgr.delete_events(old_event_ids))
+        except Exception as e:
+            delete_failures = old_event_ids
+            print(f"[Calendar edit] Failed to delete old events {old_event_ids}: {e}")
         if delete_failures:
             delete_warnings = f"\n⚠️ 旧カレンダーイベント {len(delete_failures)} 件の削除に失敗しました。手動で削除が必要な場合があります。"
 
-        google_event_id = cal_mgr.create_recurring_event(
+        google_event_id = await cal_mgr.create_recurring_event(
             summary=new_event_name,
             start_datetime=start_dt,
             end_datetime=end_dt,
@@ -3185,9 +3547,11 @@ def _sync_google_calendar_edit(
                 "official_url": updates.get('official_url', event.get('official_url')) or "",
             },
         )
-        bot.db_manager.update_google_calendar_events(
+        fingerprint = await _expected_fingerprint(bot, guild_id, {**event, **updates}, cal_owner)
+        await bot.db_manager.update_google_calendar_events(
             event['id'],
-            [{"event_id": google_event_id, "rrule": rrule}]
+            [{"event_id": google_event_id, "rrule": rrule, "dtstart": start_dt.isoformat(), "expected": fingerprint}],
+            guild_id=guild_id,
         )
     else:
         # 属性のみの変更（summary, description, colorId等）
@@ -3207,7 +3571,7 @@ def _sync_google_calendar_edit(
             color_name = updates.get('color_name')
             color_id = None
             if color_name and cal_owner:
-                preset = bot.db_manager.get_color_preset(guild_id, cal_owner, color_name)
+                preset = await bot.db_manager.get_color_preset(guild_id, cal_owner, color_name)
                 color_id = preset['color_id'] if preset else None
             if color_id:
                 google_updates['colorId'] = color_id
@@ -3226,7 +3590,7 @@ def _sync_google_calendar_edit(
                 bot_ext['official_url'] = updates.get('official_url') or ""
             if bot_ext:
                 google_updates['extendedProperties'] = {'private': bot_ext}
-            cal_mgr.update_events(google_event_ids, google_updates)
+            await cal_mgr.update_events(google_event_ids, google_updates)
 
     return delete_warnings if delete_warnings else None
 
@@ -3238,7 +3602,7 @@ async def _handle_edit_event_direct(
     user_id: str = "",
 ) -> str:
     """interactionなしで予定を編集する（スレッド内用）"""
-    events = bot.db_manager.search_events_by_name(parsed.get('event_name'), guild_id)
+    events = await bot.db_manager.search_events_by_name(parsed.get('event_name'), guild_id)
     if not events:
         return f"❌ 予定「{parsed.get('event_name')}」が見つかりませんでした。"
 
@@ -3257,7 +3621,7 @@ async def _handle_edit_event_direct(
     if 'start_date' in parsed: updates['start_date'] = parsed['start_date']
     if 'tags' in parsed:
         tags = parsed.get('tags', []) or []
-        missing_tags = bot.db_manager.find_missing_tags(guild_id, tags)
+        missing_tags = await bot.db_manager.find_missing_tags(guild_id, tags)
         if missing_tags:
             return f"❌ 未登録のタグがあります: {', '.join(missing_tags)}"
         updates['tags'] = tags
@@ -3267,7 +3631,7 @@ async def _handle_edit_event_direct(
     if 'color_name' in parsed:
         color_name = parsed.get('color_name')
         if color_name and cal_owner:
-            preset = bot.db_manager.get_color_preset(guild_id, cal_owner, color_name)
+            preset = await bot.db_manager.get_color_preset(guild_id, cal_owner, color_name)
             if not preset:
                 return f"❌ 色名「{color_name}」が登録されていません。"
         updates['color_name'] = color_name
@@ -3275,10 +3639,8 @@ async def _handle_edit_event_direct(
     # recurrence変更時の色自動再割当
     if 'recurrence' in parsed and 'color_name' not in parsed and cal_owner:
         new_recurrence = parsed.get('recurrence')
-        new_nth_weeks = parsed.get('nth_weeks') or (
-            json.loads(event['nth_weeks']) if event.get('nth_weeks') else None
-        )
-        auto_color = _auto_assign_color(bot.db_manager, guild_id, cal_owner, new_recurrence, new_nth_weeks)
+        new_nth_weeks = parsed.get('nth_weeks') or _parse_json_field(event.get('nth_weeks')) or None
+        auto_color = await _auto_assign_color(bot.db_manager, guild_id, cal_owner, new_recurrence, new_nth_weeks)
         if auto_color:
             updates['color_name'] = auto_color['name']
 
@@ -3289,12 +3651,12 @@ async def _handle_edit_event_direct(
     if 'official_url' in parsed:
         updates['official_url'] = parsed.get('official_url') or None
 
-    result = _sync_google_calendar_edit(bot, guild_id, event, parsed, updates, cal_owner)
+    result = await _sync_google_calendar_edit(bot, guild_id, event, parsed, updates, cal_owner)
     if result and result.startswith("❌"):
         return result
 
     try:
-        bot.db_manager.update_event(event['id'], updates)
+        await bot.db_manager.update_event(event['id'], updates, guild_id=guild_id)
     except Exception as e:
         print(f"[edit] Firestore update failed for event {event['id']}: {e}")
         return f"❌ カレンダーは更新されましたが、データベースの更新に失敗しました: {e}"
@@ -3307,7 +3669,7 @@ async def _handle_edit_event_direct(
         if key == 'tags':
             old_val = _parse_json_field(old_val)
         change_fields[key] = {"before": old_val, "after": new_val}
-    _safe_add_event_history(bot.db_manager,
+    await _safe_add_event_history(bot.db_manager,
         guild_id=guild_id,
         event_id=event['id'],
         event_name=event['event_name'],
@@ -3319,6 +3681,10 @@ async def _handle_edit_event_direct(
     msg = f"✅ 予定「{event['event_name']}」を更新しました。"
     if result:
         msg += result
+    if any(key in updates for key in CONFLICT_FIELDS):
+        msg += await _conflict_warning(
+            bot, guild_id, {**event, **updates}, cal_owner, exclude_event_id=event['id'],
+        )
     return msg
 
 
@@ -3329,7 +3695,7 @@ async def _handle_skip_event_direct(
     user_id: str = "",
 ) -> str:
     """定期予定の特定回をスキップする"""
-    events = bot.db_manager.search_events_by_name(parsed.get('event_name'), guild_id)
+    events = await bot.db_manager.search_events_by_name(parsed.get('event_name'), guild_id)
     if not events:
         return f"❌ 予定「{parsed.get('event_name')}」が見つかりませんでした。"
 
@@ -3346,15 +3712,16 @@ async def _handle_skip_event_direct(
     google_cal_events = event.get('google_calendar_events')
     if google_cal_events:
         cal_owner = event.get('calendar_owner') or event.get('created_by', '')
-        cal_mgr = bot.get_calendar_manager_for_user(int(guild_id), cal_owner) if cal_owner else None
+        cal_mgr = await bot.get_calendar_manager_for_user(int(guild_id), cal_owner) if cal_owner else None
         if not cal_mgr:
             return f"❌ この予定が登録されたカレンダー（<@{cal_owner}>）の認証が無効です。再認証してもらってください。"
 
-        google_event_ids = json.loads(google_cal_events)
+        google_event_ids = _parse_json_field(google_cal_events)
         for ge in google_event_ids:
             try:
-                cal_mgr.delete_recurring_instance(
-                    ge['event_id'], skip_date, event.get('time', '00:00')
+                await cal_mgr.delete_recurring_instance(
+                    ge['event_id'], skip_date, event.get('time', '00:00'),
+                    rrule=ge.get('rrule'), dtstart=ge.get('dtstart'),
                 )
             except ValueError as e:
                 return f"❌ {e}"
@@ -3362,10 +3729,10 @@ async def _handle_skip_event_direct(
                 return f"❌ Google Calendar のインスタンス削除に失敗しました: {e}"
 
     # Firestore に excluded_dates を追加
-    bot.db_manager.add_excluded_date(event['id'], skip_date)
+    await bot.db_manager.add_excluded_date(event['id'], skip_date, guild_id=guild_id)
 
     # 変更履歴を記録
-    _safe_add_event_history(bot.db_manager,
+    await _safe_add_event_history(bot.db_manager,
         guild_id=guild_id,
         event_id=event['id'],
         event_name=event['event_name'],
@@ -3391,7 +3758,7 @@ async def _handle_delete_event_direct(
     user_id: str = "",
 ) -> str:
     """interactionなしで予定を削除する（スレッド内用）"""
-    events = bot.db_manager.search_events_by_name(parsed.get('event_name'), guild_id)
+    events = await bot.db_manager.search_events_by_name(parsed.get('event_name'), guild_id)
     if not events:
         return f"❌ 予定「{parsed.get('event_name')}」が見つかりませんでした。"
 
@@ -3400,16 +3767,16 @@ async def _handle_delete_event_direct(
     google_cal_events = event.get('google_calendar_events')
     if google_cal_events:
         cal_owner = event.get('calendar_owner') or event.get('created_by', '')
-        cal_mgr = bot.get_calendar_manager_for_user(int(guild_id), cal_owner) if cal_owner else None
+        cal_mgr = await bot.get_calendar_manager_for_user(int(guild_id), cal_owner) if cal_owner else None
         if not cal_mgr:
             return f"❌ この予定が登録されたカレンダー（<@{cal_owner}>）の認証が無効です。再認証してもらってください。"
-        google_event_ids = [ge['event_id'] for ge in json.loads(google_cal_events)]
-        cal_mgr.delete_events(google_event_ids)
+        google_event_ids = [ge['event_id'] for ge in _parse_json_field(google_cal_events)]
+        await cal_mgr.delete_events(google_event_ids)
 
-    bot.db_manager.delete_event(event['id'])
+    await bot.db_manager.delete_event(event['id'], guild_id=guild_id)
 
     # 変更履歴を記録
-    _safe_add_event_history(bot.db_manager,
+    await _safe_add_event_history(bot.db_manager,
         guild_id=guild_id,
         event_id=event['id'],
         event_name=event['event_name'],
@@ -3455,7 +3822,7 @@ async def handle_search_event(bot: CalendarBot, interaction: discord.Interaction
     start_date, end_date = get_date_range(date_range)
 
     # データベースから検索
-    events = bot.db_manager.search_events(
+    events = await bot.db_manager.search_events(
         start_date=start_date,
         end_date=end_date,
         guild_id=guild_id,
@@ -3636,24 +4003,39 @@ class EventDeleteConfirmView(discord.ui.View):
         deleted = []
         warnings = []
 
+        # Google カレンダー側はカレンダーごとにまとめてバッチ削除する
+        pending: Dict[str, Tuple[Any, List[Tuple[str, List[str]]]]] = {}
         for event in self.events:
             event_name = event.get('event_name', '(名前なし)')
             google_cal_events = event.get('google_calendar_events')
+            if not google_cal_events:
+                continue
+            cal_owner = event.get('calendar_owner') or event.get('created_by', '')
+            if cal_owner not in pending:
+                cal_mgr = await self.bot_instance.get_calendar_manager_for_user(int(self.guild_id), cal_owner) if cal_owner else None
+                pending[cal_owner] = (cal_mgr, [])
+            cal_mgr, items = pending[cal_owner]
+            if cal_mgr:
+                items.append((event_name, [ge['event_id'] for ge in _parse_json_field(google_cal_events)]))
+            else:
+                warnings.append(f"⚠️ 「{event_name}」のカレンダー認証が無効のため、Googleカレンダーからは削除できませんでした")
 
-            if google_cal_events:
-                cal_owner = event.get('calendar_owner') or event.get('created_by', '')
-                cal_mgr = self.bot_instance.get_calendar_manager_for_user(int(self.guild_id), cal_owner) if cal_owner else None
-                if cal_mgr:
-                    try:
-                        google_event_ids = [ge['event_id'] for ge in json.loads(google_cal_events)]
-                        cal_mgr.delete_events(google_event_ids)
-                    except Exception as e:
-                        warnings.append(f"⚠️ 「{event_name}」のGoogleカレンダー削除に失敗: {e}")
-                else:
-                    warnings.append(f"⚠️ 「{event_name}」のカレンダー認証が無効のため、Googleカレンダーからは削除できませんでした")
+        for cal_mgr, items in pending.values():
+            if not items:
+                continue
+            try:
+                failures = await cal_mgr.delete_events([gid for _, google_event_ids in items for gid in google_event_ids])
+            except Exception as e:
+                warnings.extend(f"⚠️ 「{event_name}」のGoogleカレンダー削除に失敗: {e}" for event_name, _ in items)
+                continue
+            for event_name, google_event_ids in items:
+                errors = [failures[gid] for gid in google_event_ids if gid in failures]
+                if errors:
+                    warnings.append(f"⚠️ 「{event_name}」のGoogleカレンダー削除に失敗: {errors[0]}")
 
-            self.bot_instance.db_manager.delete_event(event.get('id'))
-            deleted.append(event_name)
+        for event in self.events:
+            await self.bot_instance.db_manager.delete_event(event.get('id'), guild_id=self.guild_id)
+            deleted.append(event.get('event_name', '(名前なし)'))
 
         result_lines = [f"✅ **{len(deleted)}件** の予定を削除しました。"]
         if deleted:
@@ -3868,7 +4250,7 @@ async def confirm_and_handle_add_event(bot: CalendarBot, interaction: discord.In
         parsed['tags'] = resolved_tags
 
     # カレンダー選択（複数ある場合のみ）
-    all_tokens = bot.db_manager.get_all_oauth_tokens(guild_id)
+    all_tokens = await bot.db_manager.get_all_oauth_tokens(guild_id)
     if len(all_tokens) > 1 and not parsed.get('calendar_name'):
         cal_view = CalendarSelectView(interaction.user.id, all_tokens)
         await interaction.followup.send("📅 どのカレンダーに登録しますか？", view=cal_view, ephemeral=True)
@@ -3899,7 +4281,7 @@ async def confirm_and_handle_edit_event(bot: CalendarBot, interaction: discord.I
             )
             parsed['tags'] = resolved_tags
 
-    events = bot.db_manager.search_events_by_name(parsed.get('event_name'), guild_id)
+    events = await bot.db_manager.search_events_by_name(parsed.get('event_name'), guild_id)
     if not events:
         return f"❌ 予定「{parsed.get('event_name')}」が見つかりませんでした。"
     event = events[0]
@@ -3920,7 +4302,7 @@ async def confirm_and_handle_edit_event(bot: CalendarBot, interaction: discord.I
 
 async def confirm_and_handle_delete_event(bot: CalendarBot, interaction: discord.Interaction, parsed: Dict[str, Any]) -> Optional[str]:
     guild_id = str(interaction.guild_id) if interaction.guild_id else ""
-    events = bot.db_manager.search_events_by_name(parsed.get('event_name'), guild_id)
+    events = await bot.db_manager.search_events_by_name(parsed.get('event_name'), guild_id)
     if not events:
         return f"❌ 予定「{parsed.get('event_name')}」が見つかりませんでした。"
     event = events[0]
@@ -4174,41 +4556,84 @@ def create_tag_group_list_embed(groups: List[Dict[str, Any]], tags: List[Dict[st
         )
     return embed
 
-def _upsert_legend_event(cal_mgr, db_manager, legend_key: str, legend_event_id: str, summary: str, description: str):
-    """凡例イベントの作成/更新共通処理。既存イベントが見つからない場合は新規作成する。"""
-    legend_start = "2026-01-01"
-    legend_end = "2030-12-31"
-    event_body = {
+def _content_hash(value: Any) -> str:
+    """JSON にできる値の内容ハッシュ（キー順に依存しない）。前回反映した内容から変わったかの判定に使う"""
+    payload = json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _legend_event_body(summary: str, description: str) -> Dict[str, Any]:
+    """凡例イベントのリクエスト本文"""
+    return {
         "summary": summary,
         "description": description,
         "colorId": LEGEND_COLOR_ID,
-        "start": {"date": legend_start},
-        "end": {"date": legend_end},
+        "start": {"date": "2026-01-01"},
+        "end": {"date": "2030-12-31"},
     }
 
+
+async def _upsert_legend_event(
+    bot: CalendarBot, guild_id: str, user_id: str, kind: str,
+    summary: str, description: str, token_data: Optional[Dict[str, Any]] = None,
+):
+    """凡例イベントの作成/更新共通処理。既存イベントが見つからない場合は新規作成する。
+
+    前回反映した内容ハッシュと同じなら Google Calendar には触れない
+    （Google 側で削除・変更された凡例を戻すため LEGEND_RECHECK_INTERVAL ごとには反映し直す）。
+    """
+    if token_data is None:
+        token_data = await bot.db_manager.get_oauth_tokens(guild_id, user_id)
+        if not token_data:
+            return
+    state = (token_data.get('calendar_legends') or {}).get(kind) or {}
+    event_body = _legend_event_body(summary, description)
+    content_hash = _content_hash(event_body)
+    now = datetime.now(timezone.utc)
+    if state.get('event_id') and state.get('hash') == content_hash and state.get('synced_at'):
+        try:
+            if now - datetime.fromisoformat(state['synced_at']) < LEGEND_RECHECK_INTERVAL:
+                return
+        except (TypeError, ValueError):
+            pass
+
+    cal_mgr = await bot.get_calendar_manager_for_user(int(guild_id), user_id)
+    if not cal_mgr:
+        return
+
+    legend_key = f"legend_{kind}_event_id:{guild_id}:{user_id}"
+    # calendar_legends への移行前は settings コレクションにイベントIDだけを保存していた
+    legend_event_id = state.get('event_id') or await bot.db_manager.get_setting(legend_key, "")
+
     # 既存イベントの更新を試行
+    event_id = None
     if legend_event_id:
         try:
-            cal_mgr.update_event(legend_event_id, event_body)
-            return
+            await cal_mgr.update_event(legend_event_id, event_body)
+            event_id = legend_event_id
         except Exception as e:
             # イベントが削除済み等で更新失敗 → 新規作成にフォールバック
             print(f"Legend event update failed, will recreate ({legend_key}): {e}")
 
     # 新規作成
+    if event_id is None:
+        try:
+            event_id = (await cal_mgr.insert_event(event_body))['id']
+        except Exception as e:
+            print(f"Legend event create failed ({legend_key}): {e}")
+            return
+
     try:
-        event = cal_mgr.service.events().insert(
-            calendarId=cal_mgr.calendar_id, body=event_body
-        ).execute()
-        db_manager.update_setting(legend_key, event['id'])
+        await bot.db_manager.update_calendar_legends(guild_id, user_id, {
+            kind: {"event_id": event_id, "hash": content_hash, "synced_at": now.isoformat()},
+        })
     except Exception as e:
-        print(f"Legend event create failed ({legend_key}): {e}")
+        # 途中で認証が解除された（トークンのドキュメントがない）場合など。他のカレンダーの凡例更新は続ける
+        print(f"Legend state save failed ({legend_key}): {e}")
 
 
-async def _update_color_legend_for_user(bot: CalendarBot, guild_id: str, user_id: str):
-    """色凡例イベントを更新（カレンダー単位）"""
-    presets = bot.db_manager.list_color_presets(guild_id, user_id)
-
+def _render_color_legend(presets: List[Dict[str, Any]]) -> Tuple[str, str]:
+    """色凡例イベントの (summary, description)"""
     cat_labels = {c["key"]: c["label"] for c in COLOR_CATEGORIES}
     lines = ["═══ 色プリセット一覧 ═══", ""]
     if presets:
@@ -4222,25 +4647,11 @@ async def _update_color_legend_for_user(bot: CalendarBot, guild_id: str, user_id
             lines.append(f"{emoji} {color_name} (colorId {cid}){rt_label} {desc}")
     else:
         lines.append("登録なし")
+    return "🎨 色プリセット凡例", "\n".join(lines)
 
-    description = "\n".join(lines)
-    summary = "🎨 色プリセット凡例"
-
-    cal_mgr = bot.get_calendar_manager_for_user(int(guild_id), user_id)
-    if not cal_mgr:
-        return
-
-    legend_key = f"legend_color_event_id:{guild_id}:{user_id}"
-    legend_event_id = bot.db_manager.get_setting(legend_key, "")
-
-    _upsert_legend_event(cal_mgr, bot.db_manager, legend_key, legend_event_id, summary, description)
-
-
-async def _update_tag_legend_for_user(bot: CalendarBot, guild_id: str, user_id: str):
-    """タグ凡例イベントを更新（カレンダー単位）"""
-    groups = bot.db_manager.list_tag_groups(guild_id)
-    tags = bot.db_manager.list_tags(guild_id)
 
+def _render_tag_legend(groups: List[Dict[str, Any]], tags: List[Dict[str, Any]]) -> Tuple[str, str]:
+    """タグ凡例イベントの (summary, description)"""
     lines = ["═══ タググループ一覧 ═══", ""]
     tags_by_group: Dict[int, List[Dict[str, Any]]] = {}
     for tag in tags:
@@ -4251,74 +4662,98 @@ async def _update_tag_legend_for_user(bot: CalendarBot, guild_id: str, user_id:
             lines.append(f"  ・{t['name']}: {t.get('description','')}")
     if not groups:
         lines.append("登録なし")
+    return "🏷️ タグ凡例", "\n".join(lines)
 
-    description = "\n".join(lines)
-    summary = "🏷️ タグ凡例"
 
-    cal_mgr = bot.get_calendar_manager_for_user(int(guild_id), user_id)
-    if not cal_mgr:
-        return
+async def _update_color_legend_for_user(
+    bot: CalendarBot, guild_id: str, user_id: str, token_data: Optional[Dict[str, Any]] = None,
+):
+    """色凡例イベントを更新（カレンダー単位）"""
+    presets = await bot.db_manager.list_color_presets(guild_id, user_id)
+    summary, description = _render_color_legend(presets)
+    await _upsert_legend_event(bot, guild_id, user_id, "color", summary, description, token_data)
 
-    legend_key = f"legend_tag_event_id:{guild_id}:{user_id}"
-    legend_event_id = bot.db_manager.get_setting(legend_key, "")
 
-    _upsert_legend_event(cal_mgr, bot.db_manager, legend_key, legend_event_id, summary, description)
+async def _update_tag_legend_for_user(
+    bot: CalendarBot, guild_id: str, user_id: str, token_data: Optional[Dict[str, Any]] = None,
+    rendered: Optional[Tuple[str, str]] = None,
+):
+    """タグ凡例イベントを更新（カレンダー単位、rendered があればタグの再取得を省く）"""
+    if rendered is None:
+        groups = await bot.db_manager.list_tag_groups(guild_id)
+        tags = await bot.db_manager.list_tags(guild_id)
+        rendered = _render_tag_legend(groups, tags)
+    summary, description = rendered
+    await _upsert_legend_event(bot, guild_id, user_id, "tag", summary, description, token_data)
 
 
 async def _update_legend_event_for_user(bot: CalendarBot, guild_id: str, user_id: str):
     """後方互換: 色・タグ両方の凡例を更新"""
-    await _update_color_legend_for_user(bot, guild_id, user_id)
-    await _update_tag_legend_for_user(bot, guild_id, user_id)
+    token_data = await bot.db_manager.get_oauth_tokens(guild_id, user_id)
+    if not token_data:
+        return
+    await _update_color_legend_for_user(bot, guild_id, user_id, token_data)
+    await _update_tag_legend_for_user(bot, guild_id, user_id, token_data)
 
 
 async def _update_legend_event_by_guild(bot: CalendarBot, guild_id: str):
     """guild_idベースで凡例イベントを全認証カレンダーに更新"""
-    all_tokens = bot.db_manager.get_all_oauth_tokens(guild_id)
-    for token_data in all_tokens:
-        user_id = token_data.get("_doc_id") or token_data.get("authenticated_by")
-        if user_id == "google":
-            user_id = token_data.get("authenticated_by", "")
-        if not user_id:
-            continue
-        await _update_color_legend_for_user(bot, guild_id, user_id)
-        await _update_tag_legend_for_user(bot, guild_id, user_id)
-
-    # 旧凡例イベントのマイグレーション（旧キーが存在する場合は削除して新キーに移行）
+    all_tokens = await bot.db_manager.get_all_oauth_tokens(guild_id)
+    if not all_tokens:
+        return
+    # タグ凡例の内容はサーバー共通のため1回だけ組み立てる
+    tag_legend = _render_tag_legend(
+        await bot.db_manager.list_tag_groups(guild_id),
+        await bot.db_manager.list_tags(guild_id),
+    )
     for token_data in all_tokens:
         user_id = token_data.get("_doc_id") or token_data.get("authenticated_by")
         if user_id == "google":
             user_id = token_data.get("authenticated_by", "")
         if not user_id:
             continue
-        old_key = f"legend_event_id:{guild_id}:{user_id}"
-        old_event_id = bot.db_manager.get_setting(old_key, "")
-        if old_event_id:
-            cal_mgr = bot.get_calendar_manager_for_user(int(guild_id), user_id)
-            if cal_mgr:
-                try:
-                    cal_mgr.service.events().delete(
-                        calendarId=cal_mgr.calendar_id, eventId=old_event_id
-                    ).execute()
-                except Exception:
-                    pass
-            bot.db_manager.update_setting(old_key, "")
+        await _update_color_legend_for_user(bot, guild_id, user_id, token_data)
+        await _update_tag_legend_for_user(bot, guild_id, user_id, token_data, rendered=tag_legend)
+        # レガシー "google" ドキュメントはトークン取得時に user_id のドキュメントへ移され、次回以降に移行する
+        if token_data.get('_doc_id') == user_id and not (token_data.get('calendar_legends') or {}).get('legacy_migrated'):
+            await _migrate_legacy_legend_event(bot, guild_id, user_id)
+
+
+async def _migrate_legacy_legend_event(bot: CalendarBot, guild_id: str, user_id: str):
+    """旧凡例イベント（色・タグ共通の1件）を削除し、移行済みとして記録する（カレンダーごとに1回）"""
+    old_key = f"legend_event_id:{guild_id}:{user_id}"
+    old_event_id = await bot.db_manager.get_setting(old_key, "")
+    if old_event_id:
+        cal_mgr = await bot.get_calendar_manager_for_user(int(guild_id), user_id)
+        if not cal_mgr:
+            # 認証が無効な間は移行済みにせず、次回また試す
+            return
+        try:
+            await cal_mgr.delete_events([old_event_id])
+        except Exception:
+            pass
+        await bot.db_manager.update_setting(old_key, "")
+    try:
+        await bot.db_manager.update_calendar_legends(guild_id, user_id, {"legacy_migrated": True})
+    except Exception as e:
+        print(f"Legacy legend migration state save failed ({old_key}): {e}")
 
 
 async def update_legend_event(bot: CalendarBot, interaction: discord.Interaction):
     guild_id = str(interaction.guild_id) if interaction.guild_id else ""
-    all_tokens = bot.db_manager.get_all_oauth_tokens(guild_id)
+    all_tokens = await bot.db_manager.get_all_oauth_tokens(guild_id)
     if not all_tokens:
         await interaction.followup.send("❌ カレンダーが未認証です。`/カレンダー 認証` を実行してください。", ephemeral=True)
         return
     await _update_legend_event_by_guild(bot, guild_id)
 
 
-def _rebuild_expected_event(
+async def _rebuild_expected_event(
     bot: CalendarBot, guild_id: str, event: Dict[str, Any], cal_owner: str
 ) -> Dict[str, Any]:
     """Firestoreイベントデータから「Google Calendarイベントのあるべき姿」を構築する"""
     tags = _parse_json_field(event.get('tags'))
-    tag_groups = bot.db_manager.list_tag_groups(guild_id)
+    tag_groups = await bot.db_manager.list_tag_groups(guild_id)
 
     description = _build_event_description(
         raw_description=event.get('description', ''),
@@ -4336,18 +4771,102 @@ def _rebuild_expected_event(
 
     color_name = event.get('color_name')
     if color_name and cal_owner:
-        preset = bot.db_manager.get_color_preset(guild_id, cal_owner, color_name)
+        preset = await bot.db_manager.get_color_preset(guild_id, cal_owner, color_name)
         if preset:
             result['colorId'] = preset['color_id']
 
     return result
 
 
-def _recreate_calendar_event(
+def _expected_source_hash(event: Dict[str, Any], cal_owner: str) -> str:
+    """「あるべき姿」の元になる予定のフィールド（予定名・説明・タグ・色・URL・カレンダー）のハッシュ"""
+    source = {
+        'event_name': event.get('event_name') or '',
+        'description': event.get('description') or '',
+        'tags': _parse_json_field(event.get('tags')) or [],
+        'color_name': event.get('color_name') or '',
+        'x_url': event.get('x_url') or '',
+        'vrc_group_url': event.get('vrc_group_url') or '',
+        'official_url': event.get('official_url') or '',
+        'calendar_owner': cal_owner or '',
+    }
+    return _content_hash(source)
+
+
+def _event_content_hash(summary: Optional[str], description: Optional[str]) -> str:
+    """Google Calendar イベントの summary・description のハッシュ"""
+    return _content_hash([summary or '', description or ''])
+
+
+async def _expected_fingerprint(
+    bot: CalendarBot, guild_id: str, event: Dict[str, Any], cal_owner: str,
+    expected: Optional[Dict[str, Any]] = None, config_version: Optional[int] = None,
+) -> Dict[str, Any]:
+    """google_calendar_events の各要素に保存する「あるべき姿」の指紋
+
+    hash は summary・description、color_id は colorId（プリセットなしなら None）。
+    source（予定のフィールド）と config_version（タグ・色の設定）が一致する間は有効で、
+    整合性チェックでは _rebuild_expected_event を呼ばずにハッシュの比較だけで済ませる。
+    """
+    if config_version is None:
+        # あるべき姿を組み立てる前の版を記録する（組み立て中に設定が変われば次回作り直される）
+        config_version = (await bot.db_manager.get_guild_config(guild_id)).get('version')
+    if expected is None:
+        expected = await _rebuild_expected_event(bot, guild_id, event, cal_owner)
+    return {
+        'hash': _event_content_hash(expected.get('summary'), expected.get('description')),
+        'color_id': expected.get('colorId'),
+        'source': _expected_source_hash(event, cal_owner),
+        'config_version': config_version,
+    }
+
+
+def _fingerprint_is_current(
+    fingerprint: Optional[Dict[str, Any]], event: Dict[str, Any], cal_owner: str, config_version: Optional[int],
+) -> bool:
+    """保存済みの指紋が今の予定・設定から作ったものか"""
+    return (
+        isinstance(fingerprint, dict)
+        and config_version is not None
+        and fingerprint.get('config_version') == config_version
+        and fingerprint.get('source') == _expected_source_hash(event, cal_owner)
+    )
+
+
+def _matches_fingerprint(gcal_event: Dict[str, Any], fingerprint: Dict[str, Any]) -> bool:
+    """Google Calendar 側のイベントが指紋どおり（summary・description・colorId が一致）か"""
+    if _event_content_hash(gcal_event.get('summary'), gcal_event.get('description')) != fingerprint.get('hash'):
+        return False
+    expected_color = fingerprint.get('color_id')
+    return not expected_color or expected_color == gcal_event.get('colorId')
+
+
+def _restore_recurrence_rule(actual: Optional[List[str]], expected_rrule: Optional[str]) -> Optional[List[str]]:
+    """Google Calendar 側の繰り返しルールが保存済みの RRULE と意味的に異なる場合、復元後の recurrence を返す
+
+    どちらも RecurrenceCalculator.parse_rrule で解析して比較する（表記揺れは無視）。
+    Google 側のルールを解析できない場合は誤って上書きしないよう None を返す。
+    EXDATE など RRULE 以外の行はそのまま残す。
+    """
+    if not actual or not expected_rrule:
+        return None
+    rrule_lines = [line for line in actual if line.upper().startswith("RRULE:")]
+    if len(rrule_lines) != 1:
+        return None
+    try:
+        if RecurrenceCalculator.parse_rrule(rrule_lines[0]) == RecurrenceCalculator.parse_rrule(expected_rrule):
+            return None
+    except ValueError as e:
+        print(f"[sync] Cannot compare recurrence rule {rrule_lines[0]!r}: {e}")
+        return None
+    return [expected_rrule] + [line for line in actual if not line.upper().startswith("RRULE:")]
+
+
+async def _recreate_calendar_event(
     bot: CalendarBot, guild_id: str, event: Dict[str, Any],
-    cal_mgr: 'GoogleCalendarManager', cal_owner: str
+    cal_mgr: 'AsyncCalendarManager', cal_owner: str, config_version: Optional[int] = None,
 ) -> Optional[str]:
-    """削除されたイベントをGoogle Calendarに再作成し、新しいイベントIDをFirestoreに保存する"""
+    """削除されたイベントをGoogle Calendarに再作成し、新しいイベントIDと指紋をFirestoreに保存する"""
     recurrence = event.get('recurrence', '')
     if recurrence == 'irregular':
         # 不定期イベントは Google Calendar イベントなしのためスキップ
@@ -4355,8 +4874,7 @@ def _recreate_calendar_event(
 
     weekday = event.get('weekday')
     time_str = event.get('time')
-    monthly_dates_raw = event.get('monthly_dates')
-    monthly_dates = json.loads(monthly_dates_raw) if monthly_dates_raw else None
+    monthly_dates = _parse_json_field(event.get('monthly_dates')) or None
 
     if recurrence == 'monthly_date':
         if not monthly_dates or not time_str:
@@ -4367,12 +4885,14 @@ def _recreate_calendar_event(
 
     nth_weeks = _parse_json_field(event.get('nth_weeks'))
 
-    expected = _rebuild_expected_event(bot, guild_id, event, cal_owner)
+    if config_version is None:
+        config_version = (await bot.db_manager.get_guild_config(guild_id)).get('version')
+    expected = await _rebuild_expected_event(bot, guild_id, event, cal_owner)
 
     color_name = event.get('color_name')
     color_id = None
     if color_name and cal_owner:
-        preset = bot.db_manager.get_color_preset(guild_id, cal_owner, color_name)
+        preset = await bot.db_manager.get_color_preset(guild_id, cal_owner, color_name)
         if preset:
             color_id = preset['color_id']
 
@@ -4393,7 +4913,7 @@ def _recreate_calendar_event(
         duration_minutes = event.get('duration_minutes', 60)
         end_dt = start_dt + timedelta(minutes=duration_minutes)
 
-        google_event_id = cal_mgr.create_recurring_event(
+        google_event_id = await cal_mgr.create_recurring_event(
             summary=expected['summary'],
             start_datetime=start_dt,
             end_datetime=end_dt,
@@ -4409,9 +4929,13 @@ def _recreate_calendar_event(
             },
         )
 
-        bot.db_manager.update_google_calendar_events(
+        fingerprint = await _expected_fingerprint(
+            bot, guild_id, event, cal_owner, expected=expected, config_version=config_version,
+        )
+        await bot.db_manager.update_google_calendar_events(
             event['id'],
-            [{"event_id": google_event_id, "rrule": rrule}]
+            [{"event_id": google_event_id, "rrule": rrule, "dtstart": start_dt.isoformat(), "expected": fingerprint}],
+            guild_id=guild_id,
         )
 
         return google_event_id
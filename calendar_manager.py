@@ -1,11 +1,59 @@
 from google.oauth2.credentials import Credentials as OAuthCredentials
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+import httplib2
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional, Dict, Any, Callable
+from typing import List, Optional, Dict, Any, Callable, Tuple
+import asyncio
+import functools
+import json
+import threading
+import time
+
+from rate_limiter import CalendarRateLimiter, http_status, is_retryable
+from recurrence_calculator import RRULE_LOCAL_TZ, RecurrenceCalculator
 
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
+# 有効期限のこの秒数前になったら事前にトークンを更新する
+TOKEN_REFRESH_MARGIN_SECONDS = 300
+
+# バッチリクエスト1回にまとめる操作数の上限
+BATCH_MAX_REQUESTS = 50
+
+
+@functools.lru_cache(maxsize=1)
+def _calendar_discovery_document() -> Dict[str, Any]:
+    """ライブラリ同梱の Calendar API v3 ディスカバリドキュメント（プロセス内で1回だけ読み込む）"""
+    return json.loads(discovery_cache.get_static_doc('calendar', 'v3'))
+
+
+class _ManagedCredentials(OAuthCredentials):
+    """トークン更新を GoogleCalendarManager のロックと保存コールバック経由にする credentials
+
+    google-auth（AuthorizedHttp）はリクエスト前の期限切れ時や 401 の再試行時に refresh() を直接呼ぶため、
+    ここで1本化しないと並行するスレッドが同じトークンを別々に更新し、更新結果も保存されない。
+    """
+
+    def __init__(self, *args, refresh_lock: threading.RLock, on_refreshed: Callable[[], None], **kwargs):
+        super().__init__(*args, **kwargs)
+        self._refresh_lock = refresh_lock
+        self._on_refreshed = on_refreshed
+
+    def refresh(self, request):
+        stale_token = self.token
+        with self._refresh_lock:
+            if self.token != stale_token and self.valid:
+                # ロックを待っている間に他のスレッドが更新した
+                return
+            super().refresh(request)
+            self._on_refreshed()
+
+
 class GoogleCalendarManager:
     def __init__(
         self,
@@ -16,8 +64,14 @@ class GoogleCalendarManager:
         client_secret: str,
         calendar_id: str,
         on_token_refresh: Optional[Callable] = None,
+        rate_limiter: Optional[CalendarRateLimiter] = None,
+        rate_limit_key: Optional[str] = None,
     ):
-        """OAuth トークンから GoogleCalendarManager を構築する"""
+        """OAuth トークンから GoogleCalendarManager を構築する
+
+        rate_limiter を渡すと全 API 呼び出しに流量制限と再試行をかける
+        （rate_limit_key ごと＝カレンダーオーナーごとのバケットと、共有のバケットの両方）。
+        """
         expiry = None
         if token_expiry:
             try:
@@ -25,7 +79,9 @@ class GoogleCalendarManager:
             except (ValueError, TypeError):
                 pass
 
-        creds = OAuthCredentials(
+        # 同じオーナーの並行タスクによるトークン更新を1本化する
+        self._refresh_lock = threading.RLock()
+        creds = _ManagedCredentials(
             token=access_token,
             refresh_token=refresh_token,
             token_uri="https://oauth2.googleapis.com/token",
@@ -33,17 +89,90 @@ class GoogleCalendarManager:
             client_secret=client_secret,
             scopes=SCOPES,
             expiry=expiry,
+            refresh_lock=self._refresh_lock,
+            on_refreshed=self._save_refreshed_token,
         )
 
-        if creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-            if on_token_refresh and creds.token:
-                on_token_refresh(creds.token, creds.expiry.isoformat() if creds.expiry else "")
-
         self.credentials = creds
-        self.service = build('calendar', 'v3', credentials=creds)
         self.calendar_id = calendar_id
         self._on_token_refresh = on_token_refresh
+        self._rate_limiter = rate_limiter
+        self._rate_limit_key = rate_limit_key
+        # httplib2.Http はスレッドセーフでないため、スレッドごとに接続を持つ
+        self._local = threading.local()
+        self.ensure_fresh()
+        # ディスカバリドキュメントは同梱のものを使い回す（ネットワークアクセス・JSON解析なし）
+        self.service = build_from_document(_calendar_discovery_document(), credentials=creds)
+
+    def ensure_fresh(self, margin_seconds: int = TOKEN_REFRESH_MARGIN_SECONDS) -> bool:
+        """アクセストークンが期限切れ（または期限間近）なら同じ credentials を更新する
+
+        service は同じ credentials を参照しているため作り直しは不要。
+        更新した場合は on_token_refresh で新しいトークンを保存させ、True を返す。
+        複数スレッドから同時に呼ばれても更新は1回だけ行い、待っていた側は更新済みのトークンを使う
+        （False を返す）。
+        """
+        if not self._needs_refresh(margin_seconds):
+            return False
+        with self._refresh_lock:
+            if not self._needs_refresh(margin_seconds):
+                return False
+            self.credentials.refresh(Request())
+            return True
+
+    def _save_refreshed_token(self) -> bool:
+        """更新したアクセストークンを on_token_refresh で保存させる（_refresh_lock 取得済み前提）
+
+        保存に失敗しても API 呼び出しは続ける（CalendarManagerPool が次の取得時に保存し直す）。
+        """
+        creds = self.credentials
+        if not self._on_token_refresh or not creds.token:
+            return True
+        try:
+            self._on_token_refresh(creds.token, creds.expiry.isoformat() if creds.expiry else "")
+        except Exception as e:
+            print(f"[calendar] Failed to save refreshed access token: {e}")
+            return False
+        return True
+
+    def save_access_token(self) -> bool:
+        """メモリ上のアクセストークンを on_token_refresh で保存し直す。保存できたかを返す"""
+        with self._refresh_lock:
+            return self._save_refreshed_token()
+
+    def _needs_refresh(self, margin_seconds: int) -> bool:
+        creds = self.credentials
+        if not creds.refresh_token:
+            return False
+        if creds.token and creds.expiry and not creds.expired:
+            # google-auth の expiry は naive UTC
+            remaining = creds.expiry - datetime.now(timezone.utc).replace(tzinfo=None)
+            return remaining <= timedelta(seconds=margin_seconds)
+        return not (creds.token and not creds.expiry)
+
+    def adopt_access_token(self, access_token: str, token_expiry: Optional[str]) -> bool:
+        """他プロセスが更新して保存したアクセストークンを credentials に取り込む
+
+        メモリ上のトークンの方が新しい（保存済みの有効期限が同じか古い）場合は取り込まない。
+
+        Returns:
+            取り込んだかどうか
+        """
+        expiry = None
+        if token_expiry:
+            try:
+                expiry = datetime.fromisoformat(token_expiry)
+            except (ValueError, TypeError):
+                pass
+        if expiry is not None and expiry.tzinfo is not None:
+            expiry = expiry.astimezone(timezone.utc).replace(tzinfo=None)
+        with self._refresh_lock:
+            current = self.credentials.expiry
+            if current is not None and (expiry is None or expiry <= current):
+                return False
+            self.credentials.token = access_token
+            self.credentials.expiry = expiry
+            return True
 
     def create_events(
         self,
@@ -57,28 +186,31 @@ class GoogleCalendarManager:
         extended_props: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """
-        複数のイベントを一括作成
+        複数のイベントを一括作成（バッチリクエストで送信し、失敗した日付は結果から除く）
         """
+        requests = [
+            self.service.events().insert(
+                calendarId=self.calendar_id,
+                body=self._event_body(
+                    event_name, date, time_str, duration_minutes, description,
+                    color_id=color_id, extended_props=extended_props,
+                ),
+            )
+            for date in dates
+        ]
+
         created_events = []
-        
-        for date in dates:
-            try:
-                event_id = self.create_event(
-                    event_name, date, time_str, 
-                    duration_minutes, description, tags,
-                    color_id=color_id,
-                    extended_props=extended_props
-                )
-                
-                created_events.append({
-                    "event_id": event_id,
-                    "date": date.strftime("%Y-%m-%d"),
-                    "time": time_str,
-                    "created_at": datetime.now(timezone.utc).isoformat() + "Z"
-                })
-            except Exception as e:
-                print(f"Failed to create event on {date}: {e}")
-        
+        for date, (event, error) in zip(dates, self._execute_batch(requests)):
+            if error is not None:
+                print(f"Failed to create event on {date}: {error}")
+                continue
+            created_events.append({
+                "event_id": event['id'],
+                "date": date.strftime("%Y-%m-%d"),
+                "time": time_str,
+                "created_at": datetime.now(timezone.utc).isoformat() + "Z"
+            })
+
         return created_events
     
     def create_event(
@@ -95,6 +227,27 @@ class GoogleCalendarManager:
         """
         単一イベントを作成
         """
+        event = self._execute(self.service.events().insert(
+            calendarId=self.calendar_id,
+            body=self._event_body(
+                summary, date, time_str, duration_minutes, description,
+                color_id=color_id, extended_props=extended_props,
+            ),
+        ))
+        
+        return event['id']
+
+    @staticmethod
+    def _event_body(
+        summary: str,
+        date: datetime,
+        time_str: str,
+        duration_minutes: int,
+        description: str = "",
+        color_id: Optional[str] = None,
+        extended_props: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """単発イベントのリクエスト本文を組み立てる"""
         # 開始時刻
         if time_str:
             hour, minute = map(int, time_str.split(':'))
@@ -124,13 +277,7 @@ class GoogleCalendarManager:
             event_body['extendedProperties'] = {
                 'private': extended_props
             }
-        
-        event = self.service.events().insert(
-            calendarId=self.calendar_id,
-            body=event_body
-        ).execute()
-        
-        return event['id']
+        return event_body
 
     def create_recurring_event(
         self,
@@ -153,53 +300,254 @@ class GoogleCalendarManager:
             event_body['colorId'] = color_id
         if extended_props:
             event_body['extendedProperties'] = {'private': extended_props}
-        event = self.service.events().insert(
+        event = self._execute(self.service.events().insert(
             calendarId=self.calendar_id,
             body=event_body
-        ).execute()
+        ))
         return event['id']
     
+    def insert_event(self, event_body: Dict[str, Any]) -> Dict[str, Any]:
+        """リクエスト本文をそのまま使ってイベントを作成する（凡例イベント等）"""
+        return self._execute(self.service.events().insert(
+            calendarId=self.calendar_id,
+            body=event_body,
+        ))
+
     def update_events(
         self,
         event_ids: List[str],
-        updated_fields: Dict[str, Any]
-    ):
+        updated_fields: Dict[str, Any],
+        etags: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Exception]:
         """
-        複数イベントを一括更新
+        複数イベントを同じ内容で一括更新（バッチリクエスト）
+
+        Args:
+            etags: イベントID → 取得済みの ETag（指定したイベントは If-Match 付きで更新）
+
+        Returns:
+            更新に失敗したイベントID → 例外（全件成功なら空）
         """
-        for event_id in event_ids:
-            try:
-                self.update_event(event_id, updated_fields)
-            except Exception as e:
-                print(f"Failed to update event {event_id}: {e}")
+        return self.patch_events([(event_id, updated_fields) for event_id in event_ids], etags=etags)
+
+    def patch_events(
+        self,
+        updates: List[Tuple[str, Dict[str, Any]]],
+        etags: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Exception]:
+        """(イベントID, 更新フィールド) の組をバッチリクエストでまとめて更新する
+
+        events.patch を使うため、指定したフィールド以外（extendedProperties.private の
+        他のキーを含む）はそのまま残る。etags に ETag があるイベントは If-Match を付け、
+        その後 Google 側で変更されていた場合（412）は更新せず失敗として返す。
+
+        Returns:
+            更新に失敗したイベントID → 例外（全件成功なら空）
+        """
+        etags = etags or {}
+        requests = [
+            self._patch_request(event_id, fields, etags.get(event_id))
+            for event_id, fields in updates
+        ]
+        failures = {}
+        for (event_id, _), (_, error) in zip(updates, self._execute_batch(requests)):
+            if error is not None:
+                print(f"Failed to update event {event_id}: {error}")
+                failures[event_id] = error
+        return failures
     
-    def update_event(self, event_id: str, updated_fields: Dict[str, Any]):
-        """単一イベントを更新"""
-        event = self.service.events().get(
-            calendarId=self.calendar_id,
-            eventId=event_id
-        ).execute()
-        
-        # フィールドを更新
-        event.update(updated_fields)
-        
-        self.service.events().update(
+    def update_event(
+        self,
+        event_id: str,
+        updated_fields: Dict[str, Any],
+        etag: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """単一イベントを更新（指定したフィールドのみ patch で書き換える）
+
+        Args:
+            etag: 取得済みのイベントの ETag。指定すると If-Match を付けて送信する
+
+        Returns:
+            更新後のイベント（etag 指定時に Google 側で先に変更されていた（412）場合は更新せず None）
+        """
+        try:
+            return self._execute(self._patch_request(event_id, updated_fields, etag))
+        except Exception as e:
+            if etag and http_status(e) == 412:
+                print(f"[calendar] event {event_id} changed since etag {etag}, skipped update")
+                return None
+            raise
+
+    def _patch_request(self, event_id: str, fields: Dict[str, Any], etag: Optional[str] = None):
+        """events.patch のリクエストを作る（etag があれば If-Match 付き）"""
+        request = self.service.events().patch(
             calendarId=self.calendar_id,
             eventId=event_id,
-            body=event
-        ).execute()
+            body=fields,
+        )
+        if etag:
+            request.headers['If-Match'] = etag
+        return request
+    
+    def delete_events(self, event_ids: List[str]) -> Dict[str, Exception]:
+        """複数イベントを一括削除（バッチリクエスト）
+
+        既に削除済み（404 / 410）のイベントは成功として扱う。
+
+        Returns:
+            削除に失敗したイベントID → 例外（全件成功なら空）
+        """
+        requests = [
+            self.service.events().delete(
+                calendarId=self.calendar_id,
+                eventId=event_id
+            )
+            for event_id in event_ids
+        ]
+        failures = {}
+        for event_id, (_, error) in zip(event_ids, self._execute_batch(requests)):
+            if error is None or http_status(error) in (404, 410):
+                continue
+            print(f"Failed to delete event {event_id}: {error}")
+            failures[event_id] = error
+        return failures
+
+    def _http(self) -> AuthorizedHttp:
+        """呼び出し元スレッド専用の認証付き HTTP 接続"""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = AuthorizedHttp(self.credentials, http=httplib2.Http())
+            self._local.http = http
+        return http
+
+    def _execute(self, request):
+        """API リクエストを実行する（rate_limiter があれば流量制限・再試行付き）"""
+        self.ensure_fresh()
+        call = functools.partial(request.execute, http=self._http())
+        if self._rate_limiter is None:
+            return call()
+        return self._rate_limiter.execute(self._rate_limit_key, call)
+
+    def _execute_batch(self, requests: List[Any]) -> List[Tuple[Optional[Any], Optional[Exception]]]:
+        """API リクエストを BATCH_MAX_REQUESTS 件ずつバッチで送信する
+
+        個々の操作の失敗は他の操作に影響しない。バッチ自体の送信に失敗した場合は
+        そのバッチで応答のなかった操作すべてに同じ例外を入れる。
+        rate_limiter があればバッチ内の件数分のトークンを取り、レート制限・一時的なエラーで
+        失敗した操作だけをバックオフ後にまとめて再送する。
+
+        Returns:
+            requests と同じ順序の (レスポンス, 例外) のリスト
+        """
+        results: List[Optional[Tuple[Optional[Any], Optional[Exception]]]] = [None] * len(requests)
+
+        def on_response(request_id, response, exception):
+            results[int(request_id)] = (response, exception)
+
+        self.ensure_fresh()
+        limiter = self._rate_limiter
+        pending = list(range(len(requests)))
+        attempt = 0
+        while pending:
+            for offset in range(0, len(pending), BATCH_MAX_REQUESTS):
+                chunk = pending[offset:offset + BATCH_MAX_REQUESTS]
+                if limiter is not None:
+                    limiter.acquire(self._rate_limit_key, len(chunk))
+                batch = self.service.new_batch_http_request(callback=on_response)
+                for i in chunk:
+                    results[i] = None
+                    batch.add(requests[i], request_id=str(i))
+                try:
+                    batch.execute(http=self._http())
+                except Exception as e:
+                    print(f"[calendar] batch request failed ({len(chunk)} operations): {e}")
+                    for i in chunk:
+                        if results[i] is None:
+                            results[i] = (None, e)
+                if limiter is not None:
+                    for i in chunk:
+                        limiter.record(error=results[i][1])
+
+            if limiter is None or attempt >= limiter.max_retries:
+                break
+            pending = [i for i in pending if results[i][1] is not None and is_retryable(results[i][1])]
+            if pending:
+                print(f"[rate_limit] retrying {len(pending)} batched operations (attempt {attempt + 1}/{limiter.max_retries})")
+                limiter.backoff(attempt, results[pending[0]][1])
+                attempt += 1
+        if limiter is not None:
+            limiter.record_failures(sum(1 for _, error in results if error is not None))
+        return results
     
-    def delete_events(self, event_ids: List[str]):
-        """複数イベントを一括削除"""
-        for event_id in event_ids:
+    def list_changed_events(
+        self,
+        sync_token: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str], bool]:
+        """events.list の syncToken を使い、前回以降に変更されたイベントを取得する
+
+        sync_token が None、または期限切れ（410 Gone）の場合はカレンダーの全イベントを取得する。
+        増分取得では削除されたイベントも status == "cancelled" として返る。
+        繰り返しイベントは展開せず、マスターイベント単位で返す（singleEvents=False）。
+
+        Args:
+            sync_token: 前回の呼び出しで返された syncToken
+
+        Returns:
+            (イベント一覧, 次回用の syncToken, 全件取得したかどうか)
+        """
+        items: List[Dict[str, Any]] = []
+        page_token = None
+        while True:
+            params: Dict[str, Any] = {'calendarId': self.calendar_id, 'maxResults': 2500}
+            if sync_token:
+                params['syncToken'] = sync_token
+            if page_token:
+                params['pageToken'] = page_token
             try:
-                self.service.events().delete(
-                    calendarId=self.calendar_id,
-                    eventId=event_id
-                ).execute()
+                response = self._execute(self.service.events().list(**params))
             except Exception as e:
-                print(f"Failed to delete event {event_id}: {e}")
-    
+                if not sync_token or http_status(e) != 410:
+                    raise
+                # syncToken が失効した → 全件取得からやり直す
+                print(f"[calendar] sync token expired for {self.calendar_id}, running full sync")
+                sync_token = None
+                page_token = None
+                items = []
+                continue
+            items.extend(response.get('items', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return items, response.get('nextSyncToken'), sync_token is None
+
+    def watch_events(self, channel_id: str, address: str, token: str, ttl_seconds: int) -> Dict[str, Any]:
+        """events.watch でカレンダーの変更通知チャネルを登録する
+
+        Args:
+            channel_id: チャネルID（通知の X-Goog-Channel-ID）
+            address: 通知を受け取る HTTPS の URL
+            token: 通知の X-Goog-Channel-Token に付く確認用トークン
+            ttl_seconds: チャネルの有効期間（秒）
+
+        Returns:
+            events.watch のレスポンス（id / resourceId / expiration）
+        """
+        return self._execute(self.service.events().watch(
+            calendarId=self.calendar_id,
+            body={
+                'id': channel_id,
+                'type': 'web_hook',
+                'address': address,
+                'token': token,
+                'params': {'ttl': str(ttl_seconds)},
+            },
+        ))
+
+    def stop_channel(self, channel_id: str, resource_id: str):
+        """登録済みの通知チャネルを停止する"""
+        self._execute(self.service.channels().stop(
+            body={'id': channel_id, 'resourceId': resource_id},
+        ))
+
     def search_events(
         self,
         start_date: datetime,
@@ -209,14 +557,14 @@ class GoogleCalendarManager:
         """
         期間内のイベントを検索
         """
-        events_result = self.service.events().list(
+        events_result = self._execute(self.service.events().list(
             calendarId=self.calendar_id,
             timeMin=start_date.isoformat() + 'Z',
             timeMax=end_date.isoformat() + 'Z',
             q=query,
             singleEvents=True,
             orderBy='startTime'
-        ).execute()
+        ))
         
         return events_result.get('items', [])
     
@@ -234,45 +582,278 @@ class GoogleCalendarManager:
         
         return None
 
-    def delete_recurring_instance(self, event_id: str, target_date: str, time_str: str):
+    @staticmethod
+    def recurring_instance_id(event_id: str, rrule: str, dtstart: str, target_date: str) -> Optional[str]:
+        """マスターイベントの RRULE と開始日時から、target_date の回のインスタンスIDを求める
+
+        Google カレンダーの繰り返しインスタンスIDは "{マスターID}_{元の開始日時(UTC)}" 形式。
+
+        Args:
+            event_id: マスターイベントID
+            rrule: マスターイベントの RRULE
+            dtstart: マスターイベントの開始日時（ISO 8601、タイムゾーンなしは日本時間）
+            target_date: 対象日 (YYYY-MM-DD)
+
+        Returns:
+            インスタンスID（target_date が発生日でない場合は None）
+
+        Raises:
+            ValueError: RRULE を解析できない場合
+        """
+        start = datetime.fromisoformat(dtstart)
+        day = datetime.strptime(target_date, "%Y-%m-%d").replace(tzinfo=start.tzinfo)
+        occurrences = RecurrenceCalculator.parse_rrule(rrule).between(
+            start, day, day + timedelta(days=1) - timedelta(microseconds=1)
+        )
+        if not occurrences:
+            return None
+        original = occurrences[0]
+        if original.tzinfo is None:
+            original = original.replace(tzinfo=RRULE_LOCAL_TZ)
+        return f"{event_id}_{original.astimezone(timezone.utc):%Y%m%dT%H%M%SZ}"
+
+    def delete_recurring_instance(
+        self,
+        event_id: str,
+        target_date: str,
+        time_str: str,
+        rrule: Optional[str] = None,
+        dtstart: Optional[str] = None,
+    ):
         """繰り返しイベントの特定回を削除する
 
+        rrule と dtstart があればインスタンスIDをローカルで求めて直接削除する
+        （instances() の呼び出しが不要）。どちらかがない旧データや、RRULE を解析できない・
+        インスタンスが見つからない（404）場合は instances() で検索する。
+
         Args:
             event_id: マスターイベントID
             target_date: 削除対象日 (YYYY-MM-DD)
             time_str: イベントの開始時刻 (HH:MM)
+            rrule: マスターイベントの RRULE（google_calendar_events に保存したもの）
+            dtstart: マスターイベントの開始日時（google_calendar_events に保存したもの）
         """
+        if rrule and dtstart:
+            try:
+                instance_id = self.recurring_instance_id(event_id, rrule, dtstart, target_date)
+            except ValueError as e:
+                print(f"[calendar] cannot evaluate rrule locally for {event_id}, using instances(): {e}")
+            else:
+                if instance_id is None:
+                    raise ValueError(f"{target_date} に該当するイベントインスタンスが見つかりません")
+                try:
+                    self._execute(self.service.events().delete(
+                        calendarId=self.calendar_id,
+                        eventId=instance_id,
+                    ))
+                    return
+                except Exception as e:
+                    if http_status(e) != 404:
+                        raise
+                    print(f"[calendar] instance {instance_id} not found, falling back to instances()")
+
         target = datetime.strptime(target_date, "%Y-%m-%d")
         time_min = datetime(target.year, target.month, target.day, 0, 0, 0).isoformat() + "+09:00"
         time_max = datetime(target.year, target.month, target.day, 23, 59, 59).isoformat() + "+09:00"
 
-        instances = self.service.events().instances(
+        instances = self._execute(self.service.events().instances(
             calendarId=self.calendar_id,
             eventId=event_id,
             timeMin=time_min,
             timeMax=time_max,
-        ).execute()
+        ))
 
         items = instances.get("items", [])
         if not items:
             raise ValueError(f"{target_date} に該当するイベントインスタンスが見つかりません")
 
         instance_id = items[0]["id"]
-        self.service.events().delete(
+        self._execute(self.service.events().delete(
             calendarId=self.calendar_id,
             eventId=instance_id,
-        ).execute()
+        ))
 
     def get_event(self, event_id: str) -> Optional[Dict[str, Any]]:
         """単一イベントを取得。存在しない場合はNoneを返す。"""
         try:
-            return self.service.events().get(
+            return self._execute(self.service.events().get(
                 calendarId=self.calendar_id,
                 eventId=event_id
-            ).execute()
-        except Exception:
-            return None
+            ))
+        except Exception as e:
+            # レート制限等の一時的なエラーを「削除済み」と誤認しないよう、404/410 以外は送出する
+            if http_status(e) in (404, 410):
+                return None
+            raise
 
     def get_color_palette(self) -> Dict[str, Any]:
         """Googleカレンダーの色パレットを取得"""
-        return self.service.colors().get().execute()
+        return self._execute(self.service.colors().get())
+
+
+class CalendarManagerPool:
+    """(guild_id, user_id) ごとに GoogleCalendarManager を使い回すプール
+
+    OAuth トークンのリフレッシュトークン・カレンダーIDが変わらない限り同じインスタンスを返し、
+    アクセストークンの更新は credentials をその場で書き換えて反映する。
+    マネージャ内の更新（google-auth による自動更新を含む）は on_token_refresh で保存され、
+    保存に失敗していたトークンは次の取得時に保存し直してから返す。
+    同じ (guild_id, user_id) への同時アクセスは1本化し、マネージャの作成とトークン更新は1回だけ行う。
+    一定時間使われなかったものと、上限を超えた分は古い順に破棄する。
+    """
+
+    def __init__(self, ttl_seconds: float = 1800, max_size: int = 256):
+        self._ttl_seconds = ttl_seconds
+        self._max_size = max_size
+        # (guild_id, user_id) -> (manager, (refresh_token, calendar_id), 最終利用時刻)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[GoogleCalendarManager, Tuple[str, str], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # (guild_id, user_id) -> マネージャの作成・トークン更新を直列化するロック
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        guild_id: str,
+        user_id: str,
+        oauth_tokens: Dict[str, Any],
+        factory: Callable[[], GoogleCalendarManager],
+    ) -> GoogleCalendarManager:
+        """プール済みのマネージャを返す（なければ factory で作成して登録する）
+
+        Args:
+            guild_id: サーバーID
+            user_id: カレンダーオーナーの Discord ユーザーID
+            oauth_tokens: Firestore に保存されている最新の OAuth トークン
+            factory: マネージャを新規作成する関数
+        """
+        key = (guild_id, user_id)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            return self._get_locked(key, oauth_tokens, factory)
+
+    def _get_locked(
+        self,
+        key: Tuple[str, str],
+        oauth_tokens: Dict[str, Any],
+        factory: Callable[[], GoogleCalendarManager],
+    ) -> GoogleCalendarManager:
+        fingerprint = (oauth_tokens.get('refresh_token', ''), oauth_tokens.get('calendar_id', 'primary'))
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired_locked(now)
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == fingerprint:
+                manager = entry[0]
+                self._entries[key] = (manager, fingerprint, now)
+                self._entries.move_to_end(key)
+            else:
+                manager = None
+
+        if manager is not None:
+            stored = oauth_tokens.get('access_token')
+            if stored != manager.credentials.token and not (
+                stored and manager.adopt_access_token(stored, oauth_tokens.get('token_expiry'))
+            ):
+                # メモリ上の方が新しい（更新後の保存に失敗した）。追い出された後に古いトークンから
+                # 作り直して再更新にならないよう、保存済みのトークンを揃えてから使う
+                manager.save_access_token()
+            manager.ensure_fresh()
+            return manager
+
+        manager = factory()
+        with self._lock:
+            self._entries[key] = (manager, fingerprint, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+        return manager
+
+    def discard(self, guild_id: str, user_id: Optional[str] = None):
+        """プールから取り除く（user_id 省略時はサーバーの全ユーザー分）"""
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] == guild_id and (user_id is None or key[1] == user_id):
+                    del self._entries[key]
+            for key in list(self._key_locks):
+                if key[0] == guild_id and (user_id is None or key[1] == user_id) and not self._key_locks[key].locked():
+                    del self._key_locks[key]
+
+    def _evict_expired_locked(self, now: float):
+        while self._entries:
+            key, (_, _, last_used) = next(iter(self._entries.items()))
+            if now - last_used <= self._ttl_seconds:
+                break
+            del self._entries[key]
+
+
+class AsyncCalendarManager:
+    """GoogleCalendarManager の非同期版（discord.py のイベントループから使う）
+
+    公開メソッドはすべて GoogleCalendarManager と同名・同引数のコルーチンで、
+    実処理は CalendarExecutor のスレッドプールで行うためイベントループをブロックしない。
+    calendar_id などの属性はそのまま参照できる。
+    """
+
+    def __init__(self, manager: GoogleCalendarManager, executor: "CalendarExecutor", owner_key: Tuple[str, str]):
+        self.sync = manager
+        self._executor = executor
+        self._owner_key = owner_key
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or name == "sync":
+            raise AttributeError(name)
+        attr = getattr(self.sync, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def _call(*args, **kwargs):
+            return await self._executor.run(self._owner_key, attr, *args, **kwargs)
+
+        # 次回以降は __getattr__ を経由しない
+        setattr(self, name, _call)
+        return _call
+
+
+class CalendarExecutor:
+    """Google API の同期呼び出しを専用のスレッドプールで実行する
+
+    Firestore 等が使う既定のスレッドプールとは分け、Google の応答が遅くても他の処理を詰まらせない。
+    同じカレンダーオーナーへの同時実行数は per_owner_limit までに制限する
+    （1人のオーナーの大量操作がプールを占有しないようにする）。
+    """
+
+    def __init__(self, max_workers: int = 8, per_owner_limit: int = 2):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="calendar")
+        self._per_owner_limit = per_owner_limit
+        # owner_key -> [セマフォ, 実行中・待機中の呼び出し数]（呼び出しがなくなったオーナーの分は消す）
+        self._semaphores: Dict[Tuple[str, str], list] = {}
+
+    def wrap(self, manager: GoogleCalendarManager, guild_id: str, user_id: str) -> AsyncCalendarManager:
+        return AsyncCalendarManager(manager, self, (guild_id, user_id))
+
+    async def run(self, owner_key: Optional[Tuple[str, str]], func: Callable, *args, **kwargs):
+        """func をスレッドプールで実行する（owner_key ごとに同時実行数を制限）"""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        if owner_key is None:
+            return await loop.run_in_executor(self._pool, call)
+        # 辞書の読み書きはイベントループのスレッドだけで行うためロックは不要
+        entry = self._semaphores.get(owner_key)
+        if entry is None:
+            entry = self._semaphores[owner_key] = [asyncio.Semaphore(self._per_owner_limit), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await loop.run_in_executor(self._pool, call)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._semaphores[owner_key]
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
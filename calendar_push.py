@@ -0,0 +1,128 @@
+import hmac
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional, Tuple
+
+# Bot が登録した通知チャネルのID接頭辞（"{接頭辞}-{guild_id}-{user_id}-{乱数}"）
+CHANNEL_ID_PREFIX = "vrccal"
+# 通知チャネルの有効期間（Google 側の上限に合わせて1週間）
+WATCH_TTL = timedelta(days=7)
+# 有効期限のこの時間前になったらチャネルを張り替える
+WATCH_RENEW_BEFORE = timedelta(days=1)
+
+
+class PushNotification(NamedTuple):
+    """Google Calendar のプッシュ通知（X-Goog-* ヘッダー）"""
+    channel_id: str
+    guild_id: str
+    user_id: str
+    token: str
+    resource_id: str
+    resource_state: str  # "sync"（登録直後の確認）/ "exists" / "not_exists"
+    message_number: Optional[int]
+
+
+def make_channel_id(guild_id: str, user_id: str) -> str:
+    """通知チャネルIDを作る（通知の受信時にサーバー・カレンダーオーナーを特定できる形式）"""
+    return f"{CHANNEL_ID_PREFIX}-{guild_id}-{user_id}-{secrets.token_hex(4)}"
+
+
+def make_channel_token() -> str:
+    """通知の送信元確認に使うトークン（チャネル登録時に渡し、通知ヘッダーで返ってくる）"""
+    return secrets.token_urlsafe(32)
+
+
+def parse_channel_id(channel_id: str) -> Optional[Tuple[str, str]]:
+    """make_channel_id の形式から (guild_id, user_id) を取り出す（形式が違えば None）"""
+    parts = channel_id.split("-")
+    if len(parts) != 4 or parts[0] != CHANNEL_ID_PREFIX or not parts[1] or not parts[2]:
+        return None
+    return parts[1], parts[2]
+
+
+def parse_notification(headers: Mapping[str, str]) -> Optional[PushNotification]:
+    """通知リクエストのヘッダーを解釈する（Bot のチャネルからの通知でなければ None）"""
+    channel_id = headers.get("X-Goog-Channel-ID") or ""
+    owner = parse_channel_id(channel_id)
+    resource_state = headers.get("X-Goog-Resource-State")
+    if owner is None or not resource_state:
+        return None
+    try:
+        message_number = int(headers.get("X-Goog-Message-Number", ""))
+    except ValueError:
+        message_number = None
+    return PushNotification(
+        channel_id=channel_id,
+        guild_id=owner[0],
+        user_id=owner[1],
+        token=headers.get("X-Goog-Channel-Token") or "",
+        resource_id=headers.get("X-Goog-Resource-ID") or "",
+        resource_state=resource_state,
+        message_number=message_number,
+    )
+
+
+def receive_notification(
+    headers: Mapping[str, str], dispatch: Callable[[PushNotification], None],
+) -> Tuple[str, int]:
+    """/calendar/notifications の処理本体（応答の本文, ステータス）を返す
+
+    Bot のチャネルからの通知でなければ 400。それ以外は dispatch に渡してすぐ 200 を返す
+    （トークンの検証は dispatch 先の Bot 側で verify_notification により行う）。
+    """
+    notification = parse_notification(headers)
+    if notification is None:
+        return 'Bad Request: not a calendar notification', 400
+    dispatch(notification)
+    return '', 200
+
+
+def notification_headers(watch: Dict[str, Any], resource_state: str = "exists", message_number: int = 1) -> Dict[str, str]:
+    """保存済みのチャネル情報から Google と同じ形式の通知ヘッダーを作る（ローカルでの動作確認用）"""
+    return {
+        "X-Goog-Channel-ID": watch["id"],
+        "X-Goog-Channel-Token": watch.get("token", ""),
+        "X-Goog-Channel-Expiration": watch.get("expiration") or "",
+        "X-Goog-Resource-ID": watch.get("resource_id", ""),
+        "X-Goog-Resource-State": resource_state,
+        "X-Goog-Message-Number": str(message_number),
+    }
+
+
+def verify_notification(notification: PushNotification, watch: Optional[Dict[str, Any]]) -> bool:
+    """保存済みのチャネル情報（oauth_tokens の calendar_watch）と通知が一致するか"""
+    if not watch or not watch.get("token"):
+        return False
+    # ヘッダーは任意の文字列を送れるため、非ASCII でも比較できるようバイト列で比べる
+    return (
+        notification.channel_id == watch.get("id")
+        and notification.resource_id == watch.get("resource_id")
+        and hmac.compare_digest(notification.token.encode("utf-8"), str(watch["token"]).encode("utf-8"))
+    )
+
+
+def watch_from_response(response: Dict[str, Any], token: str, calendar_id: str) -> Dict[str, Any]:
+    """events.watch のレスポンスから保存用のチャネル情報を作る"""
+    expiration = None
+    if response.get("expiration"):
+        # ミリ秒単位の UNIX 時刻（文字列）
+        expiration = datetime.fromtimestamp(int(response["expiration"]) / 1000, tz=timezone.utc).isoformat()
+    return {
+        "id": response["id"],
+        "resource_id": response.get("resourceId", ""),
+        "token": token,
+        "expiration": expiration,
+        "calendar_id": calendar_id,
+    }
+
+
+def needs_renewal(watch: Optional[Dict[str, Any]], calendar_id: str, now: Optional[datetime] = None) -> bool:
+    """チャネルの（再）登録が必要か（未登録・カレンダー変更・期限間近）"""
+    if not watch or watch.get("calendar_id") != calendar_id or not watch.get("expiration"):
+        return True
+    now = now or datetime.now(timezone.utc)
+    try:
+        expiration = datetime.fromisoformat(watch["expiration"])
+    except (TypeError, ValueError):
+        return True
+    return expiration - now <= WATCH_RENEW_BEFORE
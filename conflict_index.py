@@ -0,0 +1,70 @@
+import bisect
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# (開始, 終了, キー) — 開始・終了は occurrence_interval の分単位の値
+Interval = Tuple[int, int, str]
+
+
+def occurrence_interval(date_str: str, time_str: Optional[str], duration_minutes: Optional[int]) -> Optional[Tuple[int, int]]:
+    """発生日・開始時刻・所要時間から分単位の半開区間 [開始, 終了) を求める
+
+    日付をまたぐ予定も連続した値になるよう、先頭からの通し日数 × 1440 + 時刻（分）で表す。
+
+    Args:
+        date_str: 発生日 (YYYY-MM-DD)
+        time_str: 開始時刻 (HH:MM)
+        duration_minutes: 所要時間（分、未設定は60分）
+
+    Returns:
+        (開始, 終了)（時刻が未設定・不正な場合は None）
+    """
+    if not time_str:
+        return None
+    try:
+        start = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
+    except ValueError:
+        return None
+    begin = start.toordinal() * 1440 + start.hour * 60 + start.minute
+    return begin, begin + max(1, duration_minutes or 60)
+
+
+class ConflictIndex:
+    """予定の発生区間を開始順に並べた索引（予定単位で追加・削除でき、重なりを二分探索で調べる）"""
+
+    def __init__(self):
+        self._intervals: List[Interval] = []
+        self._by_key: Dict[str, List[Interval]] = {}
+        # 最長の区間の長さ（開始がこれより前の区間は検索範囲と重ならない）
+        self._max_length = 0
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._by_key
+
+    def insert(self, key: str, intervals: Iterable[Tuple[int, int]]):
+        """key の区間を登録する（登録済みの場合は置き換える）"""
+        self.remove(key)
+        items = sorted({(start, end, key) for start, end in intervals if end > start})
+        for item in items:
+            bisect.insort(self._intervals, item)
+            self._max_length = max(self._max_length, item[1] - item[0])
+        self._by_key[key] = items
+
+    def remove(self, key: str):
+        """key の区間をすべて削除する"""
+        for item in self._by_key.pop(key, []):
+            i = bisect.bisect_left(self._intervals, item)
+            if i < len(self._intervals) and self._intervals[i] == item:
+                del self._intervals[i]
+
+    def overlapping(self, start: int, end: int, exclude: Optional[str] = None) -> List[Interval]:
+        """[start, end) と重なる区間を開始順に返す（exclude のキーは除く）"""
+        lo = bisect.bisect_left(self._intervals, (start - self._max_length + 1,))
+        hi = bisect.bisect_left(self._intervals, (end,))
+        return [
+            item for item in self._intervals[lo:hi]
+            if item[1] > start and item[2] != exclude
+        ]
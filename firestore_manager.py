@@ -1,14 +1,164 @@
+import asyncio
+import bisect
+import functools
+import itertools
 import json
-from datetime import datetime, timedelta, timezone
-from typing import List, Optional, Dict
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, List, Optional, Dict, Tuple
 
 from google.cloud import firestore
 
+from conflict_index import ConflictIndex, occurrence_interval
+
+# 予定ドキュメントのスキーマバージョン
+#   1（フィールドなし）: 配列系フィールドを JSON 文字列で保存
+#   2: 配列系フィールドを Firestore の配列/マップで保存
+EVENT_SCHEMA_VERSION = 2
+EVENT_ARRAY_FIELDS = ("tags", "nth_weeks", "monthly_dates", "excluded_dates", "google_calendar_events")
+
+# 予定ごとに保持する変更履歴の上限（超過分は compact_event_history で削除）
+EVENT_HISTORY_KEEP_COUNT = 100
+
+# 発生日インデックス（guilds/{guild_id}/occurrence_index/current）に展開しておく期間（今週の月曜日から）
+OCCURRENCE_INDEX_WEEKS = 12
+
+
+def normalize_event_fields(data: dict) -> dict:
+    """旧スキーマの JSON 文字列フィールドをネイティブ型へ変換する（data を直接書き換えて返す）"""
+    for field in EVENT_ARRAY_FIELDS:
+        value = data.get(field)
+        if isinstance(value, str):
+            try:
+                data[field] = json.loads(value) if value else None
+            except json.JSONDecodeError:
+                print(f"[event_schema] invalid JSON in {field} of event {data.get('id')}: {value!r}")
+                data[field] = None
+    return data
+
+
+def _copy_event(data: dict) -> dict:
+    """キャッシュ上の予定を呼び出し側へ渡すためのコピー（配列フィールドも複製する）"""
+    event = dict(data)
+    for field in EVENT_ARRAY_FIELDS:
+        value = event.get(field)
+        if isinstance(value, list):
+            event[field] = [dict(v) if isinstance(v, dict) else v for v in value]
+    return event
+
+
+def _projection_fields(fields: List[str], required: tuple) -> List[str]:
+    """select() に渡すフィールド一覧（required を先頭に、重複を除いて並べる）"""
+    return list(dict.fromkeys([*required, *fields]))
+
+
+def _recurrence_phase(event: dict) -> Optional[str]:
+    """隔週の予定が何週目に当たるかを決める基準日（ISO形式）を返す。隔週以外は None
+
+    Google カレンダーに登録済みなら DTSTART の日付（google_calendar_events[].dtstart）を使う。
+    未登録なら登録時と同じく、作成日（なければ今日）以降で最初の該当曜日を基準にする。
+    """
+    if event.get("recurrence") != "biweekly":
+        return None
+    for ge in event.get("google_calendar_events") or []:
+        if isinstance(ge, dict) and ge.get("dtstart"):
+            return str(ge["dtstart"])[:10]
+
+    created = None
+    created_at = event.get("created_at")
+    if created_at:
+        try:
+            created = datetime.fromisoformat(str(created_at))
+        except ValueError:
+            created = None
+    if created is None:
+        day = datetime.now().date()
+    elif created.tzinfo is not None:
+        # 登録時の「今日」はサーバーのローカル時刻で決まるので合わせる
+        day = created.astimezone().date()
+    else:
+        day = created.date()
+    weekday = event.get("weekday")
+    if weekday is not None:
+        day += timedelta(days=(weekday - day.weekday()) % 7)
+    return day.isoformat()
+
+
+def _occurrence_signature(event: dict) -> dict:
+    """発生日の計算に影響するフィールド（インデックスのエントリと比べて再展開の要否を判定する）"""
+    return {
+        "recurrence": event.get("recurrence"),
+        "weekday": event.get("weekday"),
+        "phase": _recurrence_phase(event),
+        "nth_weeks": list(event.get("nth_weeks") or []),
+        "monthly_dates": list(event.get("monthly_dates") or []),
+        "excluded_dates": sorted(event.get("excluded_dates") or []),
+        "time": event.get("time"),
+        "duration_minutes": event.get("duration_minutes"),
+    }
+
+
+def _occurrence_field(event_id: str) -> str:
+    """occurrence_index ドキュメント内の予定エントリのフィールドパス（数字始まりのためバッククォートで囲む）"""
+    return f"events.`{event_id}`"
+
 
 class FirestoreManager:
-    def __init__(self, project_id: str = None):
+    def __init__(
+        self,
+        project_id: str = None,
+        event_cache_size: int = 200,
+        use_snapshot_listeners: bool = True,
+        event_path_index_size: int = 10000,
+        id_block_size: int = 50,
+        legacy_event_fields: bool = True,
+        occurrence_index_weeks: int = OCCURRENCE_INDEX_WEEKS,
+    ):
+        """
+        Args:
+            project_id: GCP プロジェクトID
+            event_cache_size: アクティブ予定をメモリに保持するサーバー数の上限（LRUで追い出し）
+            use_snapshot_listeners: True の場合、キャッシュ中のサーバーに on_snapshot リスナーを張って
+                他プロセスからの変更も反映する（False の場合は自プロセスの書き込みのみ反映）
+            event_path_index_size: event_id → ドキュメントパスの索引に保持する件数の上限
+            id_block_size: _next_id が counters から一度に払い出しを受けるIDの件数
+            legacy_event_fields: schema_version 1 の予定が残っている前提で検索する
+                （scripts/migrate_event_fields.py による移行完了後は False にする）
+            occurrence_index_weeks: 発生日インデックスに展開しておく週数（0 で無効）
+        """
         self.db = firestore.Client(project=project_id)
 
+        # guild_id -> {event_id: event_dict}（アクティブ予定のみ）
+        self._event_cache: "OrderedDict[str, Dict[int, dict]]" = OrderedDict()
+        self._event_watches: Dict[str, Any] = {}
+        self._event_cache_size = event_cache_size
+        self._use_snapshot_listeners = use_snapshot_listeners
+        # on_snapshot のコールバックは別スレッドで呼ばれるため threading のロックで保護する
+        self._event_cache_lock = threading.RLock()
+
+        # event_id -> "guilds/{guild_id}/events/{id}"（guild_id を持たない呼び出し元向け）
+        self._event_path_index: "OrderedDict[int, str]" = OrderedDict()
+        self._event_path_index_size = event_path_index_size
+
+        # counter_name -> [次に払い出すID, 払い出し済みブロックの最終ID]
+        self._id_blocks: Dict[str, List[int]] = {}
+        self._id_block_size = max(1, id_block_size)
+        self._id_lock = threading.Lock()
+
+        self._legacy_event_fields = legacy_event_fields
+
+        # guild_id -> {"horizon_start", "horizon_end", "events": {event_id(str): エントリ}}
+        # （_event_cache_lock で保護し、エントリは差し替えのみで書き換えない）
+        self._occurrence_index: Dict[str, dict] = {}
+        self._occurrence_index_weeks = max(0, occurrence_index_weeks)
+        # guild_id -> {"index": ConflictIndex, "entries": 索引に登録済みのエントリ,
+        #              "generation": 索引を合わせた時点の予定キャッシュの世代, "horizon": 期間の開始日}
+        self._conflict_indexes: Dict[str, dict] = {}
+        # guild_id -> 予定キャッシュの世代（キャッシュが変わるたびに全体で単調増加する値を振り直す）
+        self._event_cache_generations: Dict[str, int] = {}
+        self._generation_counter = itertools.count(1)
+
     # ---- helpers ----
 
     def _guild_ref(self, guild_id: str):
@@ -16,7 +166,22 @@ class FirestoreManager:
         return self.db.collection("guilds").document(guild_id)
 
     def _next_id(self, counter_name: str) -> int:
-        """トランザクションベースのID自動採番"""
+        """ID自動採番（ブロック単位で確保したIDをプロセス内で順に払い出す）
+
+        IDは全プロセスで一意だが、プロセスごとにブロックを持つため連番にはならない。
+        """
+        with self._id_lock:
+            block = self._id_blocks.get(counter_name)
+            if block is None or block[0] > block[1]:
+                start, end = self._lease_id_block(counter_name, self._id_block_size)
+                block = [start, end]
+                self._id_blocks[counter_name] = block
+            new_id = block[0]
+            block[0] += 1
+            return new_id
+
+    def _lease_id_block(self, counter_name: str, size: int) -> Tuple[int, int]:
+        """トランザクションで counters/{name} を size 進め、確保した範囲 (start, end) を返す"""
         counter_ref = self.db.collection("counters").document(counter_name)
 
         @firestore.transactional
@@ -26,14 +191,32 @@ class FirestoreManager:
                 current = snapshot.get("current")
             else:
                 current = 0
-            new_val = current + 1
+            new_val = current + size
             transaction.set(counter_ref, {"current": new_val})
-            return new_val
+            return current + 1, new_val
 
         return _increment(self.db.transaction())
 
-    def _find_event_ref(self, event_id: int):
-        """collection_group('events') で event_id からドキュメント参照を検索"""
+    def _event_ref(self, guild_id: str, event_id: int):
+        """guilds/{guild_id}/events/{event_id} への参照"""
+        return self._guild_ref(guild_id).collection("events").document(str(event_id))
+
+    def _find_event_ref(self, event_id: int, guild_id: Optional[str] = None):
+        """event_id からドキュメント参照を取得
+
+        guild_id が分かっていればパスを直接組み立てる（クエリなし）。
+        不明な場合は索引を引き、索引にもなければ collection_group('events') で検索する。
+        """
+        if guild_id:
+            return self._event_ref(guild_id, event_id)
+
+        with self._event_cache_lock:
+            path = self._event_path_index.get(event_id)
+            if path:
+                self._event_path_index.move_to_end(event_id)
+        if path:
+            return self.db.document(path)
+
         docs = (
             self.db.collection_group("events")
             .where(filter=firestore.FieldFilter("id", "==", event_id))
@@ -42,9 +225,39 @@ class FirestoreManager:
             .get()
         )
         for doc in docs:
+            with self._event_cache_lock:
+                self._remember_event_path_locked(event_id, doc.reference.path)
             return doc.reference
         return None
 
+    def _find_active_event(self, event_id: int, guild_id: Optional[str] = None) -> Tuple[Any, Optional[dict]]:
+        """アクティブな予定のドキュメント参照と内容（存在しない・論理削除済みなら (None, None)）
+
+        キャッシュ済みのサーバーはキャッシュで判定し、それ以外はドキュメントを1件読む。
+        """
+        ref = self._find_event_ref(event_id, guild_id)
+        if ref is None:
+            return None, None
+        parts = ref.path.split("/")
+        if len(parts) == 4 and parts[0] == "guilds":
+            with self._event_cache_lock:
+                events = self._event_cache.get(parts[1])
+                if events is not None:
+                    cached = events.get(event_id)
+                    return (ref, _copy_event(cached)) if cached is not None else (None, None)
+        doc = ref.get()
+        data = doc.to_dict() if doc.exists else None
+        if not data or not data.get("is_active"):
+            return None, None
+        return ref, normalize_event_fields(data)
+
+    def _remember_event_path_locked(self, event_id: int, path: str):
+        """event_id → パスを索引に登録（ロック取得済み前提）"""
+        self._event_path_index[event_id] = path
+        self._event_path_index.move_to_end(event_id)
+        while len(self._event_path_index) > self._event_path_index_size:
+            self._event_path_index.popitem(last=False)
+
     # ---- イベント管理 ----
 
     def add_event(
@@ -67,8 +280,9 @@ class FirestoreManager:
         created_by: str = "",
         calendar_owner: str = "",
         monthly_dates: Optional[List[int]] = None,
+        uow: Optional["EventUnitOfWork"] = None,
     ) -> int:
-        """予定を追加"""
+        """予定を追加（uow を渡すと書き込みは uow.commit() まで保留される）"""
         event_id = self._next_id("events")
         now = datetime.now(timezone.utc).isoformat()
 
@@ -76,10 +290,10 @@ class FirestoreManager:
             "id": event_id,
             "guild_id": guild_id,
             "event_name": event_name,
-            "tags": json.dumps(tags, ensure_ascii=False),
+            "tags": list(tags),
             "recurrence": recurrence,
-            "nth_weeks": json.dumps(nth_weeks) if nth_weeks else None,
-            "monthly_dates": json.dumps(monthly_dates) if monthly_dates else None,
+            "nth_weeks": list(nth_weeks) if nth_weeks else None,
+            "monthly_dates": list(monthly_dates) if monthly_dates else None,
             "event_type": event_type,
             "time": time,
             "weekday": weekday,
@@ -96,19 +310,44 @@ class FirestoreManager:
             "created_at": now,
             "updated_at": now,
             "is_active": True,
+            "schema_version": EVENT_SCHEMA_VERSION,
         }
 
-        self._guild_ref(guild_id).collection("events").document(str(event_id)).set(data)
+        ref = self._event_ref(guild_id, event_id)
+        if uow is not None:
+            uow._queue_new_event(ref, guild_id, data)
+            return event_id
+        ref.set(data)
+        with self._event_cache_lock:
+            self._remember_event_path_locked(event_id, ref.path)
+        self._cache_put_event(guild_id, data)
         return event_id
 
-    def update_google_calendar_events(self, event_id: int, google_events: List[dict]):
-        """Google カレンダーイベント情報を更新"""
-        ref = self._find_event_ref(event_id)
+    def update_google_calendar_events(
+        self,
+        event_id: int,
+        google_events: List[dict],
+        guild_id: Optional[str] = None,
+        uow: Optional["EventUnitOfWork"] = None,
+        touch_updated_at: bool = True,
+    ):
+        """Google カレンダーイベント情報を更新
+
+        touch_updated_at=False なら updated_at を変えない（同期が指紋だけを保存する場合。
+        増分同期は updated_at で照合対象を選ぶため、進めると毎回照合し直すことになる）。
+        """
+        fs_updates: Dict[str, Any] = {"google_calendar_events": google_events}
+        if touch_updated_at:
+            fs_updates["updated_at"] = datetime.now(timezone.utc).isoformat()
+        if uow is not None and uow._merge_into_new_event(event_id, fs_updates):
+            return
+        ref, _ = self._find_active_event(event_id, guild_id)
         if ref:
-            ref.update({
-                "google_calendar_events": json.dumps(google_events, ensure_ascii=False),
-                "updated_at": datetime.now(timezone.utc).isoformat(),
-            })
+            if uow is not None:
+                uow._queue_update(ref, fs_updates)
+                return
+            ref.update(fs_updates)
+            self._cache_apply_updates(ref, fs_updates)
 
     def get_this_week_events(self, guild_id: Optional[str] = None) -> List[dict]:
         """今週の予定を取得"""
@@ -135,54 +374,55 @@ class FirestoreManager:
 
         events = self._get_active_events(guild_id)
 
+        start_str = start_date.date().isoformat()
+        end_str = end_date.date().isoformat()
+        irregular_occurrences = {}
+        if any(e.get("recurrence", "") == "irregular" for e in events):
+            irregular_occurrences = self._get_irregular_occurrences(start_str, end_str, guild_id)
+
+        recurring = [e for e in events if e.get("recurrence", "") != "irregular"]
+        recurring_dates: Dict[int, List[str]] = {}
+        if guild_id and self._in_occurrence_horizon(start_date.date(), end_date.date()):
+            # 発生日インデックスの範囲内なら展開せずに引くだけ
+            entries = self._occurrence_entries(guild_id, events)
+            for event in recurring:
+                dates = entries[str(event["id"])]["dates"]
+                lo = bisect.bisect_left(dates, start_str)
+                hi = bisect.bisect_right(dates, end_str)
+                recurring_dates[id(event)] = dates[lo:hi]
+        else:
+            # 定期予定の発生日は同じ月表・同じパターンを共有して一括展開する（隔週の位相はインデックスと同じ規則）
+            expanded = RecurrenceCalculator.expand_events(
+                [_occurrence_signature(e) for e in recurring], start_date, end_date
+            )
+            for event, dates in zip(recurring, expanded):
+                # excluded_dates を除外
+                excluded = event.get("excluded_dates") or []
+                recurring_dates[id(event)] = [
+                    d.strftime("%Y-%m-%d") for d in dates
+                    if d.strftime("%Y-%m-%d") not in excluded
+                    and start_date.date() <= d.date() <= end_date.date()
+                ]
+
         result = []
         for event in events:
             if event.get("recurrence", "") == "irregular":
-                # 不定期予定は個別サブコレクションから取得
-                irr_ref = (
-                    self._guild_ref(event["guild_id"])
-                    .collection("irregular_events")
-                )
-                irr_docs = irr_ref.where(
-                    filter=firestore.FieldFilter("event_id", "==", event["id"])
-                ).get()
-
-                for irr_doc in irr_docs:
-                    irr = irr_doc.to_dict()
-                    irr_date = irr["event_date"]
-                    if start_date.date().isoformat() <= irr_date <= end_date.date().isoformat():
-                        result.append({
-                            **event,
-                            "date": irr["event_date"],
-                            "time": irr["event_time"],
-                        })
+                key = (str(event.get("guild_id")), event["id"])
+                for irr in irregular_occurrences.get(key, []):
+                    result.append({
+                        **event,
+                        "date": irr["event_date"],
+                        "time": irr["event_time"],
+                    })
             else:
-                monthly_dates_raw = event.get("monthly_dates")
-                monthly_dates = json.loads(monthly_dates_raw) if monthly_dates_raw else None
-                dates = RecurrenceCalculator.calculate_dates(
-                    recurrence=event["recurrence"],
-                    nth_weeks=json.loads(event.get("nth_weeks")) if event.get("nth_weeks") else None,
-                    weekday=event.get("weekday"),
-                    start_date=start_date,
-                    months_ahead=0,
-                    end_date_limit=end_date,
-                    monthly_dates=monthly_dates,
-                )
-                # excluded_dates を除外
-                excluded_raw = event.get("excluded_dates")
-                excluded = json.loads(excluded_raw) if excluded_raw else []
-                for date in dates:
-                    date_str = date.strftime("%Y-%m-%d")
-                    if date_str in excluded:
-                        continue
-                    if start_date.date() <= date.date() <= end_date.date():
-                        result.append({**event, "date": date_str})
+                for date_str in recurring_dates[id(event)]:
+                    result.append({**event, "date": date_str})
 
         # フィルタリング
         if tags:
             result = [
                 e for e in result
-                if any(tag in json.loads(e["tags"]) for tag in tags)
+                if any(tag in (e.get("tags") or []) for tag in tags)
             ]
         if event_name:
             result = [
@@ -192,6 +432,28 @@ class FirestoreManager:
 
         return sorted(result, key=lambda x: (x["date"], x["time"] or ""))
 
+    def _get_irregular_occurrences(
+        self, start_str: str, end_str: str, guild_id: Optional[str] = None,
+    ) -> Dict[tuple, List[dict]]:
+        """期間内の不定期予定の日時を1クエリで取得し (guild_id, event_id) ごとにまとめる"""
+        if guild_id:
+            query = self._guild_ref(guild_id).collection("irregular_events")
+        else:
+            query = self.db.collection_group("irregular_events")
+        docs = (
+            query.where(filter=firestore.FieldFilter("event_date", ">=", start_str))
+            .where(filter=firestore.FieldFilter("event_date", "<=", end_str))
+            .get()
+        )
+
+        occurrences: Dict[tuple, List[dict]] = {}
+        for doc in docs:
+            irr = doc.to_dict()
+            # guilds/{guild_id}/irregular_events/{doc_id}
+            irr_guild_id = doc.reference.path.split("/")[1]
+            occurrences.setdefault((irr_guild_id, irr.get("event_id")), []).append(irr)
+        return occurrences
+
     def search_events_by_name(self, name: str, guild_id: Optional[str] = None) -> List[dict]:
         """予定名で検索（LIKE相当 — 全件取得後Pythonでフィルタ）"""
         events = self._get_active_events(guild_id)
@@ -200,62 +462,71 @@ class FirestoreManager:
         lower_name = name.lower()
         return [e for e in events if lower_name in e["event_name"].lower()]
 
-    def update_event(self, event_id: int, updates: dict):
-        """予定を更新"""
-        ref = self._find_event_ref(event_id)
+    def update_event(self, event_id: int, updates: dict, guild_id: Optional[str] = None):
+        """予定を更新（guild_id を渡すと検索クエリを省略できる）"""
+        ref, _ = self._find_active_event(event_id, guild_id)
         if not ref:
             return
 
-        fs_updates = {}
-        for key, value in updates.items():
-            if isinstance(value, (list, dict)):
-                fs_updates[key] = json.dumps(value, ensure_ascii=False)
-            else:
-                fs_updates[key] = value
+        fs_updates = dict(updates)
         fs_updates["updated_at"] = datetime.now(timezone.utc).isoformat()
         ref.update(fs_updates)
+        self._cache_apply_updates(ref, fs_updates)
 
-    def add_excluded_date(self, event_id: int, date_str: str):
+    def add_excluded_date(self, event_id: int, date_str: str, guild_id: Optional[str] = None):
         """除外日を追加"""
-        ref = self._find_event_ref(event_id)
+        ref, doc = self._find_active_event(event_id, guild_id)
         if not ref:
             return
-        doc = ref.get().to_dict()
-        excluded = json.loads(doc.get("excluded_dates", "[]"))
+        excluded = doc.get("excluded_dates") or []
         if date_str not in excluded:
             excluded.append(date_str)
             excluded.sort()
-            ref.update({
-                "excluded_dates": json.dumps(excluded),
+            fs_updates = {
+                "excluded_dates": excluded,
                 "updated_at": datetime.now(timezone.utc).isoformat(),
-            })
+            }
+            ref.update(fs_updates)
+            self._cache_apply_updates(ref, fs_updates)
 
-    def remove_excluded_date(self, event_id: int, date_str: str):
+    def remove_excluded_date(self, event_id: int, date_str: str, guild_id: Optional[str] = None):
         """除外日を削除"""
-        ref = self._find_event_ref(event_id)
+        ref, doc = self._find_active_event(event_id, guild_id)
         if not ref:
             return
-        doc = ref.get().to_dict()
-        excluded = json.loads(doc.get("excluded_dates", "[]"))
+        excluded = doc.get("excluded_dates") or []
         if date_str in excluded:
             excluded.remove(date_str)
-            ref.update({
-                "excluded_dates": json.dumps(excluded),
+            fs_updates = {
+                "excluded_dates": excluded,
                 "updated_at": datetime.now(timezone.utc).isoformat(),
-            })
+            }
+            ref.update(fs_updates)
+            self._cache_apply_updates(ref, fs_updates)
 
-    def delete_event(self, event_id: int):
+    def delete_event(self, event_id: int, guild_id: Optional[str] = None):
         """予定を削除（論理削除）"""
-        ref = self._find_event_ref(event_id)
+        ref, _ = self._find_active_event(event_id, guild_id)
         if ref:
-            ref.update({
+            fs_updates = {
                 "is_active": False,
                 "updated_at": datetime.now(timezone.utc).isoformat(),
-            })
+            }
+            ref.update(fs_updates)
+            self._cache_apply_updates(ref, fs_updates)
 
-    def get_all_active_events(self, guild_id: Optional[str] = None) -> List[dict]:
-        """全てのアクティブな予定を取得"""
-        events = self._get_active_events(guild_id)
+    def get_all_active_events(
+        self, guild_id: Optional[str] = None, fields: Optional[List[str]] = None,
+    ) -> List[dict]:
+        """全てのアクティブな予定を取得
+
+        fields を指定すると各予定をそのフィールド（と id, created_at）だけに絞って返す。
+        キャッシュ未ロードのサーバーでは select() で必要なフィールドだけを読み込む。
+        """
+        if fields is None:
+            events = self._get_active_events(guild_id)
+        else:
+            events = self._get_active_events_projected(guild_id, fields)
         return sorted(events, key=lambda x: x.get("created_at", ""), reverse=True)
 
     def get_events_by_color_name(self, guild_id: str, color_name: str) -> List[dict]:
@@ -264,14 +535,24 @@ class FirestoreManager:
         return [e for e in events if e.get("color_name") == color_name]
 
     def get_events_by_tag(self, guild_id: str, tag_name: str) -> List[dict]:
-        """指定タグを含むアクティブ予定を取得"""
-        events = self._get_active_events(guild_id)
-        result = []
-        for e in events:
-            tags = json.loads(e.get("tags") or "[]")
-            if tag_name in tags:
-                result.append(e)
-        return result
+        """指定タグを含むアクティブ予定を取得（キャッシュ未ロード時は array_contains クエリ）"""
+        with self._event_cache_lock:
+            cached = guild_id in self._event_cache
+        if cached or self._legacy_event_fields:
+            # 旧スキーマの予定は tags が文字列のためクエリに掛からない → 全件から絞り込む
+            events = self._get_active_events(guild_id)
+            return [e for e in events if tag_name in (e.get("tags") or [])]
+
+        docs = (
+            self._active_events_query(guild_id)
+            .where(filter=firestore.FieldFilter("tags", "array_contains", tag_name))
+            .get()
+        )
+        return [normalize_event_fields(doc.to_dict()) for doc in docs]
+
+    def unit_of_work(self) -> "EventUnitOfWork":
+        """書き込みをまとめて1回の WriteBatch でコミットする EventUnitOfWork を作る"""
+        return EventUnitOfWork(self)
 
     # ---- 設定 ----
 
@@ -319,6 +600,7 @@ class FirestoreManager:
         if is_auto_generated:
             data["is_auto_generated"] = True
         self._color_presets_ref(guild_id, user_id).document(name).set(data)
+        self._touch_guild_config(guild_id)
 
     def list_color_presets(self, guild_id: str, user_id: str) -> List[dict]:
         """色プリセット一覧（カレンダー単位）"""
@@ -365,6 +647,7 @@ class FirestoreManager:
                 "is_auto_generated": True,
             })
         batch.commit()
+        self._touch_guild_config(guild_id)
 
         # セットアップ完了フラグを設定
         self.mark_color_setup_done(guild_id, user_id)
@@ -386,6 +669,7 @@ class FirestoreManager:
     def delete_color_preset(self, guild_id: str, user_id: str, name: str):
         """色プリセットを削除（カレンダー単位）"""
         self._color_presets_ref(guild_id, user_id).document(name).delete()
+        self._touch_guild_config(guild_id)
 
     def list_all_color_presets_by_calendar(self, guild_id: str) -> Dict[str, List[dict]]:
         """全カレンダーの色プリセットをdict形式で返す（NLPコンテキスト用）
@@ -433,19 +717,17 @@ class FirestoreManager:
 
         # マイグレーション完了フラグ
         self._guild_ref(guild_id).set({"color_presets_migrated": True}, merge=True)
+        self._touch_guild_config(guild_id)
         print(f"Guild {guild_id}: migrated {len(old_presets)} color presets to {len(all_tokens)} calendars")
 
     # ---- タググループ / タグ ----
 
-    def list_tag_groups(self, guild_id: str) -> List[dict]:
-        """タググループ一覧"""
-        docs = (
-            self._guild_ref(guild_id)
-            .collection("tag_groups")
-            .order_by("id")
-            .get()
-        )
-        return [doc.to_dict() for doc in docs]
+    def list_tag_groups(self, guild_id: str, fields: Optional[List[str]] = None) -> List[dict]:
+        """タググループ一覧（fields 指定時はそのフィールドだけを取得）"""
+        query = self._guild_ref(guild_id).collection("tag_groups").order_by("id")
+        if fields is not None:
+            query = query.select(_projection_fields(fields, ("id",)))
+        return [doc.to_dict() for doc in query.get()]
 
     def add_tag_group(self, guild_id: str, name: str, description: str = "") -> int:
         """タググループを追加（最大3つ）"""
@@ -461,6 +743,7 @@ class FirestoreManager:
             "description": description,
         }
         self._guild_ref(guild_id).collection("tag_groups").document(str(group_id)).set(data)
+        self._touch_guild_config(guild_id)
         return group_id
 
     def update_tag_group(
@@ -480,6 +763,7 @@ class FirestoreManager:
         doc = ref.get()
         if doc.exists:
             ref.update(updates)
+            self._touch_guild_config(guild_id)
 
     def update_tags_group_name(self, guild_id: str, group_id: int, new_name: str):
         """グループ内の全タグの group_name を更新"""
@@ -492,6 +776,7 @@ class FirestoreManager:
         for doc in docs:
             batch.update(doc.reference, {"group_name": new_name})
         batch.commit()
+        self._touch_guild_config(guild_id)
 
     def delete_tag_group(self, guild_id: str, group_id: int):
         """タググループを削除（タグもカスケード削除）"""
@@ -511,6 +796,7 @@ class FirestoreManager:
         group_ref = guild_ref.collection("tag_groups").document(str(group_id))
         batch.delete(group_ref)
         batch.commit()
+        self._touch_guild_config(guild_id)
 
     def get_tag_group(self, guild_id: str, group_id: int) -> Optional[dict]:
         """タググループを取得"""
@@ -538,6 +824,7 @@ class FirestoreManager:
             "description": description,
         }
         self._guild_ref(guild_id).collection("tags").document(str(tag_id)).set(data)
+        self._touch_guild_config(guild_id)
 
     def delete_tag(self, guild_id: str, group_id: int, name: str):
         """タグを削除"""
@@ -554,6 +841,7 @@ class FirestoreManager:
         )
         for doc in docs:
             doc.reference.delete()
+        self._touch_guild_config(guild_id)
 
     def list_tags(self, guild_id: str) -> List[dict]:
         """タグ一覧"""
@@ -588,6 +876,67 @@ class FirestoreManager:
         existing_names = {t["name"] for t in all_tags}
         return [t for t in tags if t not in existing_names]
 
+    # ---- サーバー設定スナップショット ----
+
+    def get_guild_config(self, guild_id: str) -> Dict[str, Any]:
+        """タググループ・タグ・カレンダーごとの色プリセット・カレンダー表示情報をまとめて取得
+
+        通常は guilds/{guild_id} に保持したスナップショット1件の読み取りで済む。
+        config_version と一致しない（設定変更後に再構築されていない）場合はその場で作り直す。
+        """
+        guild_doc = self._guild_ref(guild_id).get()
+        guild_data = guild_doc.to_dict() if guild_doc.exists else {}
+        version = guild_data.get("config_version", 0)
+        snapshot = guild_data.get("config_snapshot")
+        if snapshot and snapshot.get("version") == version:
+            return snapshot
+        return self._rebuild_guild_config(guild_id, version)
+
+    def _touch_guild_config(self, guild_id: str):
+        """設定変更時に config_version を進める
+
+        スナップショットは次回の get_guild_config で version 不一致として作り直す
+        （一括操作で変更のたびに全コレクションを読み直さないため）。
+        """
+        try:
+            self._guild_ref(guild_id).set({"config_version": firestore.Increment(1)}, merge=True)
+        except Exception as e:
+            print(f"[guild_config] failed to bump config_version for guild {guild_id}: {e}")
+
+    def _rebuild_guild_config(self, guild_id: str, version: int) -> Dict[str, Any]:
+        """各コレクションからスナップショットを組み立てて保存する
+
+        version は組み立て前に読んだ config_version。組み立て中に設定が変わった場合は
+        保存したスナップショットの version が古くなり、次回の読み取りで再構築される。
+        """
+        color_presets_by_calendar: Dict[str, List[dict]] = {}
+        calendars = []
+        for token in self.get_all_oauth_tokens(guild_id):
+            user_id = token.get("_doc_id") or token.get("authenticated_by", "")
+            display_name = token.get("display_name") or f"<@{token.get('authenticated_by', '?')}>"
+            # トークン類はスナップショットに含めない
+            calendars.append({
+                "user_id": user_id,
+                "display_name": display_name,
+                "description": token.get("description", ""),
+                "is_default": token.get("is_default", False),
+            })
+            if user_id:
+                preset_name = token.get("display_name") or f"<@{user_id}>"
+                color_presets_by_calendar[preset_name] = self.list_color_presets(guild_id, user_id)
+
+        snapshot = {
+            "version": version,
+            "tag_groups": self.list_tag_groups(guild_id),
+            "tags": self.list_tags(guild_id),
+            "color_presets_by_calendar": color_presets_by_calendar,
+            "calendars": calendars,
+            "built_at": datetime.now(timezone.utc).isoformat(),
+        }
+        # merge=True だとマップが深くマージされ削除済みカレンダー等が残るため、フィールド単位で置き換える
+        self._guild_ref(guild_id).set({"config_snapshot": snapshot}, merge=["config_snapshot"])
+        return snapshot
+
     # ---- OAuth トークン管理 ----
 
     def save_oauth_tokens(
@@ -626,6 +975,7 @@ class FirestoreManager:
             data["is_default"] = len(all_tokens) == 0  # 最初のカレンダーならデフォルト
             data["color_setup_done"] = False  # 色初期設定は未完了
             doc_ref.set(data)
+            self._touch_guild_config(guild_id)
 
     def get_oauth_tokens(self, guild_id: str, user_id: str) -> Optional[dict]:
         """OAuth トークンを取得（ユーザーID指定）"""
@@ -646,6 +996,7 @@ class FirestoreManager:
                 data.setdefault("is_default", True)
                 self._guild_ref(guild_id).collection("oauth_tokens").document(user_id).set(data)
                 legacy.reference.delete()
+                self._touch_guild_config(guild_id)
                 data["_doc_id"] = user_id
                 return data
         return None
@@ -694,6 +1045,7 @@ class FirestoreManager:
                     d.reference.update({"is_default": False})
         if updates:
             doc_ref.update(updates)
+            self._touch_guild_config(guild_id)
 
     def update_oauth_access_token(self, guild_id: str, user_id: str, access_token: str, token_expiry: str):
         """リフレッシュ後のアクセストークンを更新"""
@@ -708,9 +1060,34 @@ class FirestoreManager:
             "calendar_id": calendar_id,
         })
 
+    def update_calendar_sync_state(self, guild_id: str, user_id: str, state: Dict[str, Any]):
+        """カレンダーの増分同期の状態（syncToken・同期時刻など）を保存する
+
+        設定変更ではないため config_version は進めない。
+        """
+        self._guild_ref(guild_id).collection("oauth_tokens").document(user_id).update({
+            "calendar_sync": state,
+        })
+
+    def update_calendar_watch(self, guild_id: str, user_id: str, watch: Optional[Dict[str, Any]]):
+        """カレンダーの変更通知チャネル（ID・確認用トークン・有効期限など）を保存する（None で削除）"""
+        self._guild_ref(guild_id).collection("oauth_tokens").document(user_id).update({
+            "calendar_watch": watch if watch is not None else firestore.DELETE_FIELD,
+        })
+
+    def update_calendar_legends(self, guild_id: str, user_id: str, legends: Dict[str, Any]):
+        """凡例イベントの状態（種類ごとのイベントID・内容ハッシュ、旧凡例の移行済みフラグ）を保存する
+
+        legends のキーごとに calendar_legends.{キー} を置き換える（他の種類はそのまま）。
+        """
+        self._guild_ref(guild_id).collection("oauth_tokens").document(user_id).update({
+            f"calendar_legends.{key}": value for key, value in legends.items()
+        })
+
     def delete_oauth_tokens(self, guild_id: str, user_id: str):
         """OAuth トークンを削除（認証解除）"""
         self._guild_ref(guild_id).collection("oauth_tokens").document(user_id).delete()
+        self._touch_guild_config(guild_id)
 
     def save_oauth_state(self, state: str, guild_id: str, user_id: str):
         """CSRF state を保存"""
@@ -831,21 +1208,476 @@ class FirestoreManager:
     # ---- private helpers ----
 
     def _get_active_events(self, guild_id: Optional[str] = None) -> List[dict]:
-        """アクティブなイベントを取得"""
-        if guild_id:
+        """アクティブなイベントを取得（guild_id 指定時はキャッシュ経由）"""
+        if not guild_id:
             docs = (
-                self._guild_ref(guild_id)
-                .collection("events")
+                self.db.collection_group("events")
                 .where(filter=firestore.FieldFilter("is_active", "==", True))
                 .get()
             )
+            return [normalize_event_fields(doc.to_dict()) for doc in docs]
+
+        with self._event_cache_lock:
+            events = self._event_cache.get(guild_id)
+            if events is not None:
+                self._event_cache.move_to_end(guild_id)
+                # 呼び出し側での変更がキャッシュに波及しないようコピーを返す
+                return [_copy_event(e) for e in events.values()]
+
+        events = self._load_guild_events(guild_id)
+        return [_copy_event(e) for e in events.values()]
+
+    def _get_active_events_projected(self, guild_id: Optional[str], fields: List[str]) -> List[dict]:
+        """フィールドを絞ったアクティブ予定（部分ドキュメントはキャッシュに載せない）"""
+        field_paths = _projection_fields(fields, ("id", "created_at"))
+        if guild_id:
+            with self._event_cache_lock:
+                events = self._event_cache.get(guild_id)
+                if events is not None:
+                    self._event_cache.move_to_end(guild_id)
+                    return [
+                        _copy_event({k: e[k] for k in field_paths if k in e})
+                        for e in events.values()
+                    ]
+            query = self._active_events_query(guild_id)
         else:
-            docs = (
-                self.db.collection_group("events")
-                .where(filter=firestore.FieldFilter("is_active", "==", True))
-                .get()
+            query = self.db.collection_group("events").where(
+                filter=firestore.FieldFilter("is_active", "==", True)
             )
-        return [doc.to_dict() for doc in docs]
+        return [normalize_event_fields(doc.to_dict()) for doc in query.select(field_paths).get()]
+
+    # ---- アクティブ予定キャッシュ ----
+
+    def _active_events_query(self, guild_id: str):
+        return (
+            self._guild_ref(guild_id)
+            .collection("events")
+            .where(filter=firestore.FieldFilter("is_active", "==", True))
+        )
+
+    def _load_guild_events(self, guild_id: str) -> Dict[int, dict]:
+        """サーバーのアクティブ予定を読み込んでキャッシュに載せる"""
+        query = self._active_events_query(guild_id)
+        if self._use_snapshot_listeners:
+            try:
+                return self._watch_guild_events(guild_id, query)
+            except Exception as e:
+                print(f"[event_cache] snapshot listener failed for guild {guild_id}, using write-through only: {e}")
+
+        events = {}
+        for doc in query.get():
+            data = normalize_event_fields(doc.to_dict())
+            events[data["id"]] = data
+        with self._event_cache_lock:
+            for event_id in events:
+                self._remember_event_path_locked(event_id, f"guilds/{guild_id}/events/{event_id}")
+            self._event_cache[guild_id] = events
+            self._event_cache_generations[guild_id] = next(self._generation_counter)
+            self._event_cache.move_to_end(guild_id)
+            evicted = self._evict_idle_guilds_locked()
+        self._unsubscribe_watches(evicted)
+        return events
+
+    def _watch_guild_events(self, guild_id: str, query, timeout: float = 10.0) -> Dict[int, dict]:
+        """on_snapshot リスナーを登録し、初回スナップショットでキャッシュを構築する"""
+        ready = threading.Event()
+        state = {"closed": False}
+
+        def on_snapshot(docs, changes, read_time):
+            events = {}
+            for doc in docs:
+                data = normalize_event_fields(doc.to_dict())
+                events[data["id"]] = data
+            with self._event_cache_lock:
+                if state["closed"]:
+                    return
+                state["events"] = events
+                # 初回以降は LRU から追い出されていない場合のみ反映
+                if not ready.is_set() or guild_id in self._event_cache:
+                    self._event_cache[guild_id] = events
+                    self._event_cache_generations[guild_id] = next(self._generation_counter)
+                    for event_id in events:
+                        self._remember_event_path_locked(event_id, f"guilds/{guild_id}/events/{event_id}")
+            ready.set()
+
+        watch = query.on_snapshot(on_snapshot)
+        if not ready.wait(timeout):
+            state["closed"] = True
+            watch.unsubscribe()
+            raise TimeoutError(f"initial snapshot not received within {timeout}s")
+
+        with self._event_cache_lock:
+            if guild_id not in self._event_cache:
+                # 待っている間に LRU から追い出された → リスナーは登録せず初回の内容だけ返す
+                duplicate = [(watch, state)]
+                events = state["events"]
+                evicted = []
+            else:
+                if guild_id in self._event_watches:
+                    # 他スレッドが先にリスナーを登録済み
+                    duplicate = [(watch, state)]
+                else:
+                    self._event_watches[guild_id] = (watch, state)
+                    duplicate = []
+                self._event_cache.move_to_end(guild_id)
+                events = self._event_cache[guild_id]
+                evicted = self._evict_idle_guilds_locked()
+        self._unsubscribe_watches(duplicate + evicted)
+        return events
+
+    def _evict_idle_guilds_locked(self) -> list:
+        """上限を超えた分を最も使われていないサーバーから追い出す（ロック取得済み前提）"""
+        evicted = []
+        while len(self._event_cache) > self._event_cache_size:
+            guild_id, _ = self._event_cache.popitem(last=False)
+            self._occurrence_index.pop(guild_id, None)
+            self._conflict_indexes.pop(guild_id, None)
+            self._event_cache_generations.pop(guild_id, None)
+            entry = self._event_watches.pop(guild_id, None)
+            if entry:
+                evicted.append(entry)
+        return evicted
+
+    def _unsubscribe_watches(self, entries: list):
+        for watch, state in entries:
+            state["closed"] = True
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                print(f"[event_cache] failed to unsubscribe listener: {e}")
+
+    def _cache_put_event(self, guild_id: str, data: dict):
+        """書き込んだ予定をキャッシュへ反映（キャッシュ未ロードのサーバーは次回読み込みに任せる）"""
+        with self._event_cache_lock:
+            events = self._event_cache.get(guild_id)
+            if events is None:
+                return
+            if data.get("is_active"):
+                events[data["id"]] = _copy_event(data)
+            else:
+                events.pop(data["id"], None)
+            self._event_cache_generations[guild_id] = next(self._generation_counter)
+        self._refresh_occurrence_index(guild_id)
+
+    def _cache_apply_updates(self, ref, updates: dict):
+        """guilds/{guild_id}/events/{id} への部分更新をキャッシュへ反映"""
+        parts = ref.path.split("/")
+        if len(parts) != 4 or parts[0] != "guilds":
+            return
+        guild_id = parts[1]
+        try:
+            event_id = int(parts[3])
+        except ValueError:
+            return
+        with self._event_cache_lock:
+            events = self._event_cache.get(guild_id)
+            if events is None:
+                return
+            if updates.get("is_active") is False:
+                events.pop(event_id, None)
+            else:
+                cached = events.get(event_id)
+                if cached is not None:
+                    events[event_id] = _copy_event({**cached, **updates})
+            self._event_cache_generations[guild_id] = next(self._generation_counter)
+        self._refresh_occurrence_index(guild_id)
+
+    def invalidate_event_cache(self, guild_id: Optional[str] = None):
+        """キャッシュを破棄する（guild_id 省略時は全サーバー）"""
+        with self._event_cache_lock:
+            guild_ids = [guild_id] if guild_id else list(self._event_cache.keys())
+            entries = []
+            for gid in guild_ids:
+                self._event_cache.pop(gid, None)
+                self._occurrence_index.pop(gid, None)
+                self._conflict_indexes.pop(gid, None)
+                self._event_cache_generations.pop(gid, None)
+                entry = self._event_watches.pop(gid, None)
+                if entry:
+                    entries.append(entry)
+        self._unsubscribe_watches(entries)
+
+    def close(self):
+        """スナップショットリスナーを全て解除する"""
+        self.invalidate_event_cache()
+
+    # ---- 発生日インデックス ----
+    #
+    # 定期予定の発生日を今週の月曜日から occurrence_index_weeks 週分だけ展開し、
+    # メモリと guilds/{guild_id}/occurrence_index/current に保持する。
+    # エントリには発生日の計算に使ったフィールドを持たせ、予定と食い違うものだけを再展開する
+    # （他プロセスによる変更もここで吸収される）。
+
+    def _occurrence_horizon(self) -> Tuple[date, date]:
+        """インデックスの対象期間（今週の月曜日〜 occurrence_index_weeks 週後の日曜日）"""
+        today = datetime.now().date()
+        start = today - timedelta(days=today.weekday())
+        return start, start + timedelta(weeks=self._occurrence_index_weeks, days=-1)
+
+    def _in_occurrence_horizon(self, start: date, end: date) -> bool:
+        if not self._occurrence_index_weeks:
+            return False
+        horizon_start, horizon_end = self._occurrence_horizon()
+        return horizon_start <= start and end <= horizon_end
+
+    def _occurrence_index_ref(self, guild_id: str):
+        return self._guild_ref(guild_id).collection("occurrence_index").document("current")
+
+    def _occurrence_entries(self, guild_id: str, events: List[dict]) -> Dict[str, dict]:
+        """インデックスを events（サーバーのアクティブ予定）に合わせて更新し、event_id(str) -> エントリ を返す
+
+        メモリになければ Firestore から読み込み、期間がずれていれば繰り越す。
+        変わった予定のエントリだけを再展開し、Firestore へはそのフィールドだけを書き込む。
+        """
+        horizon_start, horizon_end = self._occurrence_horizon()
+
+        with self._event_cache_lock:
+            index = self._occurrence_index.get(guild_id)
+        rewrite = False
+        if index is None:
+            doc = self._occurrence_index_ref(guild_id).get()
+            index = doc.to_dict() if doc.exists else None
+            if index is None:
+                index = {
+                    "horizon_start": horizon_start.isoformat(),
+                    "horizon_end": horizon_end.isoformat(),
+                    "events": {},
+                }
+                rewrite = True
+
+        with self._event_cache_lock:
+            if guild_id in self._event_cache:
+                # メモリに置くのは予定キャッシュにあるサーバーだけ（追い出しも予定キャッシュに合わせる）
+                index = self._occurrence_index.setdefault(guild_id, index)
+            if (index["horizon_start"], index["horizon_end"]) != (horizon_start.isoformat(), horizon_end.isoformat()):
+                self._roll_occurrence_index_locked(index, horizon_start, horizon_end)
+                rewrite = True
+            updates = self._reconcile_occurrences_locked(index, events)
+            entries = dict(index["events"])
+            if rewrite:
+                full = {**index, "events": entries}
+
+        ref = self._occurrence_index_ref(guild_id)
+        try:
+            if rewrite:
+                ref.set(full)
+            elif updates:
+                ref.update(updates)
+        except Exception as e:
+            # 永続化に失敗してもメモリ上のインデックスは正しいので検索は続行する
+            print(f"[occurrence_index] failed to persist index for guild {guild_id}: {e}")
+        return entries
+
+    @staticmethod
+    def _expand_occurrences(signatures: List[dict], start: date, end: date) -> List[List[str]]:
+        """signatures ごとに start〜end の発生日（除外日を除く）を展開する
+
+        隔週の位相は各エントリの phase（_recurrence_phase）で決まるので、どこから展開しても同じ日付になる。
+        """
+        from recurrence_calculator import RecurrenceCalculator
+
+        expanded = RecurrenceCalculator.expand_events(
+            signatures,
+            datetime.combine(start, datetime.min.time()),
+            datetime.combine(end, datetime.max.time()),
+        )
+        results = []
+        for signature, dates in zip(signatures, expanded):
+            excluded = set(signature.get("excluded_dates") or [])
+            date_strs = (d.strftime("%Y-%m-%d") for d in dates)
+            results.append([d for d in date_strs if d not in excluded])
+        return results
+
+    def _reconcile_occurrences_locked(self, index: dict, events: List[dict]) -> Dict[str, Any]:
+        """予定と食い違うエントリを再展開・削除し、Firestore へ書き込む差分を返す（ロック取得済み前提）"""
+        entries = index["events"]
+        active = set()
+        stale = []
+        for event in events:
+            if event.get("recurrence", "") == "irregular":
+                continue
+            key = str(event["id"])
+            active.add(key)
+            signature = _occurrence_signature(event)
+            entry = entries.get(key)
+            if entry is None or {k: entry.get(k) for k in signature} != signature:
+                stale.append((key, signature))
+
+        updates: Dict[str, Any] = {}
+        for key in [k for k in entries if k not in active]:
+            del entries[key]
+            updates[_occurrence_field(key)] = firestore.DELETE_FIELD
+
+        if stale:
+            expanded = self._expand_occurrences(
+                [sig for _, sig in stale],
+                date.fromisoformat(index["horizon_start"]),
+                date.fromisoformat(index["horizon_end"]),
+            )
+            for (key, signature), dates in zip(stale, expanded):
+                entries[key] = {**signature, "dates": dates}
+                updates[_occurrence_field(key)] = entries[key]
+        return updates
+
+    def _roll_occurrence_index_locked(self, index: dict, horizon_start: date, horizon_end: date):
+        """インデックスの期間を移し、期間外の日付を捨てて新しく入った期間だけを展開する（ロック取得済み前提）"""
+        old_start = date.fromisoformat(index["horizon_start"])
+        old_end = date.fromisoformat(index["horizon_end"])
+        start_str, end_str = horizon_start.isoformat(), horizon_end.isoformat()
+        index["horizon_start"] = start_str
+        index["horizon_end"] = end_str
+
+        if horizon_start < old_start or horizon_start > old_end:
+            # 重なりがない（または過去へ戻った）場合は全エントリを再展開させる
+            index["events"] = {}
+            return
+
+        entries = index["events"]
+        keys = list(entries)
+        tail_start = old_end + timedelta(days=1)
+        if tail_start <= horizon_end:
+            tails = self._expand_occurrences([entries[k] for k in keys], tail_start, horizon_end)
+        else:
+            tails = [[] for _ in keys]
+        for key, tail in zip(keys, tails):
+            entry = entries[key]
+            dates = [d for d in entry["dates"] if start_str <= d <= end_str]
+            entries[key] = {**entry, "dates": dates + tail}
+
+    def _refresh_occurrence_index(self, guild_id: str):
+        """予定の書き込み後、メモリ上にあるインデックスを差分更新する"""
+        with self._event_cache_lock:
+            if guild_id not in self._occurrence_index:
+                return
+            events = self._event_cache.get(guild_id)
+            if events is None:
+                return
+            events = list(events.values())
+        self._occurrence_entries(guild_id, events)
+
+    def find_conflicts(
+        self, guild_id: str, candidate: dict, exclude_event_id: Optional[int] = None,
+    ) -> List[dict]:
+        """candidate（追加・編集後の予定）と時間帯が重なる既存予定の発生回を返す
+
+        発生日インデックスの期間内の定期予定だけを対象にする（不定期予定は対象外）。
+        重なりは発生区間の索引（ConflictIndex）を二分探索して調べ、索引は変わった予定の分だけ更新する。
+
+        Args:
+            guild_id: サーバーID
+            candidate: recurrence / weekday / nth_weeks / monthly_dates / excluded_dates /
+                time / duration_minutes を持つ予定の辞書（隔週の位相は google_calendar_events /
+                created_at から求め、どちらもなければ今日から登録する前提で数える）
+            exclude_event_id: 編集中の予定ID（自分自身との重なりを除く）
+
+        Returns:
+            [{"event_id", "event_name", "calendar_owner", "date", "time", "duration_minutes"}]（日時順）
+        """
+        if (
+            not self._occurrence_index_weeks
+            or candidate.get("recurrence", "") == "irregular"
+            or not candidate.get("time")
+        ):
+            return []
+
+        horizon_start, horizon_end = self._occurrence_horizon()
+        with self._event_cache_lock:
+            loaded = guild_id in self._event_cache_generations
+        if not loaded:
+            self._get_active_events(guild_id)
+        with self._event_cache_lock:
+            # 世代は予定を読むより先に取る（読んだ後に変わっていれば次回合わせ直す）
+            generation = self._event_cache_generations.get(guild_id)
+            state = self._conflict_indexes.get(guild_id)
+            fresh = (
+                state is not None
+                and generation is not None
+                and state["generation"] == generation
+                and state["horizon"] == horizon_start.isoformat()
+            )
+        if not fresh:
+            # 予定が変わっていれば発生日インデックスを合わせ、変わったエントリだけ区間を入れ替える
+            entries = self._occurrence_entries(guild_id, self._get_active_events(guild_id))
+            with self._event_cache_lock:
+                state = self._sync_conflict_index_locked(guild_id, entries)
+                state["generation"] = generation
+                state["horizon"] = horizon_start.isoformat()
+
+        signature = _occurrence_signature(candidate)
+        exclude = str(exclude_event_id) if exclude_event_id is not None else None
+        with self._event_cache_lock:
+            stored = state["entries"].get(exclude) if exclude is not None else None
+            if signature["phase"] and stored and stored.get("phase"):
+                # 編集中の予定は保存済みのエントリ（再登録後の DTSTART から求めた位相）に合わせる
+                signature["phase"] = stored["phase"]
+            candidate_dates = self._expand_occurrences([signature], horizon_start, horizon_end)[0]
+            hits = set()
+            for date_str in candidate_dates:
+                interval = occurrence_interval(date_str, signature["time"], signature["duration_minutes"])
+                if interval is None:
+                    continue
+                for start, _, key in state["index"].overlapping(*interval, exclude=exclude):
+                    hits.add((key, start))
+
+            cached_events = self._event_cache.get(guild_id) or {}
+            conflicts = []
+            for key, start in hits:
+                event = cached_events.get(int(key))
+                entry = state["entries"].get(key)
+                if event is None or entry is None:
+                    continue
+                conflicts.append({
+                    "event_id": event["id"],
+                    "event_name": event.get("event_name", ""),
+                    "calendar_owner": event.get("calendar_owner", ""),
+                    "date": date.fromordinal(start // 1440).isoformat(),
+                    "time": entry.get("time"),
+                    "duration_minutes": entry.get("duration_minutes") or 60,
+                })
+        return sorted(conflicts, key=lambda c: (c["date"], c["time"] or "", c["event_id"]))
+
+    def _sync_conflict_index_locked(self, guild_id: str, entries: Dict[str, dict]) -> dict:
+        """発生日インデックスのエントリと食い違う予定だけ ConflictIndex を入れ替える（ロック取得済み前提）
+
+        エントリは差し替えのみで書き換えないため、オブジェクトの同一性で変更を判定できる。
+        """
+        state = self._conflict_indexes.get(guild_id)
+        if state is None:
+            state = {"index": ConflictIndex(), "entries": {}, "generation": None, "horizon": None}
+            if guild_id in self._occurrence_index:
+                self._conflict_indexes[guild_id] = state
+        index, indexed = state["index"], state["entries"]
+        for key in [k for k in indexed if k not in entries]:
+            index.remove(key)
+            del indexed[key]
+        for key, entry in entries.items():
+            if indexed.get(key) is entry:
+                continue
+            intervals = [
+                occurrence_interval(d, entry.get("time"), entry.get("duration_minutes"))
+                for d in entry["dates"]
+            ]
+            index.insert(key, [iv for iv in intervals if iv is not None])
+            indexed[key] = entry
+        return state
+
+    def roll_occurrence_indexes(self) -> int:
+        """メモリ上のインデックスを今日基準の期間へ繰り越し、繰り越したサーバー数を返す（日次ジョブ用）
+
+        メモリにないサーバーは次に読み込まれたときに繰り越される。
+        """
+        if not self._occurrence_index_weeks:
+            return 0
+        horizon_start, _ = self._occurrence_horizon()
+        with self._event_cache_lock:
+            targets = [
+                (gid, list(self._event_cache[gid].values()))
+                for gid, index in self._occurrence_index.items()
+                if index["horizon_start"] != horizon_start.isoformat() and gid in self._event_cache
+            ]
+        for guild_id, events in targets:
+            self._occurrence_entries(guild_id, events)
+        return len(targets)
 
     # ---- イベント変更履歴 ----
 
@@ -857,8 +1689,14 @@ class FirestoreManager:
         action: str,
         changed_by: str,
         changes: dict,
+        uow: Optional["EventUnitOfWork"] = None,
     ) -> str:
-        """イベント変更履歴を追加"""
+        """イベント変更履歴を追加
+
+        履歴本体と予定ごとの履歴件数カウンターを同時に書き込む。
+        上限を超えた古い履歴は compact_event_history（定期ジョブ）でまとめて削除する。
+        uow を渡した場合は書き込みを uow.commit() まで保留する。
+        """
         now = datetime.now(timezone.utc).isoformat()
         data = {
             "event_id": event_id,
@@ -868,12 +1706,18 @@ class FirestoreManager:
             "changed_at": now,
             "changes": json.dumps(changes, ensure_ascii=False),
         }
-        _, ref = self._guild_ref(guild_id).collection("event_history").add(data)
-        # 古い履歴を自動クリーンアップ（ベストエフォート）
-        try:
-            self.cleanup_old_history(guild_id, event_id, keep_count=100)
-        except Exception as e:
-            print(f"[event_history] cleanup failed for event {event_id}: {e}")
+        guild_ref = self._guild_ref(guild_id)
+        ref = guild_ref.collection("event_history").document()
+        counter_ref = guild_ref.collection("event_history_counters").document(str(event_id))
+        counter_data = {"event_id": event_id, "count": firestore.Increment(1)}
+        if uow is not None:
+            uow._queue_set(ref, data)
+            uow._queue_set(counter_ref, counter_data, merge=True)
+            return ref.id
+        batch = self.db.batch()
+        batch.set(ref, data)
+        batch.set(counter_ref, counter_data, merge=True)
+        batch.commit()
         return ref.id
 
     def get_event_history(
@@ -901,8 +1745,27 @@ class FirestoreManager:
                 print(f"[event_history] Failed to get history: {e}")
             return []
 
-    def cleanup_old_history(self, guild_id: str, event_id: int, keep_count: int = 100):
-        """イベントごとの履歴を keep_count 件に制限し、古いものをバッチ削除
+    def compact_event_history(self, keep_count: int = EVENT_HISTORY_KEEP_COUNT) -> int:
+        """履歴件数カウンターが keep_count を超えた予定だけ古い履歴を削除し、削除件数を返す"""
+        counters = (
+            self.db.collection_group("event_history_counters")
+            .where(filter=firestore.FieldFilter("count", ">", keep_count))
+            .get()
+        )
+        total = 0
+        for counter in counters:
+            # guilds/{guild_id}/event_history_counters/{event_id}
+            guild_id = counter.reference.path.split("/")[1]
+            event_id = counter.to_dict().get("event_id")
+            try:
+                total += self.cleanup_old_history(guild_id, event_id, keep_count=keep_count)
+                counter.reference.set({"count": keep_count}, merge=True)
+            except Exception as e:
+                print(f"[event_history] compaction failed for event {event_id} in guild {guild_id}: {e}")
+        return total
+
+    def cleanup_old_history(self, guild_id: str, event_id: int, keep_count: int = EVENT_HISTORY_KEEP_COUNT) -> int:
+        """イベントごとの履歴を keep_count 件に制限し、古いものをバッチ削除して削除件数を返す
 
         keep_count 件目をカーソルとして取得し、それより古いドキュメントを
         start_after で取得して削除する（offset の読み取り課金を回避）。
@@ -916,11 +1779,12 @@ class FirestoreManager:
         # keep_count 件目のドキュメントをカーソルとして取得
         cursor_docs = list(base_query.limit(keep_count).get())
         if len(cursor_docs) < keep_count:
-            return  # keep_count 未満なら削除不要
+            return 0  # keep_count 未満なら削除不要
 
         last_doc = cursor_docs[-1]
         # カーソル以降の古いドキュメントを limit(500) でページングしながら削除
         delete_query = base_query.start_after(last_doc).limit(500)
+        deleted = 0
         while True:
             old_docs = list(delete_query.get())
             if not old_docs:
@@ -929,7 +1793,115 @@ class FirestoreManager:
             for doc in old_docs:
                 batch.delete(doc.reference)
             batch.commit()
+            deleted += len(old_docs)
             if len(old_docs) < 500:
                 break
             # 次ページのカーソルを更新
             delete_query = base_query.start_after(old_docs[-1]).limit(500)
+        return deleted
+
+
+class EventUnitOfWork:
+    """予定の追加・更新・履歴記録をためておき、commit() で1つの WriteBatch として書き込む
+
+    FirestoreManager.unit_of_work() から取得する。同じ作業単位で追加した予定への
+    update_google_calendar_events は、追加するドキュメントにそのまま反映される。
+    """
+
+    def __init__(self, manager: FirestoreManager):
+        self._manager = manager
+        # event_id -> (ref, guild_id, data)
+        self._new_events: "OrderedDict[int, tuple]" = OrderedDict()
+        self._sets: List[tuple] = []
+        self._updates: List[tuple] = []
+        self.committed = False
+
+    def add_event(self, **kwargs) -> int:
+        return self._manager.add_event(uow=self, **kwargs)
+
+    def update_google_calendar_events(
+        self, event_id: int, google_events: List[dict], guild_id: Optional[str] = None,
+    ):
+        self._manager.update_google_calendar_events(event_id, google_events, guild_id=guild_id, uow=self)
+
+    def add_event_history(self, **kwargs) -> str:
+        return self._manager.add_event_history(uow=self, **kwargs)
+
+    def commit(self):
+        """ためた書き込みをコミットし、予定キャッシュへ反映する（何もなければ通信しない）"""
+        if self.committed:
+            raise RuntimeError("unit of work already committed")
+        self.committed = True
+        if not (self._new_events or self._sets or self._updates):
+            return
+
+        batch = self._manager.db.batch()
+        for ref, _, data in self._new_events.values():
+            batch.set(ref, data)
+        for ref, data, merge in self._sets:
+            batch.set(ref, data, merge=merge)
+        for ref, updates in self._updates:
+            batch.update(ref, updates)
+        batch.commit()
+
+        manager = self._manager
+        for event_id, (ref, guild_id, data) in self._new_events.items():
+            with manager._event_cache_lock:
+                manager._remember_event_path_locked(event_id, ref.path)
+            manager._cache_put_event(guild_id, data)
+        for ref, updates in self._updates:
+            manager._cache_apply_updates(ref, updates)
+
+    def _queue_new_event(self, ref, guild_id: str, data: dict):
+        self._new_events[data["id"]] = (ref, guild_id, data)
+
+    def _merge_into_new_event(self, event_id: int, updates: dict) -> bool:
+        entry = self._new_events.get(event_id)
+        if entry is None:
+            return False
+        entry[2].update(updates)
+        return True
+
+    def _queue_set(self, ref, data: dict, merge: bool = False):
+        self._sets.append((ref, data, merge))
+
+    def _queue_update(self, ref, updates: dict):
+        self._updates.append((ref, updates))
+
+
+class _AsyncProxy:
+    """同期オブジェクトの公開メソッドを、ワーカースレッドで実行するコルーチンとして公開する"""
+
+    def __init__(self, target):
+        self.sync = target
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or name == "sync":
+            raise AttributeError(name)
+        attr = getattr(self.sync, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def _call(*args, **kwargs):
+            return await asyncio.to_thread(attr, *args, **kwargs)
+
+        # 次回以降は __getattr__ を経由しない
+        setattr(self, name, _call)
+        return _call
+
+
+class AsyncFirestoreManager(_AsyncProxy):
+    """FirestoreManager の非同期版（discord.py のイベントループから使う）
+
+    公開メソッドはすべて FirestoreManager と同名・同引数のコルーチンで、
+    実処理はワーカースレッドで行うためイベントループをブロックしない。
+    予定キャッシュと on_snapshot リスナーは内部の FirestoreManager（sync）と共有する。
+    """
+
+    def __init__(self, manager: Optional[FirestoreManager] = None, **kwargs):
+        super().__init__(manager if manager is not None else FirestoreManager(**kwargs))
+
+    def unit_of_work(self) -> _AsyncProxy:
+        """EventUnitOfWork の非同期版（各メソッドと commit() を await して使う）"""
+        return _AsyncProxy(self.sync.unit_of_work())
@@ -4,6 +4,7 @@ import asyncio
 import threading
 from flask import Flask, request
 import base64
+import hmac
 import json
 from dotenv import load_dotenv
 from datetime import datetime, timezone
@@ -11,8 +12,10 @@ from typing import Optional
 
 from bot import CalendarBot, setup_commands, create_weekly_embed
 from nlp_processor import NLPProcessor
-from firestore_manager import FirestoreManager
+from firestore_manager import FirestoreManager, AsyncFirestoreManager
 from oauth_handler import OAuthHandler
+from rate_limiter import CalendarRateLimiter
+from calendar_push import receive_notification
 from google.cloud import secretmanager
 
 # 環境変数の読み込み
@@ -36,7 +39,12 @@ def get_secret(secret_id: str, default: Optional[str] = None) -> Optional[str]:
 app = Flask(__name__)
 
 # 各種インスタンスの初期化
-db_manager = FirestoreManager(project_id=os.getenv('GCP_PROJECT_ID'))
+db_manager = FirestoreManager(
+    project_id=os.getenv('GCP_PROJECT_ID'),
+    id_block_size=int(os.getenv('FIRESTORE_ID_BLOCK_SIZE', '50')),
+    legacy_event_fields=os.getenv('FIRESTORE_LEGACY_EVENT_FIELDS', 'true').lower() == 'true',
+    occurrence_index_weeks=int(os.getenv('FIRESTORE_OCCURRENCE_INDEX_WEEKS', '12')),
+)
 # 各種APIキーをSecret Managerまたは環境変数から取得
 gemini_api_key = get_secret('GEMINI_API_KEY')
 discord_bot_token = get_secret('DISCORD_BOT_TOKEN')
@@ -54,11 +62,26 @@ if oauth_client_id and oauth_client_secret and oauth_redirect_uri:
 else:
     print("OAuth handler not configured (GOOGLE_OAUTH_CLIENT_ID, GOOGLE_OAUTH_CLIENT_SECRET, OAUTH_REDIRECT_URI required)")
 
+# /metrics/calendar の参照用トークン（未設定ならエンドポイントを無効にする）
+metrics_token = get_secret('METRICS_TOKEN')
+
 # Discord Bot
+# Google Calendar API の流量制限（リクエスト/秒、バースト許容量）
+calendar_rate_limiter = CalendarRateLimiter(
+    project_rate=float(os.getenv('CALENDAR_API_RATE', '10')),
+    project_burst=float(os.getenv('CALENDAR_API_BURST', '20')),
+    owner_rate=float(os.getenv('CALENDAR_API_RATE_PER_OWNER', '5')),
+    owner_burst=float(os.getenv('CALENDAR_API_BURST_PER_OWNER', '10')),
+    max_retries=int(os.getenv('CALENDAR_API_MAX_RETRIES', '4')),
+)
+# Bot側はイベントループをブロックしないよう非同期版を使う（キャッシュは db_manager と共有）
 bot = CalendarBot(
     nlp_processor,
-    db_manager,
+    AsyncFirestoreManager(db_manager),
     oauth_handler=oauth_handler,
+    calendar_rate_limiter=calendar_rate_limiter,
+    # Google Calendar の変更通知の受信URL（公開された HTTPS の /calendar/notifications）
+    calendar_webhook_url=os.getenv('CALENDAR_WEBHOOK_URL') or None,
 )
 setup_commands(bot)
 
@@ -74,6 +97,34 @@ def health_check():
     }
     return status, 200
 
+@app.route('/metrics/calendar', methods=['GET'])
+def calendar_metrics():
+    """Google Calendar API 呼び出しの累計（呼び出し数・再試行・待機時間・ステータス別エラー）
+
+    公開される通知用エンドポイントと同じアプリで動くため、METRICS_TOKEN を
+    Authorization: Bearer で送ったリクエストにだけ応答する。
+    """
+    if not metrics_token:
+        return 'Not Found', 404
+    auth = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(auth.encode('utf-8'), f"Bearer {metrics_token}".encode('utf-8')):
+        return 'Unauthorized', 401
+    return calendar_rate_limiter.metrics(), 200
+
+@app.route('/calendar/notifications', methods=['POST'])
+def calendar_notification():
+    """Google Calendar の変更通知（events.watch）の受信エンドポイント
+
+    通知の内容は X-Goog-* ヘッダーのみ。検証と整合性チェックは Bot のイベントループで行い、
+    ここではすぐに応答する（応答が遅い・失敗すると Google 側で再送される）。
+    """
+    return receive_notification(request.headers, _dispatch_calendar_notification)
+
+def _dispatch_calendar_notification(notification):
+    """通知の処理を Bot のイベントループに渡す（起動前に届いた通知は捨てる）"""
+    if bot_loop and bot_ready.is_set():
+        asyncio.run_coroutine_threadsafe(bot.handle_calendar_notification(notification), bot_loop)
+
 @app.route('/oauth/callback', methods=['GET'])
 def oauth_callback():
     """Google OAuth コールバックエンドポイント"""
@@ -177,7 +228,7 @@ async def send_weekly_notifications():
         guild_id = str(guild.id)
 
         # このサーバーの今週の予定を取得
-        events = bot.db_manager.get_this_week_events(guild_id)
+        events = await bot.db_manager.get_this_week_events(guild_id)
 
         if not events:
             continue
@@ -208,7 +259,7 @@ async def send_weekly_notifications():
                 print(f'Failed to send notification to channel {channel_id}: {e}')
 
     # 最終通知時刻を更新
-    bot.db_manager.update_setting('last_notification_at', datetime.now(timezone.utc).isoformat())
+    await bot.db_manager.update_setting('last_notification_at', datetime.now(timezone.utc).isoformat())
 
 def run_discord_bot():
     """Discord Botを別スレッドで実行"""
@@ -0,0 +1,210 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+# 再試行する HTTP ステータス（403 は理由がレート制限の場合のみ）
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+
+
+def http_status(error: Exception) -> Optional[int]:
+    """HttpError の HTTP ステータス（取れない場合は None）"""
+    return getattr(getattr(error, "resp", None), "status", None)
+
+
+def _error_reasons(error: Exception) -> set:
+    """HttpError の本文に含まれる errors[].reason の集合"""
+    content = getattr(error, "content", None)
+    if not content:
+        return set()
+    try:
+        body = json.loads(content.decode("utf-8") if isinstance(content, bytes) else content)
+        return {e.get("reason") for e in body.get("error", {}).get("errors", [])}
+    except (ValueError, AttributeError, TypeError):
+        return set()
+
+
+def is_retryable(error: Exception) -> bool:
+    """レート制限・一時的なサーバーエラーで、時間をおけば成功し得る例外か"""
+    status = http_status(error)
+    if status in RETRYABLE_STATUSES:
+        return True
+    return status == 403 and bool(_error_reasons(error) & RATE_LIMIT_REASONS)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Retry-After ヘッダーの秒数（ない・解釈できない場合は None）"""
+    resp = getattr(error, "resp", None)
+    try:
+        value = resp.get("retry-after") if resp is not None else None
+        return float(value) if value is not None else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _on_event_loop_thread() -> bool:
+    """今のスレッドで asyncio のイベントループが動いているか"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class TokenBucket:
+    """トークンバケット（rate 件/秒で補充、最大 capacity 件まで貯まる）
+
+    reserve() は先にトークンを確保し、不足分が貯まるまでの待ち時間を返す。
+    待っている呼び出しの分も差し引くため、同時に呼ばれても先着順に間隔があく。
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, count: float = 1) -> float:
+        """count 件分を確保し、実行してよくなるまでの秒数を返す（0 ならすぐ実行できる）"""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= count
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class CalendarRateLimiter:
+    """Google Calendar API 呼び出しの流量制限と再試行
+
+    プロジェクト全体のバケットと、カレンダーオーナー（キー）ごとのバケットの両方からトークンを取る。
+    429・5xx・rateLimitExceeded は指数バックオフ（フルジッター、Retry-After があればそれ以上）で再試行する。
+    待機は sleep で行うため、呼び出しは CalendarExecutor などのワーカースレッドから行う
+    （イベントループのスレッドで待つ必要が生じた場合は Bot 全体を止めないよう RuntimeError にする）。
+    """
+
+    def __init__(
+        self,
+        project_rate: float = 10.0,
+        project_burst: float = 20.0,
+        owner_rate: float = 5.0,
+        owner_burst: float = 10.0,
+        max_retries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 8.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        random_func: Callable[[], float] = random.random,
+    ):
+        self.owner_rate = owner_rate
+        self.owner_burst = owner_burst
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._clock = clock
+        self._sleep = sleep
+        self._random = random_func
+        self._project = TokenBucket(project_rate, project_burst, clock)
+        self._owners: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Any] = {
+            "calls": 0,
+            "retries": 0,
+            "failures": 0,
+            "throttled": 0,
+            "throttled_seconds": 0.0,
+            "backoff_seconds": 0.0,
+            "errors_by_status": {},
+        }
+
+    def acquire(self, key: Optional[str], count: int = 1) -> float:
+        """count 件分のトークンを取り、必要なら待つ。待った秒数を返す"""
+        wait = self._project.reserve(count)
+        if key:
+            with self._lock:
+                bucket = self._owners.get(key)
+                if bucket is None:
+                    bucket = TokenBucket(self.owner_rate, self.owner_burst, self._clock)
+                    self._owners[key] = bucket
+            wait = max(wait, bucket.reserve(count))
+        if wait > 0:
+            with self._lock:
+                self._metrics["throttled"] += 1
+                self._metrics["throttled_seconds"] += wait
+            self._wait(wait)
+        return wait
+
+    def backoff(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """attempt 回目（0始まり）の再試行までの待ち時間を求めて待つ"""
+        delay = self._random() * min(self.max_delay, self.base_delay * (2 ** attempt))
+        retry_after = _retry_after(error) if error is not None else None
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        with self._lock:
+            self._metrics["retries"] += 1
+            self._metrics["backoff_seconds"] += delay
+        self._wait(delay)
+        return delay
+
+    def _wait(self, seconds: float):
+        """seconds 秒待つ（イベントループのスレッドでは待たずに RuntimeError）"""
+        if _on_event_loop_thread():
+            raise RuntimeError(
+                "CalendarRateLimiter must not wait on the event loop thread; run Calendar calls in a worker thread"
+            )
+        self._sleep(seconds)
+
+    def record(self, count: int = 1, error: Optional[Exception] = None):
+        """実行した API 呼び出しの件数と、失敗した場合はそのステータスを記録する"""
+        with self._lock:
+            self._metrics["calls"] += count
+            if error is not None:
+                status = str(http_status(error) or "error")
+                by_status = self._metrics["errors_by_status"]
+                by_status[status] = by_status.get(status, 0) + 1
+
+    def record_failures(self, count: int = 1):
+        """再試行しても（または再試行できずに）失敗した呼び出しの件数を記録する"""
+        with self._lock:
+            self._metrics["failures"] += count
+
+    def execute(self, key: Optional[str], call: Callable[[], T]) -> T:
+        """流量制限をかけて call を実行し、再試行可能なエラーはバックオフして再試行する
+
+        再試行しても失敗した場合や再試行できないエラーは、最後の例外をそのまま送出する。
+        """
+        attempt = 0
+        while True:
+            self.acquire(key)
+            try:
+                result = call()
+            except Exception as e:
+                self.record(error=e)
+                if attempt >= self.max_retries or not is_retryable(e):
+                    self.record_failures()
+                    raise
+                print(f"[rate_limit] retrying after {http_status(e)} (attempt {attempt + 1}/{self.max_retries})")
+                self.backoff(attempt, e)
+                attempt += 1
+                continue
+            self.record()
+            return result
+
+    def metrics(self) -> Dict[str, Any]:
+        """累計の計測値（エクスポート用のコピー）"""
+        with self._lock:
+            snapshot = dict(self._metrics)
+            snapshot["errors_by_status"] = dict(self._metrics["errors_by_status"])
+            snapshot["owners"] = len(self._owners)
+        snapshot["throttled_seconds"] = round(snapshot["throttled_seconds"], 3)
+        snapshot["backoff_seconds"] = round(snapshot["backoff_seconds"], 3)
+        return snapshot
@@ -1,6 +1,154 @@
-from datetime import datetime, timedelta
-from typing import List, Optional
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
 import calendar
+import functools
+import re
+
+# UNTIL が UTC（末尾 Z）で dtstart が naive の場合に使う、予定時刻のタイムゾーン
+RRULE_LOCAL_TZ = timezone(timedelta(hours=9))
+
+_BYDAY_PATTERN = re.compile(r"^([+-]?\d{1,2})?(MO|TU|WE|TH|FR|SA|SU)$")
+
+
+class CompiledRRule(NamedTuple):
+    """RecurrenceCalculator.parse_rrule が返す解析済みの RRULE
+
+    to_rrule が出力する FREQ=WEEKLY / MONTHLY と INTERVAL / BYDAY / BYMONTHDAY / UNTIL に対応する。
+    byday は (n, 曜日) のタプルで、n=0 は「毎週その曜日」、負数は月末から数える。
+    """
+    freq: str
+    interval: int
+    byday: Tuple[Tuple[int, int], ...]
+    bymonthday: Tuple[int, ...]
+    until: Optional[datetime]
+
+    def between(self, dtstart: datetime, start: datetime, end: datetime) -> List[datetime]:
+        """dtstart を起点とする発生日時のうち [start, end] に入るものを昇順で返す
+
+        発生日時の時刻・タイムゾーンは dtstart のものを引き継ぐ。
+        """
+        until = self.until
+        if until is not None and until.tzinfo is not None and dtstart.tzinfo is None:
+            until = until.astimezone(RRULE_LOCAL_TZ).replace(tzinfo=None)
+        elif until is not None and until.tzinfo is None and dtstart.tzinfo is not None:
+            until = until.replace(tzinfo=dtstart.tzinfo)
+
+        lower = max(start, dtstart)
+        upper = min(end, until) if until is not None else end
+        if lower > upper:
+            return []
+
+        if self.freq == "WEEKLY":
+            days = self._weekly_days(dtstart.date(), lower.date(), upper.date())
+        else:
+            days = self._monthly_days(dtstart.date(), lower.date(), upper.date())
+
+        results = []
+        for day in days:
+            occurrence = datetime.combine(day, dtstart.timetz())
+            if lower <= occurrence <= upper:
+                results.append(occurrence)
+        return results
+
+    def _weekly_days(self, dtstart: date, lower: date, upper: date) -> List[date]:
+        weekdays = sorted({wd for _, wd in self.byday}) or [dtstart.weekday()]
+        # 週の区切りは WKST=MO（月曜日始まり）
+        anchor = dtstart - timedelta(days=dtstart.weekday())
+        weeks = (lower - anchor).days // 7
+        week = anchor + timedelta(weeks=weeks + (-weeks) % self.interval)
+        days = []
+        while week <= upper:
+            days.extend(week + timedelta(days=wd) for wd in weekdays)
+            week += timedelta(weeks=self.interval)
+        return days
+
+    def _monthly_days(self, dtstart: date, lower: date, upper: date) -> List[date]:
+        months = (lower.year - dtstart.year) * 12 + lower.month - dtstart.month
+        index = months + (-months) % self.interval
+        days = []
+        while True:
+            year, month = divmod(dtstart.month - 1 + index, 12)
+            year += dtstart.year
+            month += 1
+            if (year, month) > (upper.year, upper.month):
+                return days
+            days.extend(date(year, month, d) for d in self._days_in_month(year, month, dtstart.day))
+            index += self.interval
+
+    def _days_in_month(self, year: int, month: int, default_day: int) -> List[int]:
+        first_weekday, days_in_month = calendar.monthrange(year, month)
+        by_weekday = set()
+        for n, wd in self.byday:
+            first = 1 + (wd - first_weekday) % 7
+            matches = list(range(first, days_in_month + 1, 7))
+            if n == 0:
+                by_weekday.update(matches)
+            elif -len(matches) <= n <= len(matches):
+                by_weekday.add(matches[n - 1] if n > 0 else matches[n])
+        by_monthday = set()
+        for d in self.bymonthday:
+            day = d if d > 0 else days_in_month + 1 + d
+            if 1 <= day <= days_in_month:
+                by_monthday.add(day)
+
+        if self.byday and self.bymonthday:
+            return sorted(by_weekday & by_monthday)
+        if self.byday:
+            return sorted(by_weekday)
+        if self.bymonthday:
+            return sorted(by_monthday)
+        return [default_day] if default_day <= days_in_month else []
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_rrule(rrule: str) -> CompiledRRule:
+    body = rrule.strip()
+    if body.upper().startswith("RRULE:"):
+        body = body[len("RRULE:"):]
+    parts = {}
+    for part in body.split(";"):
+        if not part:
+            continue
+        key, sep, value = part.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid RRULE part: {part!r}")
+        parts[key.upper()] = value.upper()
+
+    freq = parts.pop("FREQ", None)
+    if freq not in ("WEEKLY", "MONTHLY"):
+        raise ValueError(f"Unsupported RRULE FREQ: {freq}")
+    interval = int(parts.pop("INTERVAL", "1"))
+    if interval < 1:
+        raise ValueError(f"Invalid RRULE INTERVAL: {interval}")
+
+    byday = []
+    for token in filter(None, parts.pop("BYDAY", "").split(",")):
+        match = _BYDAY_PATTERN.match(token)
+        if not match:
+            raise ValueError(f"Invalid RRULE BYDAY: {token}")
+        n = int(match.group(1) or 0)
+        if n and freq == "WEEKLY":
+            raise ValueError(f"Ordinal BYDAY is not allowed with FREQ=WEEKLY: {token}")
+        byday.append((n, RecurrenceCalculator.WEEKDAY_MAP.index(match.group(2))))
+
+    bymonthday = tuple(int(d) for d in filter(None, parts.pop("BYMONTHDAY", "").split(",")))
+    if bymonthday and freq == "WEEKLY":
+        raise ValueError("BYMONTHDAY is not allowed with FREQ=WEEKLY")
+
+    until = None
+    if "UNTIL" in parts:
+        value = parts.pop("UNTIL")
+        if len(value) == 8:
+            until = datetime.strptime(value, "%Y%m%d").replace(hour=23, minute=59, second=59)
+        else:
+            until = datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S")
+            if value.endswith("Z"):
+                until = until.replace(tzinfo=timezone.utc)
+
+    if parts.pop("WKST", "MO") != "MO" or parts:
+        raise ValueError(f"Unsupported RRULE parts: {rrule}")
+    return CompiledRRule(freq, interval, tuple(byday), bymonthday, until)
+
 
 class RecurrenceCalculator:
     WEEKDAY_MAP = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
@@ -42,6 +190,21 @@ class RecurrenceCalculator:
         else:
             raise ValueError(f"Unsupported recurrence for RRULE: {recurrence}")
 
+    @staticmethod
+    def parse_rrule(rrule: str) -> CompiledRRule:
+        """RRULE文字列を解析する（同じ文字列の解析結果はキャッシュして使い回す）
+
+        Args:
+            rrule: "RRULE:" 付き・なしどちらでも可
+
+        Returns:
+            CompiledRRule（between() で任意の期間に展開できる）
+
+        Raises:
+            ValueError: 対応していない RRULE（COUNT・FREQ=DAILY など）
+        """
+        return _compile_rrule(rrule)
+
     @staticmethod
     def calculate_dates(
         recurrence: str,
@@ -51,6 +214,7 @@ class RecurrenceCalculator:
         months_ahead: int = 3,
         end_date_limit: Optional[datetime] = None,
         monthly_dates: Optional[List[int]] = None,
+        phase: Optional[str] = None,
     ) -> List[datetime]:
         """
         繰り返しパターンから日付リストを生成
@@ -63,95 +227,143 @@ class RecurrenceCalculator:
             months_ahead: 何ヶ月先まで生成するか
             end_date_limit: 生成の最終期限（months_aheadより優先される）
             monthly_dates: 毎月の日付リスト（monthly_dateの場合）
+            phase: 隔週の基準日（ISO形式、biweeklyの場合）。この日と同じ週の並びに揃える
 
         Returns:
-            日付のリスト
+            日付のリスト（昇順・重複なし）
         """
-        dates = []
-        current_date = start_date
-        
-        if end_date_limit:
-            end_date = end_date_limit
-        else:
-            # 月の長さを正確に計算
-            end_date = start_date
-            for _ in range(months_ahead):
-                # 次の月の同日（月末は調整）
-                month = end_date.month + 1
-                year = end_date.year
-                if month > 12:
-                    month = 1
-                    year += 1
-                max_day = calendar.monthrange(year, month)[1]
-                day = min(end_date.day, max_day)
-                end_date = end_date.replace(year=year, month=month, day=day)
-        
-        if recurrence == "weekly":
-            # 毎週
-            # 開始日以降の最初の該当曜日を探す
-            while current_date.weekday() != weekday:
-                current_date += timedelta(days=1)
-            
-            while current_date <= end_date:
-                dates.append(current_date)
-                current_date += timedelta(weeks=1)
-        
-        elif recurrence == "biweekly":
-            # 隔週
-            # 開始日以降の最初の該当曜日を探す
-            while current_date.weekday() != weekday:
-                current_date += timedelta(days=1)
-            
-            while current_date <= end_date:
-                dates.append(current_date)
-                current_date += timedelta(weeks=2)
-        
-        elif recurrence == "nth_week":
-            # 第n週
-            # 当月の1日から開始して月ごとにループ
-            temp_date = current_date.replace(day=1)
-
-            while temp_date <= end_date:
-                year = temp_date.year
-                month = temp_date.month
-
-                for week_num in nth_weeks:
-                    date = RecurrenceCalculator._get_nth_weekday(
-                        year, month, week_num, weekday
-                    )
-                    # 開始日以降かつ終了日以前の場合のみ追加
-                    if date and start_date.date() <= date.date() <= end_date.date():
-                        dates.append(date)
-
-                # 次の月へ
-                if month == 12:
-                    temp_date = temp_date.replace(year=year+1, month=1)
-                else:
-                    temp_date = temp_date.replace(month=month+1)
+        end_date = end_date_limit or RecurrenceCalculator._add_months(start_date, months_ahead)
+        months = RecurrenceCalculator._month_table(start_date, end_date)
+        return RecurrenceCalculator._expand(
+            recurrence, nth_weeks, weekday, monthly_dates, start_date, end_date, months,
+            RecurrenceCalculator._week_parity(phase),
+        )
+
+    @staticmethod
+    def _week_parity(phase: Optional[str]) -> Optional[int]:
+        """隔週の基準日が属する週（月曜始まり）の偶奇を返す。基準日がなければ None"""
+        if not phase:
+            return None
+        try:
+            day = date.fromisoformat(str(phase)[:10])
+        except ValueError:
+            return None
+        # toordinal() == 1 は西暦1年1月1日（月曜日）
+        return (day.toordinal() - 1) // 7 % 2
+
+    @staticmethod
+    def expand_events(
+        events: List[dict],
+        start_date: datetime,
+        end_date: datetime,
+    ) -> List[List[datetime]]:
+        """複数の予定を同じ期間でまとめて展開する
+
+        月ごとの曜日・日数の表は1回だけ作り、同じ繰り返しパターンの予定は計算結果を共有する。
 
+        Args:
+            events: recurrence / nth_weeks / weekday / monthly_dates / phase を持つ予定の辞書
+            start_date: 開始日
+            end_date: 終了日
+
+        Returns:
+            events と同じ順の日付リストのリスト
+        """
+        months = RecurrenceCalculator._month_table(start_date, end_date)
+        memo: Dict[Tuple, List[datetime]] = {}
+        results = []
+        for event in events:
+            recurrence = event.get("recurrence")
+            weekday = event.get("weekday")
+            nth_weeks = tuple(event.get("nth_weeks") or ())
+            monthly_dates = tuple(event.get("monthly_dates") or ())
+            parity = (
+                RecurrenceCalculator._week_parity(event.get("phase"))
+                if recurrence == "biweekly" else None
+            )
+            key = (recurrence, weekday, nth_weeks, monthly_dates, parity)
+            if key not in memo:
+                memo[key] = RecurrenceCalculator._expand(
+                    recurrence, nth_weeks, weekday, monthly_dates, start_date, end_date, months,
+                    parity,
+                )
+            results.append(list(memo[key]))
+        return results
+
+    @staticmethod
+    def _expand(
+        recurrence: str,
+        nth_weeks: Optional[Sequence[int]],
+        weekday: Optional[int],
+        monthly_dates: Optional[Sequence[int]],
+        start_date: datetime,
+        end_date: datetime,
+        months: List[Tuple[int, int, int, int]],
+        parity: Optional[int] = None,
+    ) -> List[datetime]:
+        """1つの繰り返しパターンを [start_date, end_date] の日付に展開する
+
+        parity は隔週の基準週の偶奇（_week_parity）。None なら開始日の週から数える。
+        """
+        if recurrence in ("weekly", "biweekly"):
+            if weekday is None:
+                return []
+            step = timedelta(weeks=1 if recurrence == "weekly" else 2)
+            # 開始日以降の最初の該当曜日（時刻は start_date のものを引き継ぐ）
+            first = start_date + timedelta(days=(weekday - start_date.weekday()) % 7)
+            if recurrence == "biweekly" and parity is not None:
+                # 基準日と逆の週に当たったら1週ずらす（RRULE の INTERVAL=2 と同じ並び）
+                if (first.toordinal() - 1) // 7 % 2 != parity:
+                    first += timedelta(weeks=1)
+            if first > end_date:
+                return []
+            count = (end_date - first) // step + 1
+            return [first + step * i for i in range(count)]
+
+        if recurrence == "nth_week":
+            if weekday is None or not nth_weeks:
+                return []
+            weeks = sorted(set(nth_weeks))
         elif recurrence == "monthly_date" and monthly_dates:
-            # 毎月指定日
-            temp_date = current_date.replace(day=1)
-
-            while temp_date <= end_date:
-                year = temp_date.year
-                month = temp_date.month
-                max_day = calendar.monthrange(year, month)[1]
-
-                for day in monthly_dates:
-                    if day <= max_day:
-                        candidate = datetime(year, month, day)
-                        if start_date.date() <= candidate.date() <= end_date.date():
-                            dates.append(candidate)
-
-                # 次の月へ
-                if month == 12:
-                    temp_date = temp_date.replace(year=year+1, month=1)
-                else:
-                    temp_date = temp_date.replace(month=month+1)
-
-        return sorted(list(set(dates)))
-    
+            days = sorted(set(monthly_dates))
+        else:
+            return []
+
+        start_day = start_date.date()
+        end_day = end_date.date()
+        dates = []
+        for year, month, first_weekday, days_in_month in months:
+            if recurrence == "nth_week":
+                # 第n週の該当曜日 = 最初の該当曜日 + (n-1) 週
+                offset = (weekday - first_weekday) % 7
+                days = [1 + offset + (n - 1) * 7 for n in weeks]
+            for day in days:
+                if 1 <= day <= days_in_month:
+                    candidate = datetime(year, month, day)
+                    if start_day <= candidate.date() <= end_day:
+                        dates.append(candidate)
+        return dates
+
+    @staticmethod
+    def _month_table(start_date: datetime, end_date: datetime) -> List[Tuple[int, int, int, int]]:
+        """start_date の月から end_date の月までの (年, 月, 1日の曜日, 日数) の表"""
+        table = []
+        year, month = start_date.year, start_date.month
+        while (year, month) <= (end_date.year, end_date.month):
+            first_weekday, days_in_month = calendar.monthrange(year, month)
+            table.append((year, month, first_weekday, days_in_month))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return table
+
+    @staticmethod
+    def _add_months(value: datetime, months: int) -> datetime:
+        """1ヶ月ずつ進めた months ヶ月後の同日（存在しない日はその月の月末に丸める）"""
+        for _ in range(months):
+            year, month = (value.year + 1, 1) if value.month == 12 else (value.year, value.month + 1)
+            day = min(value.day, calendar.monthrange(year, month)[1])
+            value = value.replace(year=year, month=month, day=day)
+        return value
+
     @staticmethod
     def _get_nth_weekday(
         year: int,
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Google Calendar の変更通知をローカルの Bot に送るフェイク通知元
+
+Firestore に保存された通知チャネル（oauth_tokens の calendar_watch）を読み、
+Google と同じ X-Goog-* ヘッダーで /calendar/notifications に POST する。
+Google からの実際の通知を待たずに、通知 → 整合性チェックの流れを確認できる。
+
+使い方:
+    # ローカルで起動中の Bot に "exists"（変更あり）通知を1件送る
+    python scripts/fake_calendar_notifier.py --guild-id 123456789 --user-id 987654321
+
+    # 送信先・通知の種類・件数を指定（連続通知がまとめて処理されることの確認）
+    python scripts/fake_calendar_notifier.py --guild-id 123456789 --user-id 987654321 \
+        --url http://localhost:8080/calendar/notifications --state exists --count 5
+"""
+
+import argparse
+import os
+import sys
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from calendar_push import notification_headers
+from firestore_manager import FirestoreManager
+
+
+def send(url: str, headers: dict) -> int:
+    """通知を1件 POST し、HTTP ステータスを返す"""
+    req = urllib.request.Request(url, data=b"", headers=headers, method="POST")
+    try:
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Google Calendar の変更通知をローカルの Bot に送る")
+    parser.add_argument("--guild-id", required=True, help="サーバーID")
+    parser.add_argument("--user-id", required=True, help="カレンダーオーナーの Discord ユーザーID")
+    parser.add_argument("--url", default="http://localhost:8080/calendar/notifications", help="送信先")
+    parser.add_argument("--state", default="exists", choices=["sync", "exists", "not_exists"], help="X-Goog-Resource-State")
+    parser.add_argument("--count", type=int, default=1, help="送信する通知の件数")
+    args = parser.parse_args()
+
+    db = FirestoreManager(project_id=os.getenv("GCP_PROJECT_ID"), use_snapshot_listeners=False)
+    tokens = db.get_oauth_tokens(args.guild_id, args.user_id)
+    watch = (tokens or {}).get("calendar_watch")
+    if not watch:
+        print("通知チャネルが登録されていません（CALENDAR_WEBHOOK_URL を設定して Bot を起動してください）")
+        sys.exit(1)
+
+    for number in range(1, args.count + 1):
+        status = send(args.url, notification_headers(watch, args.state, number))
+        print(f"#{number} {args.state} -> HTTP {status}")
+
+
+if __name__ == "__main__":
+    main()
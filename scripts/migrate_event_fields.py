@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""予定ドキュメントの配列系フィールドを JSON 文字列からネイティブ型へ移行するスクリプト
+
+schema_version が 2 未満の予定について tags / nth_weeks / monthly_dates /
+excluded_dates / google_calendar_events を Firestore の配列・マップに変換し、
+schema_version: 2 を付与する。何度実行しても結果は変わらない。
+
+使い方:
+    # 変換対象を表示するだけ（書き込みなし）
+    python scripts/migrate_event_fields.py --dry-run
+
+    # 全ギルドを移行
+    python scripts/migrate_event_fields.py
+
+    # 特定ギルドのみ移行
+    python scripts/migrate_event_fields.py --guild-id 123456789
+
+移行完了後は FIRESTORE_LEGACY_EVENT_FIELDS=false にして旧スキーマ向けの全件走査を止める。
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from google.cloud import firestore
+
+from firestore_manager import EVENT_ARRAY_FIELDS, EVENT_SCHEMA_VERSION, normalize_event_fields
+
+BATCH_SIZE = 400
+
+
+def migrate_events(db, events_query, dry_run=False):
+    """クエリ対象の予定を移行し、(確認件数, 変換件数) を返す"""
+    checked = 0
+    migrated = 0
+    batch = db.batch()
+    pending = 0
+
+    for doc in events_query.stream():
+        checked += 1
+        data = doc.to_dict() or {}
+        if data.get("schema_version", 1) >= EVENT_SCHEMA_VERSION:
+            continue
+
+        normalized = normalize_event_fields(dict(data))
+        updates = {field: normalized.get(field) for field in EVENT_ARRAY_FIELDS if field in data}
+        updates["schema_version"] = EVENT_SCHEMA_VERSION
+        migrated += 1
+
+        if dry_run:
+            print(f"  [DRY-RUN] {doc.reference.path}: {sorted(updates)}")
+            continue
+
+        batch.update(doc.reference, updates)
+        pending += 1
+        if pending >= BATCH_SIZE:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+
+    if pending:
+        batch.commit()
+    return checked, migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="予定フィールドのスキーマ移行")
+    parser.add_argument("--guild-id", help="移行対象のギルドID（省略時は全ギルド）")
+    parser.add_argument("--dry-run", action="store_true", help="書き込まずに対象を表示")
+    args = parser.parse_args()
+
+    project_id = os.getenv("GCP_PROJECT_ID")
+    if not project_id:
+        print("ERROR: GCP_PROJECT_ID が設定されていません (.env を確認してください)")
+        sys.exit(1)
+
+    db = firestore.Client(project=project_id)
+
+    if args.dry_run:
+        print("*** ドライランモード（書き込みは行いません） ***")
+
+    if args.guild_id:
+        query = db.collection("guilds").document(args.guild_id).collection("events")
+    else:
+        query = db.collection_group("events")
+
+    checked, migrated = migrate_events(db, query, dry_run=args.dry_run)
+    print(f"\n=== 確認: {checked}件 / 移行: {migrated}件 ===")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,428 @@
+"""テスト用のインメモリ Firestore フェイク
+
+firestore_manager.py が使う google.cloud.firestore の API サブセットのみを実装する。
+読み取り回数（read_count）を数えるので、キャッシュやクエリ削減の検証にも使える。
+"""
+import copy
+import sys
+import types
+from typing import Any, Callable, Dict, List, Optional
+
+
+class FieldFilter:
+    def __init__(self, field_path: str, op_string: str, value: Any):
+        self.field_path = field_path
+        self.op_string = op_string
+        self.value = value
+
+    def matches(self, data: dict) -> bool:
+        if self.field_path not in data:
+            return False
+        actual = data[self.field_path]
+        op = self.op_string
+        try:
+            if op == "==":
+                return actual == self.value
+            if op == "!=":
+                return actual != self.value
+            if op == "<":
+                return actual < self.value
+            if op == "<=":
+                return actual <= self.value
+            if op == ">":
+                return actual > self.value
+            if op == ">=":
+                return actual >= self.value
+            if op == "in":
+                return actual in self.value
+            if op == "array_contains":
+                return isinstance(actual, list) and self.value in actual
+            if op == "array_contains_any":
+                return isinstance(actual, list) and any(v in actual for v in self.value)
+        except TypeError:
+            return False
+        raise ValueError(f"unsupported operator: {op}")
+
+
+class Increment:
+    def __init__(self, value):
+        self.value = value
+
+
+class _Sentinel:
+    def __init__(self, name: str):
+        self.name = name
+
+
+DELETE_FIELD = _Sentinel("DELETE_FIELD")
+
+
+class Query:
+    ASCENDING = "ASCENDING"
+    DESCENDING = "DESCENDING"
+
+    def __init__(self, client: "Client", parent_path: Optional[str], group_id: Optional[str] = None):
+        self._client = client
+        self._parent_path = parent_path
+        self._group_id = group_id
+        self._filters: List[FieldFilter] = []
+        self._orders: List[tuple] = []
+        self._limit: Optional[int] = None
+        self._start_after: Optional[dict] = None
+        self._fields: Optional[List[str]] = None
+
+    def _copy(self) -> "Query":
+        q = Query(self._client, self._parent_path, self._group_id)
+        q._filters = list(self._filters)
+        q._orders = list(self._orders)
+        q._limit = self._limit
+        q._start_after = self._start_after
+        q._fields = self._fields
+        return q
+
+    def where(self, filter: FieldFilter = None, **kwargs) -> "Query":
+        q = self._copy()
+        q._filters.append(filter)
+        return q
+
+    def order_by(self, field_path: str, direction: str = "ASCENDING") -> "Query":
+        q = self._copy()
+        q._orders.append((field_path, direction))
+        return q
+
+    def limit(self, count: int) -> "Query":
+        q = self._copy()
+        q._limit = count
+        return q
+
+    def start_after(self, snapshot: "DocumentSnapshot") -> "Query":
+        q = self._copy()
+        q._start_after = snapshot
+        return q
+
+    def select(self, field_paths: List[str]) -> "Query":
+        q = self._copy()
+        q._fields = list(field_paths)
+        return q
+
+    def _matching_paths(self) -> List[str]:
+        paths = []
+        for path, data in self._client._docs.items():
+            parts = path.split("/")
+            parent = "/".join(parts[:-1])
+            if self._group_id is not None:
+                if parts[-2] != self._group_id:
+                    continue
+            elif parent != self._parent_path:
+                continue
+            if all(f.matches(data) for f in self._filters):
+                paths.append(path)
+        for field, direction in reversed(self._orders):
+            paths.sort(
+                key=lambda p: self._client._docs[p].get(field),
+                reverse=(direction == Query.DESCENDING),
+            )
+        if not self._orders:
+            paths.sort()
+        if self._start_after is not None:
+            after = self._start_after.reference.path
+            if after in paths:
+                paths = paths[paths.index(after) + 1:]
+        if self._limit is not None:
+            paths = paths[:self._limit]
+        return paths
+
+    def get(self, transaction=None) -> List["DocumentSnapshot"]:
+        snapshots = []
+        for path in self._matching_paths():
+            data = self._client._docs[path]
+            if self._fields is not None:
+                data = {k: v for k, v in data.items() if k in self._fields}
+            snapshots.append(DocumentSnapshot(DocumentReference(self._client, path), data))
+        self._client.read_count += max(1, len(snapshots))
+        self._client.query_count += 1
+        return snapshots
+
+    def stream(self, transaction=None):
+        return iter(self.get(transaction=transaction))
+
+    def on_snapshot(self, callback: Callable) -> "Watch":
+        watch = Watch(self, callback)
+        self._client._watches.append(watch)
+        watch._fire()
+        return watch
+
+
+class Watch:
+    def __init__(self, query: Query, callback: Callable):
+        self._query = query
+        self._callback = callback
+        self.active = True
+        self._last: Optional[dict] = None
+
+    def _fire(self):
+        if not self.active:
+            return
+        client = self._query._client
+        current = {p: copy.deepcopy(client._docs[p]) for p in self._query._matching_paths()}
+        # 実 Firestore 同様、クエリ結果が変わらない書き込みでは通知しない（初回は必ず通知）
+        if current == self._last:
+            return
+        self._last = current
+        docs = [DocumentSnapshot(DocumentReference(client, p), data) for p, data in current.items()]
+        self._callback(docs, [], None)
+
+    def unsubscribe(self):
+        self.active = False
+        if self in self._query._client._watches:
+            self._query._client._watches.remove(self)
+
+
+class CollectionReference(Query):
+    def __init__(self, client: "Client", path: str):
+        super().__init__(client, path)
+        self._path = path
+
+    @property
+    def id(self) -> str:
+        return self._path.split("/")[-1]
+
+    def document(self, document_id: Optional[str] = None) -> "DocumentReference":
+        if document_id is None:
+            self._client._auto_id += 1
+            document_id = f"auto{self._client._auto_id:06d}"
+        return DocumentReference(self._client, f"{self._path}/{document_id}")
+
+    def add(self, data: dict):
+        ref = self.document()
+        ref.set(data)
+        return None, ref
+
+
+class DocumentSnapshot:
+    def __init__(self, reference: "DocumentReference", data: Optional[dict]):
+        self.reference = reference
+        self._data = dict(data) if data is not None else None
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[dict]:
+        # 実クライアント同様、呼び出し側での変更が保存データに波及しないようにする
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field: str):
+        return self._data[field]
+
+
+def _apply_updates(target: dict, updates: dict):
+    for key, value in updates.items():
+        if value is DELETE_FIELD:
+            target.pop(key, None)
+        elif isinstance(value, Increment):
+            target[key] = (target.get(key) or 0) + value.value
+        else:
+            target[key] = copy.deepcopy(value)
+
+
+def _split_field_path(field_path: str) -> List[str]:
+    """"a.`12`.b" -> ["a", "12", "b"]（バッククォートで囲んだ部分はそのまま1要素）"""
+    parts, current, quoted = [], "", False
+    for ch in field_path:
+        if ch == "`":
+            quoted = not quoted
+        elif ch == "." and not quoted:
+            parts.append(current)
+            current = ""
+        else:
+            current += ch
+    parts.append(current)
+    return parts
+
+
+def _apply_field_path_updates(target: dict, updates: dict):
+    """update() 用: キーをフィールドパスとして解釈し、ネストしたマップを書き換える"""
+    for key, value in updates.items():
+        *parents, leaf = _split_field_path(key)
+        node = target
+        for name in parents:
+            child = node.get(name)
+            if not isinstance(child, dict):
+                child = {}
+                node[name] = child
+            node = child
+        _apply_updates(node, {leaf: value})
+
+
+class DocumentReference:
+    def __init__(self, client: "Client", path: str):
+        self._client = client
+        self.path = path
+
+    @property
+    def id(self) -> str:
+        return self.path.split("/")[-1]
+
+    def collection(self, name: str) -> CollectionReference:
+        return CollectionReference(self._client, f"{self.path}/{name}")
+
+    def get(self, transaction=None, field_paths=None) -> DocumentSnapshot:
+        self._client.read_count += 1
+        return DocumentSnapshot(self, self._client._docs.get(self.path))
+
+    def set(self, data: dict, merge=False):
+        self._client._write_count += 1
+        if isinstance(merge, list):
+            # フィールドマスク指定時は列挙したフィールドだけを書き込む
+            data = {k: v for k, v in data.items() if k in merge}
+        if merge and self.path in self._client._docs:
+            _apply_updates(self._client._docs[self.path], data)
+        else:
+            new_doc: dict = {}
+            _apply_updates(new_doc, data)
+            self._client._docs[self.path] = new_doc
+        self._client._notify()
+
+    def update(self, data: dict):
+        if self.path not in self._client._docs:
+            raise NotFound(f"No document to update: {self.path}")
+        self._client._write_count += 1
+        _apply_field_path_updates(self._client._docs[self.path], data)
+        self._client._notify()
+
+    def delete(self):
+        self._client._write_count += 1
+        self._client._docs.pop(self.path, None)
+        self._client._notify()
+
+
+class NotFound(Exception):
+    pass
+
+
+class WriteBatch:
+    def __init__(self, client: "Client"):
+        self._client = client
+        self._ops: List[Callable] = []
+
+    def set(self, ref: DocumentReference, data: dict, merge=False):
+        self._ops.append(lambda: ref.set(data, merge=merge))
+
+    def update(self, ref: DocumentReference, data: dict):
+        self._ops.append(lambda: ref.update(data))
+
+    def delete(self, ref: DocumentReference):
+        self._ops.append(ref.delete)
+
+    def commit(self):
+        self._client.commit_count += 1
+        with self._client._batched():
+            for op in self._ops:
+                op()
+        self._ops = []
+
+
+class Transaction(WriteBatch):
+    pass
+
+
+def transactional(func: Callable) -> Callable:
+    def wrapper(transaction: Transaction, *args, **kwargs):
+        result = func(transaction, *args, **kwargs)
+        transaction.commit()
+        return result
+    return wrapper
+
+
+class Client:
+    def __init__(self, project: Optional[str] = None, **kwargs):
+        self.project = project
+        self._docs: Dict[str, dict] = {}
+        self._watches: List[Watch] = []
+        self._auto_id = 0
+        self._write_count = 0
+        self._batch_depth = 0
+        self.read_count = 0
+        self.query_count = 0
+        self.commit_count = 0
+
+    def collection(self, name: str) -> CollectionReference:
+        return CollectionReference(self, name)
+
+    def collection_group(self, collection_id: str) -> Query:
+        return Query(self, None, group_id=collection_id)
+
+    def document(self, path: str) -> DocumentReference:
+        return DocumentReference(self, path)
+
+    def batch(self) -> WriteBatch:
+        return WriteBatch(self)
+
+    def transaction(self) -> Transaction:
+        return Transaction(self)
+
+    def get_all(self, references, field_paths=None, transaction=None):
+        for ref in references:
+            yield ref.get()
+
+    def reset_counters(self):
+        self.read_count = 0
+        self.query_count = 0
+        self.commit_count = 0
+        self._write_count = 0
+
+    def _batched(self):
+        client = self
+
+        class _Ctx:
+            def __enter__(self):
+                client._batch_depth += 1
+
+            def __exit__(self, *exc):
+                client._batch_depth -= 1
+                client._notify()
+        return _Ctx()
+
+    def _notify(self):
+        if self._batch_depth:
+            return
+        for watch in list(self._watches):
+            watch._fire()
+
+
+def build_module() -> types.ModuleType:
+    """google.cloud.firestore 互換のモジュールオブジェクトを組み立てる"""
+    module = types.ModuleType("google.cloud.firestore")
+    module.Client = Client
+    module.FieldFilter = FieldFilter
+    module.Query = Query
+    module.Increment = Increment
+    module.DELETE_FIELD = DELETE_FIELD
+    module.transactional = transactional
+    module.WriteBatch = WriteBatch
+    return module
+
+
+def install() -> types.ModuleType:
+    """google.cloud.firestore がローカルにない場合にフェイクを sys.modules へ登録する"""
+    try:
+        from google.cloud import firestore  # noqa: F401
+        return build_module()
+    except ImportError:
+        pass
+    module = build_module()
+    google_pkg = sys.modules.setdefault("google", types.ModuleType("google"))
+    if not hasattr(google_pkg, "__path__"):
+        google_pkg.__path__ = []
+    cloud_pkg = sys.modules.setdefault("google.cloud", types.ModuleType("google.cloud"))
+    if not hasattr(cloud_pkg, "__path__"):
+        cloud_pkg.__path__ = []
+    cloud_pkg.firestore = module
+    google_pkg.cloud = cloud_pkg
+    sys.modules["google.cloud.firestore"] = module
+    return module
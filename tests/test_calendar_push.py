@@ -0,0 +1,92 @@
+"""calendar_push.py のユニットテスト"""
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from calendar_push import (
+    WATCH_RENEW_BEFORE, make_channel_id, make_channel_token, needs_renewal,
+    notification_headers, parse_channel_id, parse_notification, receive_notification,
+    verify_notification, watch_from_response,
+)
+
+
+def _watch(guild_id="111", user_id="222", calendar_id="primary", expires_in=timedelta(days=7)):
+    expiration = datetime.now(timezone.utc) + expires_in
+    response = {
+        "id": make_channel_id(guild_id, user_id),
+        "resourceId": "res-1",
+        "expiration": str(int(expiration.timestamp() * 1000)),
+    }
+    return watch_from_response(response, make_channel_token(), calendar_id)
+
+
+class TestChannelId(unittest.TestCase):
+    def test_round_trip(self):
+        self.assertEqual(parse_channel_id(make_channel_id("111", "222")), ("111", "222"))
+
+    def test_foreign_channel(self):
+        self.assertIsNone(parse_channel_id("other-channel"))
+        self.assertIsNone(parse_channel_id("vrccal--222-abcd"))
+
+
+class TestNotification(unittest.TestCase):
+    def test_fake_notifier_headers_are_verified(self):
+        watch = _watch()
+        notification = parse_notification(notification_headers(watch, "exists", 3))
+        self.assertEqual((notification.guild_id, notification.user_id), ("111", "222"))
+        self.assertEqual(notification.resource_state, "exists")
+        self.assertEqual(notification.message_number, 3)
+        self.assertTrue(verify_notification(notification, watch))
+
+    def test_wrong_token_or_stale_channel_is_rejected(self):
+        watch = _watch()
+        forged = parse_notification({**notification_headers(watch), "X-Goog-Channel-Token": "forged"})
+        self.assertFalse(verify_notification(forged, watch))
+        # 張り替え前の古いチャネルからの通知
+        old = parse_notification(notification_headers(_watch()))
+        self.assertFalse(verify_notification(old, watch))
+        self.assertFalse(verify_notification(parse_notification(notification_headers(watch)), None))
+
+    def test_non_ascii_token_is_rejected(self):
+        watch = _watch()
+        forged = parse_notification({**notification_headers(watch), "X-Goog-Channel-Token": "偽のトークン"})
+        self.assertFalse(verify_notification(forged, watch))
+
+    def test_non_calendar_request(self):
+        self.assertIsNone(parse_notification({}))
+        self.assertIsNone(parse_notification({"X-Goog-Channel-ID": make_channel_id("1", "2")}))
+
+
+class TestReceiveNotification(unittest.TestCase):
+    """/calendar/notifications の処理本体"""
+
+    def test_dispatches_calendar_notifications(self):
+        watch = _watch()
+        received = []
+        body, status = receive_notification(notification_headers(watch), received.append)
+        self.assertEqual((body, status), ("", 200))
+        self.assertTrue(verify_notification(received[0], watch))
+
+    def test_forged_non_ascii_token_is_acknowledged_and_rejected(self):
+        """非ASCII のトークンでも例外にならず、応答後の検証で弾かれる"""
+        watch = _watch()
+        headers = {**notification_headers(watch), "X-Goog-Channel-Token": "tökën"}
+        received = []
+        self.assertEqual(receive_notification(headers, received.append)[1], 200)
+        self.assertFalse(verify_notification(received[0], watch))
+
+    def test_non_calendar_request_is_bad_request(self):
+        received = []
+        self.assertEqual(receive_notification({}, received.append)[1], 400)
+        self.assertEqual(received, [])
+
+
+class TestNeedsRenewal(unittest.TestCase):
+    def test_renewal_conditions(self):
+        self.assertTrue(needs_renewal(None, "primary"))
+        self.assertFalse(needs_renewal(_watch(), "primary"))
+        self.assertTrue(needs_renewal(_watch(), "other@group.calendar.google.com"))
+        self.assertTrue(needs_renewal(_watch(expires_in=WATCH_RENEW_BEFORE - timedelta(minutes=1)), "primary"))
+
+
+if __name__ == "__main__":
+    unittest.main()
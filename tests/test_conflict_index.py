@@ -0,0 +1,64 @@
+"""conflict_index.py のユニットテスト"""
+import unittest
+
+from conflict_index import ConflictIndex, occurrence_interval
+
+
+class TestOccurrenceInterval(unittest.TestCase):
+    def test_interval_in_minutes(self):
+        start, end = occurrence_interval("2026-01-07", "21:00", 90)
+        self.assertEqual(end - start, 90)
+
+    def test_crosses_midnight(self):
+        late = occurrence_interval("2026-01-07", "23:30", 60)
+        next_day = occurrence_interval("2026-01-08", "00:00", 30)
+        self.assertGreater(late[1], next_day[0])
+
+    def test_missing_or_invalid_time(self):
+        self.assertIsNone(occurrence_interval("2026-01-07", None, 60))
+        self.assertIsNone(occurrence_interval("2026-01-07", "25:99", 60))
+
+    def test_default_duration(self):
+        start, end = occurrence_interval("2026-01-07", "21:00", None)
+        self.assertEqual(end - start, 60)
+
+
+class TestConflictIndex(unittest.TestCase):
+    def _interval(self, date, time, minutes=60):
+        return occurrence_interval(date, time, minutes)
+
+    def test_overlap_and_adjacent(self):
+        index = ConflictIndex()
+        index.insert("a", [self._interval("2026-01-07", "21:00")])
+        self.assertEqual(len(index.overlapping(*self._interval("2026-01-07", "21:30"))), 1)
+        # 終了時刻ちょうどに始まる予定は重ならない
+        self.assertEqual(index.overlapping(*self._interval("2026-01-07", "22:00")), [])
+        self.assertEqual(index.overlapping(*self._interval("2026-01-07", "20:00")), [])
+
+    def test_long_interval_started_earlier_is_found(self):
+        index = ConflictIndex()
+        index.insert("long", [self._interval("2026-01-07", "18:00", 300)])
+        index.insert("short", [self._interval("2026-01-07", "19:00", 30)])
+        keys = [key for _, _, key in index.overlapping(*self._interval("2026-01-07", "22:00"))]
+        self.assertEqual(keys, ["long"])
+
+    def test_insert_replaces_and_remove(self):
+        index = ConflictIndex()
+        index.insert("a", [self._interval("2026-01-07", "21:00"), self._interval("2026-01-14", "21:00")])
+        index.insert("a", [self._interval("2026-01-08", "21:00")])
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.overlapping(*self._interval("2026-01-07", "21:00")), [])
+        index.remove("a")
+        self.assertEqual(len(index), 0)
+        self.assertNotIn("a", index)
+
+    def test_exclude_key(self):
+        index = ConflictIndex()
+        index.insert("a", [self._interval("2026-01-07", "21:00")])
+        index.insert("b", [self._interval("2026-01-07", "21:00")])
+        keys = [key for _, _, key in index.overlapping(*self._interval("2026-01-07", "21:00"), exclude="a")]
+        self.assertEqual(keys, ["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,822 @@
+"""firestore_manager.py のユニットテスト（インメモリのフェイク Firestore を使用）"""
+import asyncio
+import threading
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from tests import fake_firestore
+
+fake_module = fake_firestore.install()
+
+import firestore_manager  # noqa: E402
+from firestore_manager import AsyncFirestoreManager, FirestoreManager  # noqa: E402
+
+
+def _make_manager(**kwargs) -> FirestoreManager:
+    """フェイク Firestore クライアントで FirestoreManager を生成（FirestoreManagerTestCase 内で呼ぶ）"""
+    return FirestoreManager(**kwargs)
+
+
+def _add(mgr: FirestoreManager, guild_id: str, name: str, **kwargs) -> int:
+    params = dict(
+        guild_id=guild_id,
+        event_name=name,
+        tags=[],
+        recurrence="weekly",
+        nth_weeks=None,
+        event_type=None,
+        time="21:00",
+        weekday=2,
+    )
+    params.update(kwargs)
+    return mgr.add_event(**params)
+
+
+class FirestoreManagerTestCase(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(firestore_manager, "firestore", fake_module)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestActiveEventCache(FirestoreManagerTestCase):
+    def test_repeated_reads_hit_cache(self):
+        mgr = _make_manager()
+        _add(mgr, "g1", "集会A")
+        mgr.get_all_active_events("g1")
+        mgr.db.reset_counters()
+        for _ in range(5):
+            events = mgr.get_all_active_events("g1")
+        self.assertEqual(len(events), 1)
+        self.assertEqual(mgr.db.read_count, 0)
+
+    def test_write_through_add_update_delete(self):
+        mgr = _make_manager(use_snapshot_listeners=False)
+        mgr.get_all_active_events("g1")
+        event_id = _add(mgr, "g1", "集会A")
+        self.assertEqual([e["event_name"] for e in mgr.get_all_active_events("g1")], ["集会A"])
+
+        mgr.update_event(event_id, {"event_name": "集会B"})
+        self.assertEqual(mgr.get_all_active_events("g1")[0]["event_name"], "集会B")
+
+        mgr.delete_event(event_id)
+        self.assertEqual(mgr.get_all_active_events("g1"), [])
+
+    def test_snapshot_listener_picks_up_external_writes(self):
+        mgr = _make_manager()
+        mgr.get_all_active_events("g1")
+        # 別プロセスからの書き込みを模擬
+        mgr.db.collection("guilds").document("g1").collection("events").document("999").set({
+            "id": 999, "guild_id": "g1", "event_name": "外部", "is_active": True,
+        })
+        names = [e["event_name"] for e in mgr.get_all_active_events("g1")]
+        self.assertEqual(names, ["外部"])
+
+    def test_returned_events_are_copies(self):
+        mgr = _make_manager()
+        _add(mgr, "g1", "集会A")
+        mgr.get_all_active_events("g1")[0]["event_name"] = "改変"
+        self.assertEqual(mgr.get_all_active_events("g1")[0]["event_name"], "集会A")
+
+    def test_lru_eviction_unsubscribes_idle_guild(self):
+        mgr = _make_manager(event_cache_size=2)
+        for gid in ("g1", "g2", "g3"):
+            mgr.get_all_active_events(gid)
+        self.assertEqual(list(mgr._event_cache.keys()), ["g2", "g3"])
+        self.assertNotIn("g1", mgr._event_watches)
+        self.assertEqual(len(mgr.db._watches), 2)
+
+    def test_invalidate_clears_cache(self):
+        mgr = _make_manager()
+        mgr.get_all_active_events("g1")
+        mgr.invalidate_event_cache()
+        self.assertEqual(len(mgr._event_cache), 0)
+        self.assertEqual(mgr.db._watches, [])
+
+
+class TestEventRefLookup(FirestoreManagerTestCase):
+    def test_guild_aware_lookup_skips_query(self):
+        mgr = _make_manager()
+        event_id = _add(mgr, "g1", "集会A")
+        mgr.db.reset_counters()
+        mgr.update_event(event_id, {"time": "22:00"}, guild_id="g1")
+        self.assertEqual(mgr.db.query_count, 0)
+        doc = mgr.db.document(f"guilds/g1/events/{event_id}").get().to_dict()
+        self.assertEqual(doc["time"], "22:00")
+
+    def test_path_index_avoids_collection_group_query(self):
+        mgr = _make_manager()
+        event_id = _add(mgr, "g1", "集会A")
+        mgr.db.reset_counters()
+        mgr.delete_event(event_id)
+        self.assertEqual(mgr.db.query_count, 0)
+        self.assertFalse(mgr.db.document(f"guilds/g1/events/{event_id}").get().to_dict()["is_active"])
+
+    def test_unknown_id_falls_back_to_collection_group(self):
+        mgr = _make_manager()
+        mgr.db.collection("guilds").document("g2").collection("events").document("42").set({
+            "id": 42, "guild_id": "g2", "event_name": "外部", "is_active": True,
+        })
+        ref = mgr._find_event_ref(42)
+        self.assertEqual(ref.path, "guilds/g2/events/42")
+        mgr.db.reset_counters()
+        mgr._find_event_ref(42)
+        self.assertEqual(mgr.db.query_count, 0)
+
+    def test_missing_id_is_ignored(self):
+        for cached in (False, True):
+            with self.subTest(cached=cached):
+                mgr = _make_manager(use_snapshot_listeners=False)
+                _add(mgr, "g1", "集会A")
+                if cached:
+                    mgr.get_all_active_events("g1")
+                mgr.update_event(404, {"time": "22:00"}, guild_id="g1")
+                mgr.add_excluded_date(404, "2026-01-07", guild_id="g1")
+                mgr.remove_excluded_date(404, "2026-01-07", guild_id="g1")
+                mgr.update_google_calendar_events(404, [{"event_id": "x"}], guild_id="g1")
+                mgr.delete_event(404, guild_id="g1")
+                self.assertFalse(mgr.db.document("guilds/g1/events/404").get().exists)
+
+    def test_inactive_id_is_not_modified(self):
+        for cached in (False, True):
+            with self.subTest(cached=cached):
+                mgr = _make_manager(use_snapshot_listeners=False)
+                event_id = _add(mgr, "g1", "集会A")
+                mgr.delete_event(event_id, guild_id="g1")
+                if cached:
+                    mgr.get_all_active_events("g1")
+                before = mgr.db.document(f"guilds/g1/events/{event_id}").get().to_dict()
+                mgr.update_event(event_id, {"time": "22:00"}, guild_id="g1")
+                mgr.add_excluded_date(event_id, "2026-01-07", guild_id="g1")
+                mgr.update_google_calendar_events(event_id, [{"event_id": "x"}], guild_id="g1")
+                mgr.delete_event(event_id, guild_id="g1")
+                self.assertEqual(mgr.db.document(f"guilds/g1/events/{event_id}").get().to_dict(), before)
+
+
+class TestIdBlockAllocation(FirestoreManagerTestCase):
+    def test_one_transaction_per_block(self):
+        mgr = _make_manager(id_block_size=50)
+        ids = [mgr._next_id("events") for _ in range(50)]
+        self.assertEqual(ids, list(range(1, 51)))
+        self.assertEqual(mgr.db.commit_count, 1)
+        self.assertEqual(mgr.db.document("counters/events").get().get("current"), 50)
+
+        self.assertEqual(mgr._next_id("events"), 51)
+        self.assertEqual(mgr.db.commit_count, 2)
+
+    def test_processes_get_disjoint_blocks(self):
+        mgr1 = _make_manager(id_block_size=10)
+        mgr2 = _make_manager(id_block_size=10)
+        mgr2.db = mgr1.db  # 同じ Firestore を共有する別プロセスを模擬
+        a = {mgr1._next_id("events") for _ in range(5)}
+        b = {mgr2._next_id("events") for _ in range(5)}
+        self.assertFalse(a & b)
+        self.assertEqual(min(b), 11)
+
+    def test_counters_are_independent(self):
+        mgr = _make_manager(id_block_size=5)
+        self.assertEqual(mgr._next_id("events"), 1)
+        self.assertEqual(mgr._next_id("tags"), 1)
+        self.assertEqual(mgr._next_id("events"), 2)
+
+
+class TestIrregularSearch(FirestoreManagerTestCase):
+    def _add_irregular(self, mgr, guild_id, name, dates):
+        event_id = _add(mgr, guild_id, name, recurrence="irregular", weekday=None)
+        irr_ref = mgr.db.collection("guilds").document(guild_id).collection("irregular_events")
+        for date in dates:
+            irr_ref.add({"event_id": event_id, "event_date": date, "event_time": "20:00"})
+        return event_id
+
+    def test_single_query_for_all_irregular_events(self):
+        mgr = _make_manager()
+        for i in range(40):
+            self._add_irregular(mgr, "g1", f"不定期{i}", ["2025-01-08", "2025-02-01"])
+        mgr.get_all_active_events("g1")
+        mgr.db.reset_counters()
+
+        result = mgr.search_events(
+            start_date=datetime(2025, 1, 6), end_date=datetime(2025, 1, 12, 23, 59), guild_id="g1",
+        )
+        self.assertEqual(len(result), 40)
+        self.assertTrue(all(e["date"] == "2025-01-08" and e["time"] == "20:00" for e in result))
+        self.assertEqual(mgr.db.query_count, 1)
+
+    def test_occurrences_are_joined_per_guild(self):
+        mgr = _make_manager()
+        event_id = self._add_irregular(mgr, "g1", "g1の予定", ["2025-01-08"])
+        # 別ギルドに同じ event_id を指す日時があっても混ざらない
+        mgr.db.collection("guilds").document("g2").collection("irregular_events").add(
+            {"event_id": event_id, "event_date": "2025-01-09", "event_time": "20:00"}
+        )
+        result = mgr.search_events(
+            start_date=datetime(2025, 1, 6), end_date=datetime(2025, 1, 12, 23, 59),
+        )
+        self.assertEqual([e["date"] for e in result], ["2025-01-08"])
+
+    def test_inactive_event_occurrences_are_skipped(self):
+        mgr = _make_manager()
+        event_id = self._add_irregular(mgr, "g1", "削除済み", ["2025-01-08"])
+        mgr.delete_event(event_id, guild_id="g1")
+        result = mgr.search_events(
+            start_date=datetime(2025, 1, 6), end_date=datetime(2025, 1, 12, 23, 59), guild_id="g1",
+        )
+        self.assertEqual(result, [])
+
+
+class TestEventSchema(FirestoreManagerTestCase):
+    def _put_legacy(self, mgr, guild_id, event_id, **fields):
+        data = {
+            "id": event_id, "guild_id": guild_id, "event_name": f"旧{event_id}", "is_active": True,
+            "recurrence": "weekly", "weekday": 2, "time": "21:00",
+            "tags": '["VRChat"]', "nth_weeks": None, "excluded_dates": "[]",
+            "google_calendar_events": '[{"event_id": "abc", "rrule": "RRULE:FREQ=WEEKLY"}]',
+        }
+        data.update(fields)
+        mgr.db.document(f"guilds/{guild_id}/events/{event_id}").set(data)
+
+    def test_new_events_are_stored_natively(self):
+        mgr = _make_manager()
+        event_id = _add(mgr, "g1", "集会A", tags=["VRChat", "雑談"], monthly_dates=[1, 15])
+        doc = mgr.db.document(f"guilds/g1/events/{event_id}").get().to_dict()
+        self.assertEqual(doc["tags"], ["VRChat", "雑談"])
+        self.assertEqual(doc["monthly_dates"], [1, 15])
+        self.assertEqual(doc["schema_version"], firestore_manager.EVENT_SCHEMA_VERSION)
+
+        mgr.update_google_calendar_events(event_id, [{"event_id": "x", "rrule": "R"}], guild_id="g1")
+        mgr.add_excluded_date(event_id, "2025-01-08", guild_id="g1")
+        doc = mgr.db.document(f"guilds/g1/events/{event_id}").get().to_dict()
+        self.assertEqual(doc["google_calendar_events"], [{"event_id": "x", "rrule": "R"}])
+        self.assertEqual(doc["excluded_dates"], ["2025-01-08"])
+
+    def test_fingerprint_save_keeps_updated_at(self):
+        """同期が指紋だけを保存しても updated_at は進まない（増分同期の照合対象に戻らない）"""
+        mgr = _make_manager()
+        event_id = _add(mgr, "g1", "集会A")
+        before = mgr.get_all_active_events("g1")[0]["updated_at"]
+        google_events = [{"event_id": "x", "rrule": "R", "expected": {"hash": "h"}}]
+        mgr.update_google_calendar_events(event_id, google_events, guild_id="g1", touch_updated_at=False)
+        doc = mgr.db.document(f"guilds/g1/events/{event_id}").get().to_dict()
+        self.assertEqual(doc["google_calendar_events"], google_events)
+        self.assertEqual(doc["updated_at"], before)
+        self.assertEqual(mgr.get_all_active_events("g1")[0]["updated_at"], before)
+
+    def test_legacy_json_strings_are_normalized_on_read(self):
+        mgr = _make_manager()
+        self._put_legacy(mgr, "g1", 7)
+        event = mgr.get_all_active_events("g1")[0]
+        self.assertEqual(event["tags"], ["VRChat"])
+        self.assertEqual(event["excluded_dates"], [])
+        self.assertEqual(event["google_calendar_events"][0]["event_id"], "abc")
+
+        mgr.add_excluded_date(7, "2025-01-08", guild_id="g1")
+        doc = mgr.db.document("guilds/g1/events/7").get().to_dict()
+        self.assertEqual(doc["excluded_dates"], ["2025-01-08"])
+
+    def test_search_events_filters_by_tag_for_both_schemas(self):
+        mgr = _make_manager()
+        self._put_legacy(mgr, "g1", 7)
+        _add(mgr, "g1", "新", tags=["VRChat"])
+        _add(mgr, "g1", "無関係", tags=["その他"])
+        result = mgr.search_events(
+            start_date=datetime(2025, 1, 6), end_date=datetime(2025, 1, 12, 23, 59),
+            guild_id="g1", tags=["VRChat"],
+        )
+        self.assertEqual(sorted(e["event_name"] for e in result), ["新", "旧7"])
+
+    def test_get_events_by_tag_uses_array_contains_after_migration(self):
+        mgr = _make_manager(legacy_event_fields=False)
+        _add(mgr, "g1", "新", tags=["VRChat"])
+        _add(mgr, "g1", "無関係", tags=["その他"])
+        mgr.invalidate_event_cache()
+        mgr.db.reset_counters()
+        result = mgr.get_events_by_tag("g1", "VRChat")
+        self.assertEqual([e["event_name"] for e in result], ["新"])
+        self.assertEqual(mgr.db.read_count, 1)
+
+    def test_get_events_by_tag_includes_legacy_events_during_rollout(self):
+        mgr = _make_manager()
+        self._put_legacy(mgr, "g1", 7)
+        _add(mgr, "g1", "新", tags=["VRChat"])
+        names = sorted(e["event_name"] for e in mgr.get_events_by_tag("g1", "VRChat"))
+        self.assertEqual(names, ["新", "旧7"])
+
+    def test_returned_lists_do_not_alias_cache(self):
+        mgr = _make_manager()
+        _add(mgr, "g1", "集会A", tags=["VRChat"])
+        mgr.get_all_active_events("g1")[0]["tags"].append("改変")
+        self.assertEqual(mgr.get_all_active_events("g1")[0]["tags"], ["VRChat"])
+
+
+class TestProjection(FirestoreManagerTestCase):
+    def test_uncached_guild_reads_only_selected_fields(self):
+        mgr = _make_manager()
+        _add(mgr, "g1", "集会A", description="長い説明" * 100)
+        mgr.invalidate_event_cache()
+        events = mgr.get_all_active_events("g1", fields=["event_name"])
+        self.assertEqual(set(events[0]), {"id", "created_at", "event_name"})
+        # 部分ドキュメントはキャッシュに載せない
+        self.assertNotIn("g1", mgr._event_cache)
+
+    def test_cached_guild_is_projected_without_reads(self):
+        mgr = _make_manager()
+        _add(mgr, "g1", "集会A", tags=["VRChat"])
+        mgr.get_all_active_events("g1")
+        mgr.db.reset_counters()
+        events = mgr.get_all_active_events("g1", fields=["event_name", "tags"])
+        self.assertEqual(mgr.db.read_count, 0)
+        self.assertEqual(events[0]["tags"], ["VRChat"])
+        self.assertNotIn("description", events[0])
+
+    def test_list_tag_groups_projection(self):
+        mgr = _make_manager()
+        mgr.add_tag_group("g1", "ジャンル", description="説明")
+        groups = mgr.list_tag_groups("g1", fields=["name"])
+        self.assertEqual(groups, [{"id": groups[0]["id"], "name": "ジャンル"}])
+
+
+class TestUnitOfWork(FirestoreManagerTestCase):
+    def _register(self, uow):
+        event_id = _add(uow, "g1", "集会A")
+        uow.update_google_calendar_events(event_id, [{"event_id": "gid", "rrule": "R"}], guild_id="g1")
+        uow.add_event_history(
+            guild_id="g1", event_id=event_id, event_name="集会A",
+            action="add", changed_by="u1", changes={"summary": "新規登録"},
+        )
+        return event_id
+
+    def test_add_flow_commits_in_one_batch(self):
+        mgr = _make_manager(id_block_size=50)
+        mgr._next_id("events")  # ID ブロックを確保済みの状態にする
+        mgr.db.reset_counters()
+
+        uow = mgr.unit_of_work()
+        event_id = self._register(uow)
+        self.assertEqual(mgr.db._write_count, 0)
+        uow.commit()
+
+        self.assertEqual(mgr.db.commit_count, 1)
+        self.assertEqual(mgr.db.query_count, 0)
+        doc = mgr.db.document(f"guilds/g1/events/{event_id}").get().to_dict()
+        self.assertEqual(doc["google_calendar_events"], [{"event_id": "gid", "rrule": "R"}])
+        self.assertEqual(len(mgr.get_event_history("g1", event_id=event_id)), 1)
+
+    def test_commit_updates_cache(self):
+        mgr = _make_manager(use_snapshot_listeners=False)
+        mgr.get_all_active_events("g1")
+        uow = mgr.unit_of_work()
+        event_id = self._register(uow)
+        self.assertEqual(mgr.get_all_active_events("g1"), [])
+        uow.commit()
+        events = mgr.get_all_active_events("g1")
+        self.assertEqual([e["id"] for e in events], [event_id])
+        self.assertEqual(events[0]["google_calendar_events"][0]["event_id"], "gid")
+
+    def test_updates_existing_event(self):
+        mgr = _make_manager()
+        event_id = _add(mgr, "g1", "集会A")
+        uow = mgr.unit_of_work()
+        uow.update_google_calendar_events(event_id, [{"event_id": "gid", "rrule": "R"}], guild_id="g1")
+        uow.commit()
+        doc = mgr.db.document(f"guilds/g1/events/{event_id}").get().to_dict()
+        self.assertEqual(doc["google_calendar_events"][0]["event_id"], "gid")
+
+    def test_empty_commit_and_double_commit(self):
+        mgr = _make_manager()
+        uow = mgr.unit_of_work()
+        uow.commit()
+        self.assertEqual(mgr.db.commit_count, 0)
+        with self.assertRaises(RuntimeError):
+            uow.commit()
+
+
+class TestHistoryCompaction(FirestoreManagerTestCase):
+    def _history(self, mgr, event_id, n, guild_id="g1"):
+        for i in range(n):
+            mgr.add_event_history(
+                guild_id=guild_id, event_id=event_id, event_name="集会A",
+                action="edit", changed_by="u1", changes={"i": i},
+            )
+
+    def _history_count(self, mgr, event_id, guild_id="g1"):
+        return sum(
+            1 for p, d in mgr.db._docs.items()
+            if p.startswith(f"guilds/{guild_id}/event_history/") and d["event_id"] == event_id
+        )
+
+    def test_add_history_does_not_query(self):
+        mgr = _make_manager()
+        mgr.db.reset_counters()
+        self._history(mgr, 1, 3)
+        self.assertEqual(mgr.db.query_count, 0)
+        self.assertEqual(mgr.db.commit_count, 3)
+        counter = mgr.db.document("guilds/g1/event_history_counters/1").get().to_dict()
+        self.assertEqual(counter, {"event_id": 1, "count": 3})
+
+    def test_compaction_only_touches_events_over_cap(self):
+        mgr = _make_manager()
+        self._history(mgr, 1, 8)
+        self._history(mgr, 2, 3, guild_id="g2")
+        deleted = mgr.compact_event_history(keep_count=5)
+        self.assertEqual(deleted, 3)
+        self.assertEqual(self._history_count(mgr, 1), 5)
+        self.assertEqual(self._history_count(mgr, 2, guild_id="g2"), 3)
+        self.assertEqual(mgr.db.document("guilds/g1/event_history_counters/1").get().get("count"), 5)
+
+        mgr.db.reset_counters()
+        self.assertEqual(mgr.compact_event_history(keep_count=5), 0)
+        self.assertEqual(mgr.db.query_count, 1)
+
+
+class TestGuildConfigSnapshot(FirestoreManagerTestCase):
+    def _setup_guild(self, mgr):
+        mgr.save_oauth_tokens(
+            guild_id="g1", access_token="at", refresh_token="rt", token_expiry="",
+            calendar_id="primary", authenticated_by="u1", authenticated_at="", display_name="メイン",
+        )
+        group_id = mgr.add_tag_group("g1", "ジャンル")
+        mgr.add_tag("g1", group_id, "雑談")
+        mgr.add_color_preset("g1", "u1", "青", "9")
+        return group_id
+
+    def test_snapshot_read_is_single_document(self):
+        mgr = _make_manager()
+        self._setup_guild(mgr)
+        # 設定変更後の最初の読み取りでスナップショットが作り直される
+        mgr.get_guild_config("g1")
+        mgr.db.reset_counters()
+        config = mgr.get_guild_config("g1")
+        self.assertEqual(mgr.db.read_count, 1)
+        self.assertEqual([g["name"] for g in config["tag_groups"]], ["ジャンル"])
+        self.assertEqual([t["name"] for t in config["tags"]], ["雑談"])
+        self.assertEqual([p["name"] for p in config["color_presets_by_calendar"]["メイン"]], ["青"])
+        self.assertEqual(config["calendars"][0]["display_name"], "メイン")
+        self.assertNotIn("access_token", config["calendars"][0])
+
+    def test_mutations_refresh_snapshot(self):
+        mgr = _make_manager()
+        group_id = self._setup_guild(mgr)
+        mgr.delete_tag("g1", group_id, "雑談")
+        mgr.delete_oauth_tokens("g1", "u1")
+        config = mgr.get_guild_config("g1")
+        self.assertEqual(config["tags"], [])
+        self.assertEqual(config["calendars"], [])
+        self.assertEqual(config["color_presets_by_calendar"], {})
+
+    def test_mutations_only_bump_version(self):
+        mgr = _make_manager()
+        group_id = self._setup_guild(mgr)
+        version = mgr.get_guild_config("g1")["version"]
+        for name in ("ゲーム", "音楽", "作業"):
+            mgr.add_tag("g1", group_id, name)
+        # 変更のたびにスナップショットを組み立て直さず、次回の読み取りで1回だけ作り直す
+        guild_doc = mgr.db.document("guilds/g1").get().to_dict()
+        self.assertEqual(guild_doc["config_snapshot"]["version"], version)
+        self.assertEqual(guild_doc["config_version"], version + 3)
+        config = mgr.get_guild_config("g1")
+        self.assertEqual(config["version"], version + 3)
+        self.assertEqual({t["name"] for t in config["tags"]}, {"雑談", "ゲーム", "音楽", "作業"})
+
+    def test_stale_snapshot_is_rebuilt(self):
+        mgr = _make_manager()
+        self._setup_guild(mgr)
+        # 別プロセスが設定を変更し、スナップショット再構築前に落ちた状態を模擬
+        mgr.db.collection("guilds").document("g1").collection("tag_groups").document("999").set(
+            {"id": 999, "guild_id": "g1", "name": "外部", "description": ""}
+        )
+        mgr.db.document("guilds/g1").set({"config_version": fake_module.Increment(1)}, merge=True)
+        config = mgr.get_guild_config("g1")
+        self.assertIn("外部", [g["name"] for g in config["tag_groups"]])
+        mgr.db.reset_counters()
+        mgr.get_guild_config("g1")
+        self.assertEqual(mgr.db.read_count, 1)
+
+    def test_calendar_sync_state_does_not_touch_config(self):
+        mgr = _make_manager()
+        self._setup_guild(mgr)
+        version = mgr.get_guild_config("g1")["version"]
+        state = {"sync_token": "tok", "calendar_id": "primary", "synced_at": "2026-01-01T00:00:00+00:00"}
+        mgr.update_calendar_sync_state("g1", "u1", state)
+        self.assertEqual(mgr.get_oauth_tokens("g1", "u1")["calendar_sync"], state)
+        self.assertEqual(mgr.get_guild_config("g1")["version"], version)
+        # 再認証でもトークン以外のフィールドとして残る
+        mgr.save_oauth_tokens(
+            guild_id="g1", access_token="at2", refresh_token="rt", token_expiry="",
+            calendar_id="primary", authenticated_by="u1", authenticated_at="",
+        )
+        self.assertEqual(mgr.get_oauth_tokens("g1", "u1")["calendar_sync"], state)
+
+    def test_calendar_legends_update_per_kind(self):
+        mgr = _make_manager()
+        self._setup_guild(mgr)
+        version = mgr.get_guild_config("g1")["version"]
+        mgr.update_calendar_legends("g1", "u1", {"color": {"event_id": "ev1", "hash": "h1"}})
+        mgr.update_calendar_legends("g1", "u1", {"tag": {"event_id": "ev2", "hash": "h2"}, "legacy_migrated": True})
+        mgr.update_calendar_legends("g1", "u1", {"color": {"event_id": "ev1", "hash": "h3"}})
+        self.assertEqual(mgr.get_oauth_tokens("g1", "u1")["calendar_legends"], {
+            "color": {"event_id": "ev1", "hash": "h3"},
+            "tag": {"event_id": "ev2", "hash": "h2"},
+            "legacy_migrated": True,
+        })
+        self.assertEqual(mgr.get_guild_config("g1")["version"], version)
+
+
+class TestOccurrenceIndex(FirestoreManagerTestCase):
+    def _week(self, mgr, weeks_from_now=0):
+        start, _ = mgr._occurrence_horizon()
+        start += timedelta(weeks=weeks_from_now)
+        return (
+            datetime.combine(start, datetime.min.time()),
+            datetime.combine(start + timedelta(days=6), datetime.max.time()),
+        )
+
+    def _populate(self, mgr):
+        _add(mgr, "g1", "毎週")
+        _add(mgr, "g1", "隔週", recurrence="biweekly", weekday=5)
+        _add(mgr, "g1", "第1・3月曜", recurrence="nth_week", nth_weeks=[1, 3], weekday=0)
+        _add(mgr, "g1", "毎月15日", recurrence="monthly_date", weekday=None, monthly_dates=[15])
+
+    def _index_doc(self, mgr, guild_id="g1"):
+        return mgr.db.document(f"guilds/{guild_id}/occurrence_index/current").get().to_dict()
+
+    def test_lookup_matches_expansion(self):
+        mgr = _make_manager()
+        plain = _make_manager(occurrence_index_weeks=0)
+        plain.db = mgr.db
+        self._populate(mgr)
+        start, _ = self._week(mgr)
+        _, end = self._week(mgr, 11)
+
+        self.assertEqual(
+            mgr.search_events(start_date=start, end_date=end, guild_id="g1"),
+            plain.search_events(start_date=start, end_date=end, guild_id="g1"),
+        )
+        self.assertEqual(len(self._index_doc(mgr)["events"]), 4)
+
+    def test_repeated_lookups_do_not_expand(self):
+        mgr = _make_manager()
+        self._populate(mgr)
+        mgr.get_this_week_events("g1")
+        mgr.db.reset_counters()
+        with patch("recurrence_calculator.RecurrenceCalculator.expand_events") as expand:
+            mgr.get_this_week_events("g1")
+            start, end = self._week(mgr, 3)
+            mgr.search_events(start_date=start, end_date=end, guild_id="g1")
+        expand.assert_not_called()
+        self.assertEqual(mgr.db.read_count, 0)
+        self.assertEqual(mgr.db._write_count, 0)
+
+    def test_skip_and_delete_update_only_that_entry(self):
+        mgr = _make_manager()
+        event_id = _add(mgr, "g1", "毎週")
+        other_id = _add(mgr, "g1", "別の予定", weekday=4)
+        start, end = self._week(mgr, 1)
+        skipped = mgr.search_events(start_date=start, end_date=end, guild_id="g1")[0]["date"]
+        other_dates = self._index_doc(mgr)["events"][str(other_id)]["dates"]
+
+        mgr.add_excluded_date(event_id, skipped, guild_id="g1")
+        doc = self._index_doc(mgr)
+        self.assertNotIn(skipped, doc["events"][str(event_id)]["dates"])
+        self.assertEqual(doc["events"][str(other_id)]["dates"], other_dates)
+        names = [e["event_name"] for e in mgr.search_events(start_date=start, end_date=end, guild_id="g1")]
+        self.assertEqual(names, ["別の予定"])
+
+        mgr.delete_event(event_id, guild_id="g1")
+        self.assertEqual(list(self._index_doc(mgr)["events"]), [str(other_id)])
+
+    def test_cold_start_reads_persisted_index(self):
+        mgr = _make_manager()
+        self._populate(mgr)
+        expected = mgr.get_this_week_events("g1")
+
+        restarted = _make_manager()
+        restarted.db = mgr.db
+        with patch("recurrence_calculator.RecurrenceCalculator.expand_events") as expand:
+            self.assertEqual(restarted.get_this_week_events("g1"), expected)
+        expand.assert_not_called()
+
+    def test_external_edit_is_reconciled(self):
+        mgr = _make_manager()
+        event_id = _add(mgr, "g1", "毎週")
+        mgr.get_this_week_events("g1")
+        # 他プロセスが曜日を変更（スナップショットリスナー経由でキャッシュに反映される）
+        mgr.db.document(f"guilds/g1/events/{event_id}").update({"weekday": 6})
+        dates = [e["date"] for e in mgr.get_this_week_events("g1")]
+        self.assertEqual([datetime.strptime(d, "%Y-%m-%d").weekday() for d in dates], [6])
+
+    def test_roll_forward_expands_only_new_weeks(self):
+        mgr = _make_manager()
+        self._populate(mgr)
+        mgr.get_this_week_events("g1")
+        horizon_start, horizon_end = mgr._occurrence_horizon()
+        next_horizon = (horizon_start + timedelta(weeks=1), horizon_end + timedelta(weeks=1))
+
+        with patch.object(mgr, "_occurrence_horizon", return_value=next_horizon):
+            self.assertEqual(mgr.roll_occurrence_indexes(), 1)
+            self.assertEqual(mgr.roll_occurrence_indexes(), 0)
+            rolled = self._index_doc(mgr)
+
+        fresh = _make_manager()
+        self._populate(fresh)
+        with patch.object(fresh, "_occurrence_horizon", return_value=next_horizon):
+            start = datetime.combine(next_horizon[0], datetime.min.time())
+            fresh.search_events(start_date=start, end_date=start + timedelta(days=6), guild_id="g1")
+            rebuilt = self._index_doc(fresh)
+        self.assertEqual(rolled["horizon_start"], next_horizon[0].isoformat())
+        self.assertEqual(rolled["horizon_end"], next_horizon[1].isoformat())
+        for event_id, entry in rolled["events"].items():
+            if entry["recurrence"] == "biweekly":
+                days = [datetime.strptime(d, "%Y-%m-%d") for d in entry["dates"]]
+                self.assertEqual({(b - a).days for a, b in zip(days, days[1:])}, {14})
+            self.assertEqual(entry, rebuilt["events"][event_id])
+
+    def test_biweekly_phase_follows_dtstart(self):
+        """隔週は Google カレンダーの DTSTART の週に並び、インデックスと展開のどちらで引いても同じ日付になる"""
+        mgr = _make_manager()
+        plain = _make_manager(occurrence_index_weeks=0)
+        plain.db = mgr.db
+        event_id = _add(mgr, "g1", "隔週", recurrence="biweekly", weekday=2)
+        horizon_start, _ = mgr._occurrence_horizon()
+        # 来週の水曜日を DTSTART にする（インデックスを作った今週とは逆の週）
+        dtstart = datetime.combine(horizon_start + timedelta(weeks=1, days=2), datetime.min.time()).replace(hour=21)
+        mgr.update_google_calendar_events(
+            event_id, [{"event_id": "g-1", "dtstart": dtstart.isoformat()}], guild_id="g1"
+        )
+
+        start, _ = self._week(mgr)
+        _, end = self._week(mgr, 3)
+        _, far_end = self._week(mgr, 19)
+        indexed = [e["date"] for e in mgr.search_events(start_date=start, end_date=end, guild_id="g1")]
+        expanded = [e["date"] for e in plain.search_events(start_date=start, end_date=end, guild_id="g1")]
+        # 期間がインデックスを超えると展開に切り替わるが、同じ開始日なら先頭の日付は変わらない
+        long_range = [e["date"] for e in mgr.search_events(start_date=start, end_date=far_end, guild_id="g1")]
+
+        expected = [(dtstart + timedelta(weeks=2 * i)).date().isoformat() for i in range(2)]
+        self.assertEqual(indexed, expected)
+        self.assertEqual(expanded, expected)
+        self.assertEqual(long_range[:2], expected)
+
+    def test_outside_horizon_falls_back_to_expansion(self):
+        mgr = _make_manager()
+        _add(mgr, "g1", "毎週")
+        start, end = self._week(mgr, 20)
+        result = mgr.search_events(start_date=start, end_date=end, guild_id="g1")
+        self.assertEqual(len(result), 1)
+        self.assertFalse(mgr.db.document("guilds/g1/occurrence_index/current").get().exists)
+
+
+class TestConflictDetection(FirestoreManagerTestCase):
+    def _candidate(self, **kwargs):
+        candidate = dict(recurrence="weekly", weekday=2, time="21:30", duration_minutes=60)
+        candidate.update(kwargs)
+        return candidate
+
+    def test_reports_overlapping_occurrences(self):
+        mgr = _make_manager()
+        event_id = _add(mgr, "g1", "集会A", calendar_owner="u1")
+        _add(mgr, "g1", "別の曜日", weekday=4)
+        _add(mgr, "g1", "直前に終わる", time="20:00", duration_minutes=60)
+
+        conflicts = mgr.find_conflicts("g1", self._candidate())
+        self.assertEqual({c["event_id"] for c in conflicts}, {event_id})
+        self.assertEqual(len(conflicts), firestore_manager.OCCURRENCE_INDEX_WEEKS)
+        self.assertEqual(conflicts[0]["calendar_owner"], "u1")
+
+    def test_skipped_dates_and_biweekly_are_respected(self):
+        mgr = _make_manager()
+        _add(mgr, "g1", "隔週", recurrence="biweekly")
+        conflicts = mgr.find_conflicts("g1", self._candidate())
+        self.assertEqual(len(conflicts), firestore_manager.OCCURRENCE_INDEX_WEEKS // 2)
+
+        first_date = conflicts[0]["date"]
+        conflicts = mgr.find_conflicts("g1", self._candidate(excluded_dates=[first_date]))
+        self.assertNotIn(first_date, [c["date"] for c in conflicts])
+
+    def test_biweekly_candidates_follow_dtstart(self):
+        """隔週同士は DTSTART の週が同じときだけ重なる（編集中の予定は保存済みの位相を使う）"""
+        mgr = _make_manager()
+        horizon_start, _ = mgr._occurrence_horizon()
+
+        def google_events(weeks):
+            dtstart = datetime.combine(horizon_start + timedelta(weeks=weeks, days=2), datetime.min.time())
+            return [{"event_id": f"g-{weeks}", "dtstart": dtstart.replace(hour=21).isoformat()}]
+
+        existing_id = _add(mgr, "g1", "隔週A", recurrence="biweekly")
+        mgr.update_google_calendar_events(existing_id, google_events(1), guild_id="g1")
+
+        same_week = self._candidate(recurrence="biweekly", google_calendar_events=google_events(3))
+        conflicts = mgr.find_conflicts("g1", same_week)
+        self.assertEqual(len(conflicts), firestore_manager.OCCURRENCE_INDEX_WEEKS // 2)
+        self.assertEqual(conflicts[0]["date"], (horizon_start + timedelta(weeks=1, days=2)).isoformat())
+        other_week = self._candidate(recurrence="biweekly", google_calendar_events=google_events(0))
+        self.assertEqual(mgr.find_conflicts("g1", other_week), [])
+
+        # 編集で再登録された予定は、渡された古い google_calendar_events ではなく保存済みの DTSTART で判定する
+        edited_id = _add(mgr, "g1", "隔週B", recurrence="biweekly")
+        mgr.update_google_calendar_events(edited_id, google_events(0), guild_id="g1")
+        stale = self._candidate(recurrence="biweekly", google_calendar_events=google_events(1))
+        self.assertEqual(mgr.find_conflicts("g1", stale, exclude_event_id=edited_id), [])
+
+    def test_edit_excludes_itself(self):
+        mgr = _make_manager()
+        event_id = _add(mgr, "g1", "集会A")
+        self.assertEqual(mgr.find_conflicts("g1", self._candidate(), exclude_event_id=event_id), [])
+
+    def test_index_follows_incremental_changes(self):
+        mgr = _make_manager()
+        event_id = _add(mgr, "g1", "集会A")
+        other_id = _add(mgr, "g1", "集会B", weekday=5)
+        self.assertTrue(mgr.find_conflicts("g1", self._candidate()))
+        index = mgr._conflict_indexes["g1"]["index"]
+        unchanged = mgr._conflict_indexes["g1"]["entries"][str(other_id)]
+
+        mgr.update_event(event_id, {"time": "18:00"}, guild_id="g1")
+        self.assertEqual(mgr.find_conflicts("g1", self._candidate()), [])
+        # 変更のない予定のエントリは入れ替えない
+        self.assertIs(mgr._conflict_indexes["g1"]["entries"][str(other_id)], unchanged)
+
+        mgr.delete_event(other_id, guild_id="g1")
+        self.assertEqual(mgr.find_conflicts("g1", self._candidate(weekday=5)), [])
+        self.assertNotIn(str(other_id), index)
+
+    def test_unchanged_guild_skips_reconciliation(self):
+        mgr = _make_manager()
+        _add(mgr, "g1", "集会A")
+        mgr.find_conflicts("g1", self._candidate())
+        with patch.object(mgr, "_occurrence_entries") as entries:
+            self.assertTrue(mgr.find_conflicts("g1", self._candidate()))
+        entries.assert_not_called()
+
+        # 他プロセスの変更（スナップショット）でキャッシュが変われば合わせ直す
+        mgr.db.document("guilds/g1/events/1").update({"weekday": 6})
+        self.assertEqual(mgr.find_conflicts("g1", self._candidate()), [])
+
+    def test_irregular_or_untimed_candidates_are_skipped(self):
+        mgr = _make_manager()
+        _add(mgr, "g1", "集会A")
+        self.assertEqual(mgr.find_conflicts("g1", self._candidate(recurrence="irregular")), [])
+        self.assertEqual(mgr.find_conflicts("g1", self._candidate(time=None)), [])
+
+
+class TestAsyncFirestoreManager(FirestoreManagerTestCase):
+    def test_methods_run_off_the_event_loop_thread(self):
+        mgr = _make_manager()
+        async_mgr = AsyncFirestoreManager(mgr)
+        loop_threads = []
+        call_threads = []
+        original = mgr.get_all_active_events
+
+        def _recording(*args, **kwargs):
+            call_threads.append(threading.get_ident())
+            return original(*args, **kwargs)
+
+        mgr.get_all_active_events = _recording
+
+        async def scenario():
+            loop_threads.append(threading.get_ident())
+            event_id = await async_mgr.add_event(
+                guild_id="g1", event_name="集会A", tags=[], recurrence="weekly",
+                nth_weeks=None, event_type=None, time="21:00", weekday=2,
+            )
+            events = await async_mgr.get_all_active_events("g1")
+            return event_id, events
+
+        event_id, events = asyncio.run(scenario())
+        self.assertEqual([e["id"] for e in events], [event_id])
+        self.assertNotEqual(call_threads[0], loop_threads[0])
+
+    def test_shares_cache_with_sync_manager(self):
+        mgr = _make_manager()
+        async_mgr = AsyncFirestoreManager(mgr)
+        _add(mgr, "g1", "集会A")
+        mgr.get_all_active_events("g1")
+        mgr.db.reset_counters()
+        asyncio.run(async_mgr.get_all_active_events("g1"))
+        self.assertEqual(mgr.db.read_count, 0)
+        self.assertIs(async_mgr.sync, mgr)
+
+    def test_async_unit_of_work(self):
+        mgr = _make_manager()
+        async_mgr = AsyncFirestoreManager(mgr)
+
+        async def scenario():
+            uow = async_mgr.unit_of_work()
+            event_id = await uow.add_event(
+                guild_id="g1", event_name="集会A", tags=[], recurrence="weekly",
+                nth_weeks=None, event_type=None, time="21:00", weekday=2,
+            )
+            await uow.commit()
+            return event_id
+
+        event_id = asyncio.run(scenario())
+        self.assertTrue(mgr.db.document(f"guilds/g1/events/{event_id}").get().exists)
+
+    def test_private_attributes_are_not_exposed(self):
+        async_mgr = AsyncFirestoreManager(_make_manager())
+        with self.assertRaises(AttributeError):
+            async_mgr._next_id
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+"""rate_limiter.py のユニットテスト"""
+import asyncio
+import json
+import types
+import unittest
+
+from rate_limiter import CalendarRateLimiter, TokenBucket, is_retryable
+
+
+class FakeClock:
+    """sleep で進む仮想時計"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeHttpError(Exception):
+    def __init__(self, status, reason=None, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.resp = types.SimpleNamespace(status=status, get=headers.get)
+        self.content = json.dumps({"error": {"errors": [{"reason": reason}]}}).encode() if reason else b""
+
+
+def _limiter(clock, **kwargs):
+    return CalendarRateLimiter(clock=clock, sleep=clock.sleep, random_func=lambda: 1.0, **kwargs)
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_paced(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0, 0.0, 0.0])
+        # 予約済みの分も差し引くので、待ち時間は先着順に 0.5 秒ずつ延びる
+        self.assertAlmostEqual(bucket.reserve(), 0.5)
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+
+    def test_refill_is_capped(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1, capacity=2, clock=clock)
+        bucket.reserve(2)
+        clock.now += 100
+        self.assertEqual(bucket.reserve(2), 0.0)
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+
+
+class TestRetryable(unittest.TestCase):
+    def test_statuses(self):
+        self.assertTrue(is_retryable(FakeHttpError(429)))
+        self.assertTrue(is_retryable(FakeHttpError(503)))
+        self.assertTrue(is_retryable(FakeHttpError(403, reason="rateLimitExceeded")))
+        self.assertFalse(is_retryable(FakeHttpError(403, reason="forbidden")))
+        self.assertFalse(is_retryable(FakeHttpError(404)))
+        self.assertFalse(is_retryable(ValueError("x")))
+
+
+class TestCalendarRateLimiter(unittest.TestCase):
+    def test_owner_bucket_throttles_only_that_owner(self):
+        clock = FakeClock()
+        limiter = _limiter(clock, project_rate=100, project_burst=100, owner_rate=1, owner_burst=1)
+        self.assertEqual(limiter.acquire("a"), 0.0)
+        self.assertEqual(limiter.acquire("b"), 0.0)
+        self.assertAlmostEqual(limiter.acquire("a"), 1.0)
+        self.assertEqual(limiter.metrics()["throttled"], 1)
+
+    def test_retries_with_backoff_then_succeeds(self):
+        clock = FakeClock()
+        limiter = _limiter(clock, base_delay=1, max_delay=8)
+        errors = [FakeHttpError(429), FakeHttpError(500)]
+
+        def call():
+            if errors:
+                raise errors.pop(0)
+            return "ok"
+
+        self.assertEqual(limiter.execute("a", call), "ok")
+        self.assertEqual(clock.sleeps, [1.0, 2.0])
+        metrics = limiter.metrics()
+        self.assertEqual(metrics["calls"], 3)
+        self.assertEqual(metrics["retries"], 2)
+        self.assertEqual(metrics["errors_by_status"], {"429": 1, "500": 1})
+
+    def test_retry_after_header_is_respected(self):
+        clock = FakeClock()
+        limiter = _limiter(clock, base_delay=1, max_delay=8)
+        errors = [FakeHttpError(429, retry_after=5)]
+
+        def call():
+            if errors:
+                raise errors.pop(0)
+            return "ok"
+
+        limiter.execute("a", call)
+        self.assertEqual(clock.sleeps, [5.0])
+
+    def test_gives_up_and_raises(self):
+        clock = FakeClock()
+        limiter = _limiter(clock, max_retries=2, base_delay=1, max_delay=8)
+
+        def call():
+            raise FakeHttpError(503)
+
+        with self.assertRaises(FakeHttpError):
+            limiter.execute("a", call)
+        self.assertEqual(len(clock.sleeps), 2)
+        self.assertEqual(limiter.metrics()["failures"], 1)
+
+    def test_non_retryable_raises_immediately(self):
+        clock = FakeClock()
+        limiter = _limiter(clock)
+
+        def call():
+            raise FakeHttpError(404)
+
+        with self.assertRaises(FakeHttpError):
+            limiter.execute("a", call)
+        self.assertEqual(clock.sleeps, [])
+
+    def test_never_waits_on_the_event_loop_thread(self):
+        """イベントループのスレッドでは待たずに例外、ワーカースレッドからなら待つ"""
+        clock = FakeClock()
+        limiter = _limiter(clock, project_rate=1, project_burst=1)
+
+        async def main():
+            self.assertEqual(limiter.acquire("a"), 0.0)
+            with self.assertRaises(RuntimeError):
+                limiter.acquire("a")
+            return await asyncio.to_thread(limiter.acquire, "a")
+
+        self.assertGreater(asyncio.run(main()), 0)
+        self.assertEqual(len(clock.sleeps), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
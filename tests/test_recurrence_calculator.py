@@ -93,6 +93,120 @@ class TestCalculateDates(unittest.TestCase):
             self.assertGreaterEqual(last.month, 4)
 
 
+class TestExpandEvents(unittest.TestCase):
+    def test_matches_calculate_dates(self):
+        """一括展開の結果が予定ごとの calculate_dates と一致する"""
+        start = datetime(2026, 1, 10)
+        end = datetime(2026, 6, 30)
+        events = [
+            {"recurrence": "weekly", "weekday": 2},
+            {"recurrence": "biweekly", "weekday": 5},
+            {"recurrence": "nth_week", "nth_weeks": [1, 3], "weekday": 0},
+            {"recurrence": "monthly_date", "monthly_dates": [15, 31]},
+            {"recurrence": "weekly", "weekday": 2},
+        ]
+        results = RecurrenceCalculator.expand_events(events, start, end)
+        self.assertEqual(len(results), len(events))
+        for event, dates in zip(events, results):
+            expected = RecurrenceCalculator.calculate_dates(
+                event["recurrence"], event.get("nth_weeks"), event.get("weekday"), start,
+                months_ahead=0, end_date_limit=end, monthly_dates=event.get("monthly_dates"),
+            )
+            self.assertEqual(dates, expected)
+
+    def test_biweekly_phase_does_not_depend_on_start(self):
+        """隔週は phase の週に揃い、開始日をずらしても同じ並びになる"""
+        event = {"recurrence": "biweekly", "weekday": 2, "phase": "2026-10-21"}
+        end = datetime(2026, 11, 30)
+        for start in (datetime(2026, 10, 12), datetime(2026, 10, 19)):
+            with self.subTest(start=start):
+                dates = RecurrenceCalculator.expand_events([event], start, end)[0]
+                self.assertEqual(dates[:2], [datetime(2026, 10, 21), datetime(2026, 11, 4)])
+
+    def test_same_pattern_results_are_independent(self):
+        """同じパターンの予定でも結果リストは別オブジェクト"""
+        events = [{"recurrence": "weekly", "weekday": 1}] * 2
+        first, second = RecurrenceCalculator.expand_events(
+            events, datetime(2026, 1, 1), datetime(2026, 1, 31)
+        )
+        first.clear()
+        self.assertEqual(len(second), 4)
+
+    def test_weekday_none_returns_empty(self):
+        dates = RecurrenceCalculator.calculate_dates("weekly", [], None, datetime(2026, 1, 1))
+        self.assertEqual(dates, [])
+
+    def test_weekly_starts_on_start_date_weekday(self):
+        """開始日がちょうど対象曜日ならその日から含む"""
+        start = datetime(2026, 1, 7)  # 水曜日
+        dates = RecurrenceCalculator.calculate_dates(
+            "weekly", [], 2, start, end_date_limit=datetime(2026, 1, 28)
+        )
+        self.assertEqual([d.day for d in dates], [7, 14, 21, 28])
+
+    def test_includes_first_day_of_end_month(self):
+        """終了月の1日も時刻に関係なく範囲内なら含まれる"""
+        start = datetime(2026, 1, 20, 18, 0)
+        end = datetime(2026, 2, 28)
+        dates = RecurrenceCalculator.calculate_dates(
+            "monthly_date", [], 0, start, end_date_limit=end, monthly_dates=[1]
+        )
+        self.assertEqual([d.date() for d in dates], [datetime(2026, 2, 1).date()])
+
+
+class TestParseRRule(unittest.TestCase):
+    def _roundtrip(self, recurrence, nth_weeks, weekday, monthly_dates, dtstart, end):
+        rrule = RecurrenceCalculator.to_rrule(recurrence, nth_weeks, weekday, monthly_dates)
+        return RecurrenceCalculator.parse_rrule(rrule).between(dtstart, dtstart, end)
+
+    def test_roundtrip_matches_calculate_dates(self):
+        """to_rrule の出力を展開すると calculate_dates と同じ日付になる"""
+        end = datetime(2026, 8, 31, 23, 59)
+        cases = [
+            ("weekly", [], 5, None, datetime(2026, 1, 3, 21, 0)),
+            ("biweekly", [], 2, None, datetime(2026, 1, 7, 21, 0)),
+            ("nth_week", [1, 3], 0, None, datetime(2026, 1, 5, 22, 0)),
+            ("monthly_date", [], None, [15, 31], datetime(2026, 1, 15, 20, 0)),
+        ]
+        for recurrence, nth_weeks, weekday, monthly_dates, dtstart in cases:
+            with self.subTest(recurrence=recurrence):
+                occurrences = self._roundtrip(recurrence, nth_weeks, weekday, monthly_dates, dtstart, end)
+                expected = RecurrenceCalculator.calculate_dates(
+                    recurrence, nth_weeks, weekday, dtstart,
+                    end_date_limit=end, monthly_dates=monthly_dates,
+                )
+                self.assertEqual([d.date() for d in occurrences], [d.date() for d in expected])
+                self.assertTrue(all(d.time() == dtstart.time() for d in occurrences))
+
+    def test_biweekly_phase_follows_dtstart(self):
+        """隔週は検索期間ではなく dtstart の週から数える"""
+        rule = RecurrenceCalculator.parse_rrule("RRULE:FREQ=WEEKLY;INTERVAL=2;BYDAY=WE")
+        dates = rule.between(datetime(2026, 1, 7, 21, 0), datetime(2026, 1, 12), datetime(2026, 2, 28))
+        self.assertEqual([d.day for d in dates], [21, 4, 18])
+
+    def test_negative_byday_and_until(self):
+        rule = RecurrenceCalculator.parse_rrule("RRULE:FREQ=MONTHLY;BYDAY=-1FR;UNTIL=20260331")
+        dates = rule.between(datetime(2026, 1, 30, 21, 0), datetime(2026, 1, 1), datetime(2026, 12, 31))
+        self.assertEqual([d.date().isoformat() for d in dates], ["2026-01-30", "2026-02-27", "2026-03-27"])
+
+    def test_parse_is_cached(self):
+        a = RecurrenceCalculator.parse_rrule("RRULE:FREQ=WEEKLY;BYDAY=SA")
+        b = RecurrenceCalculator.parse_rrule("RRULE:FREQ=WEEKLY;BYDAY=SA")
+        self.assertIs(a, b)
+
+    def test_equivalent_rules_compare_equal(self):
+        self.assertEqual(
+            RecurrenceCalculator.parse_rrule("RRULE:FREQ=WEEKLY;BYDAY=SA"),
+            RecurrenceCalculator.parse_rrule("RRULE:BYDAY=SA;FREQ=WEEKLY;INTERVAL=1"),
+        )
+
+    def test_unsupported_rules_raise(self):
+        for rrule in ("RRULE:FREQ=DAILY", "RRULE:FREQ=WEEKLY;COUNT=5;BYDAY=MO", "RRULE:FREQ=WEEKLY;BYDAY=1MO"):
+            with self.subTest(rrule=rrule):
+                with self.assertRaises(ValueError):
+                    RecurrenceCalculator.parse_rrule(rrule)
+
+
 class TestGetNthWeekday(unittest.TestCase):
     def test_first_monday_january_2026(self):
         result = RecurrenceCalculator._get_nth_weekday(2026, 1, 1, 0)